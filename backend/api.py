@@ -1,14 +1,19 @@
 import uvicorn
-from fastapi import FastAPI, Request
-from fastapi.responses import StreamingResponse
+from fastapi import FastAPI, Request, HTTPException
+from fastapi.responses import StreamingResponse, FileResponse, JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 import asyncio
+import contextlib
 import json
 import re
 import os
+import shutil
 import sys
+import uuid
 from pathlib import Path
+from typing import List, Optional
+from pydantic import BaseModel
 from src.visual_comic_crew.crew import VisualComicCrew
 from crewai.tasks.task_output import TaskOutput
 
@@ -22,6 +27,18 @@ sys.path.insert(0, str(backend_dir))
 
 # Now import ComicExporter
 from src.utils.comic_exporter import ComicExporter
+from src.utils.job_manager import get_job_manager, JobQueueFullError
+from src.utils.run_context import RunContext, run_context_scope
+from src.utils.run_events import RunEventBuffer, get_event_hub, parse_last_event_id
+from src.utils.registry_events import RegistryChange, subscribe as subscribe_registry_changes
+from src.utils.panel_paging import MAX_PANEL_COUNT
+from src.utils.cancellation import RunCancelledError
+from src.utils.reference_staging import get_reference_stager
+from src.utils.registry_utils import forget_run_snapshots
+from src.utils.result_cache import CACHE_ENABLED, get_result_cache
+from src.utils.export_pipeline import get_export_pipeline
+from src.utils.batch_scheduler import BatchScheduler
+from src.utils.metrics import REGISTRY, QUEUE_DEPTH, ACTIVE_RUNS, RUNS_TOTAL
 
 # Load environment variables from .env file
 try:
@@ -67,58 +84,91 @@ frontend_comic_panels = project_root / "frontend" / "public" / "comic_panels"
 frontend_comic_panels.mkdir(parents=True, exist_ok=True)
 app.mount("/comic_panels", StaticFiles(directory=str(frontend_comic_panels)), name="comic_panels")
 
+# Seconds between queue position updates / keep-alives while a stream waits for events
+QUEUE_POSITION_INTERVAL = 2.0
+# Seconds a run may go without any connected stream before it is cancelled
+DISCONNECT_GRACE_SECONDS = float(os.getenv("COMIC_DISCONNECT_GRACE_SECONDS", "30"))
+
+# Contexts of runs that have not finished yet, by run ID
+_active_runs = {}
+# Pending abandonment checks; referenced here so the tasks are not garbage collected
+_abandon_checks = set()
+
 def sanitize_filename(name: str) -> str:
     """Sanitizes a string to be a valid filename."""
     name = name.strip().lower()
     name = re.sub(r'[^a-z0-9_]+', '', name.replace(' ', '_'))
     return name[:50]
 
-async def run_crew_stream(topic: str, stream_callback):
+# Stand-in markdown of a run whose crew produced nothing usable
+NO_CONTENT = "(No content produced)"
+
+
+def _is_real_content(markdown_content: str) -> bool:
+    """False for the placeholders a failed extraction leaves behind; those must not be cached."""
+    return bool(markdown_content) and markdown_content != NO_CONTENT and not markdown_content.startswith("(Extraction error:")
+
+
+def run_crew_stream(topic: str, stream_callback, run_context: RunContext = None, panel_count: Optional[int] = None):
     """
     Runs the CrewAI process and uses a callback to stream status updates.
+    This is blocking and is meant to be executed on a JobManager worker thread.
+    When a run_context is given, the crew uses that run's isolated workspace.
+    The markdown is reported as soon as it is saved; the PDF is rendered by the export
+    pipeline afterwards. Returns the pending ExportJob, or None if the run did not finish.
+    panel_count sets the comic's length; the crew's default applies when it is None.
     """
     try:
         inputs = {'topic': topic}
-        stream_callback(f"data: {json.dumps({'status': 'Initializing crew objects', 'details': None})}\n\n")
+        if panel_count:
+            inputs['panel_count'] = panel_count
+        stream_callback({'status': 'Initializing crew objects', 'details': None})
         print("DEBUG: About to create VisualComicCrew instance")
-        crew = VisualComicCrew()
+        crew = VisualComicCrew(run_context=run_context)
         print("DEBUG: VisualComicCrew instance created successfully")
-        stream_callback(f"data: {json.dumps({'status': 'Crew initialized', 'details': f'CrewBase instance created'})}\n\n")
+        stream_callback({'status': 'Crew initialized', 'details': f'CrewBase instance created'})
 
-        stream_callback(f"data: {json.dumps({'status': 'Starting Crew Execution...', 'details': None})}\n\n")
-        stream_callback(f"data: {json.dumps({'status': 'Running crew kickoff', 'details': None})}\n\n")
+        stream_callback({'status': 'Starting Crew Execution...', 'details': None})
+        stream_callback({'status': 'Running crew kickoff', 'details': None})
         # The CrewBase-decorated class exposes a `crew()` method that returns the Crew instance.
         # Call kickoff on that Crew instance to execute the workflow.
-        stream_callback(f"data: {json.dumps({'status': 'Calling crew().kickoff', 'details': None})}\n\n")
+        stream_callback({'status': 'Calling crew().kickoff', 'details': None})
         print("DEBUG: About to call crew().kickoff()")
         try:
             result = crew.crew().kickoff(inputs=inputs)
             print("DEBUG: crew().kickoff() completed")
+        except RunCancelledError as e:
+            print(f"DEBUG: crew().kickoff() cancelled: {e}")
+            stream_callback({'status': 'cancelled', 'details': str(e)})
+            return
         except Exception as e:
             err_text = str(e)
             print(f"DEBUG: Exception in crew().kickoff(): {err_text}")
-            stream_callback(f"data: {json.dumps({'status': 'error', 'details': err_text})}\n\n")
+            stream_callback({'status': 'error', 'details': err_text})
             # If it's an Anthropic model-not-found error, attempt a one-time fallback to OpenAI GPT-4o
             if 'claude-sonnet-4' in err_text or 'AnthropicException' in err_text or 'model: claude' in err_text:
                 try:
-                    stream_callback(f"data: {json.dumps({'status': 'info', 'details': 'Detected Anthropic model error; retrying with fallback LLMs (openai/gpt-4o)'})}\n\n")
+                    stream_callback({'status': 'info', 'details': 'Detected Anthropic model error; retrying with fallback LLMs (openai/gpt-4o)'})
                     # Replace anthropic/claude entries in the crew's agents_config
                     for k, v in crew.agents_config.items():
                         if isinstance(v, dict) and 'llm' in v and isinstance(v['llm'], str) and ('anthropic' in v['llm'].lower() or 'claude' in v['llm'].lower()):
                             v['llm'] = 'openai/gpt-4o'
-                    stream_callback(f"data: {json.dumps({'status': 'info', 'details': 'Retrying kickoff with updated agent LLMs'})}\n\n")
+                    stream_callback({'status': 'info', 'details': 'Retrying kickoff with updated agent LLMs'})
                     try:
                         result = crew.crew().kickoff(inputs=inputs)
                     except Exception as e2:
-                        stream_callback(f"data: {json.dumps({'status': 'error', 'details': f'Retry failed: {e2}'})}\n\n")
+                        stream_callback({'status': 'error', 'details': f'Retry failed: {e2}'})
                         return
                 except Exception:
                     return
             else:
                 return
+        if run_context is not None and run_context.cancel_token.is_cancelled:
+            stream_callback({'status': 'cancelled', 'details': f'Run cancelled: {run_context.cancel_token.reason}'})
+            return
         # Debug: describe result type
         result_type = type(result).__name__
-        stream_callback(f"data: {json.dumps({'status': 'Crew execution finished', 'details': f'Result type: {result_type}'})}\n\n")
+        stream_callback({'status': 'Crew execution finished', 'details': f'Result type: {result_type}'})
 
         def _extract(res):
             try:
@@ -142,13 +192,13 @@ async def run_crew_stream(topic: str, stream_callback):
                 return f"(Extraction error: {ie})"
             return str(res)
 
-        markdown_content = _extract(result) or "(No content produced)"
-        stream_callback(f"data: {json.dumps({'status': 'Crew execution finished', 'details': f'Extracted length: {len(markdown_content)} chars'})}\n\n")
+        markdown_content = _extract(result) or NO_CONTENT
+        stream_callback({'status': 'Crew execution finished', 'details': f'Extracted length: {len(markdown_content)} chars'})
         # Debug: print final markdown content
         print(f"[DEBUG] Final markdown:\n{markdown_content}")
         
     except Exception as outer_e:
-        stream_callback(f"data: {json.dumps({'status': 'error', 'details': f'Outer exception: {outer_e}'})}\n\n")
+        stream_callback({'status': 'error', 'details': f'Outer exception: {outer_e}'})
         return
 
     # Save the final result
@@ -159,36 +209,353 @@ async def run_crew_stream(topic: str, stream_callback):
     safe_topic = sanitize_filename(topic)
     exporter = ComicExporter(safe_topic)
     save_path = exporter.save_markdown(markdown_content)
-    exporter.generate_pdf(markdown_content)
 
-    stream_callback(f"data: {json.dumps({'status': 'complete', 'markdown': markdown_content, 'file_path': str(save_path)})}\n\n")
+    # The comic is ready to read now; the PDF follows as export_* events
+    stream_callback({'status': 'complete', 'markdown': markdown_content, 'file_path': str(save_path)})
 
+    run_id = run_context.run_id if run_context is not None else uuid.uuid4().hex[:12]
 
-@app.get("/generate-comic/")
-async def generate_comic(request: Request, topic: str = "A cat who wants to fly"):
+    def on_export_done(export_job):
+        if export_job.status == 'ready':
+            stream_callback({'status': 'export_ready', 'format': 'pdf', 'pdf_path': export_job.pdf_path,
+                             'url': f'/runs/{run_id}/export?format=pdf'})
+        else:
+            stream_callback({'status': 'export_failed', 'format': 'pdf', 'details': export_job.error})
+        # Only a real comic with a finished PDF is worth serving again for days
+        if CACHE_ENABLED and export_job.status == 'ready' and _is_real_content(markdown_content):
+            try:
+                get_result_cache().put(topic, markdown_content, file_path=save_path, pdf_path=export_job.pdf_path,
+                                       panel_count=panel_count)
+            except Exception as cache_e:
+                print(f"DEBUG: Could not cache result for '{topic}': {cache_e}")
+
+    stream_callback({'status': 'export_started', 'format': 'pdf', 'details': 'Rendering PDF in the background'})
+    return get_export_pipeline().submit(run_id, safe_topic, markdown_content, exporter.timestamp,
+                                        markdown_path=save_path, on_done=on_export_done)
+
+
+def _announce_ready_panel(change: RegistryChange):
+    """Push a panel_ready event to the run's stream as soon as one of its panels is verified."""
+    if not change.run_id or not change.became_verified:
+        return
+    buffer = get_event_hub().get(change.run_id)
+    if buffer is None or buffer.closed:
+        return
+    buffer.publish('panel_ready', status='panel_ready', details=f'{change.panel_id} is ready',
+                   panel_id=change.panel_id, filename=change.filename, url=f'/comic_panels/{change.filename}')
+
+
+# Registry writes happen on the crew's worker threads of this process
+subscribe_registry_changes(_announce_ready_panel)
+
+
+def _cancel_run(run_id: str, reason: str) -> bool:
     """
-    Endpoint to generate a comic. It streams the progress of the CrewAI agents.
+    Cancel a run. A queued run is dropped before it starts; a running crew stops at its next
+    step, task or image tool call. Returns False if the run is unknown or already finished.
     """
+    run_context = _active_runs.get(run_id)
+    if run_context is None:
+        return False
+    print(f"DEBUG: Cancelling run {run_id} ({reason})")
+    run_context.cancel_token.cancel(reason)
+    if get_job_manager().cancel(run_id, reason):
+        # The job never started, so nobody else will finish the run
+        _finish_run(run_context, cancelled=True)
+        buffer = get_event_hub().get(run_id)
+        if buffer is not None:
+            buffer.publish('cancelled', status='cancelled', details=f'Run cancelled before it started: {reason}')
+            buffer.close()
+    return True
+
+
+def _finish_run(run_context: RunContext, cancelled: bool = False):
+    """
+    Drop the run's cached registry snapshots, staged references nobody uses any more,
+    and the run's whole workspace if it was cancelled.
+    """
+    _active_runs.pop(run_context.run_id, None)
+    forget_run_snapshots(run_context)
+    get_reference_stager().prune()
+    if cancelled:
+        shutil.rmtree(run_context.workspace, ignore_errors=True)
+
+
+async def _cancel_if_abandoned(buffer: RunEventBuffer):
+    """Cancel a run that still has no stream attached after the grace period."""
+    await asyncio.sleep(DISCONNECT_GRACE_SECONDS)
+    if not buffer.closed and buffer.subscriber_count == 0:
+        _cancel_run(buffer.run_id, "client disconnected")
+
+
+def _stream_run_events(request: Request, buffer: RunEventBuffer, after_seq: int = 0):
+    """
+    SSE generator replaying a run's buffered events after after_seq and then following it live.
+    The stream ends once the run's buffer is closed and drained. If the client goes away
+    and does not reconnect within DISCONNECT_GRACE_SECONDS, the run is cancelled.
+    """
+    job_manager = get_job_manager()
+
     async def event_generator():
-        # A queue to hold messages from the crew callback
-        message_queue = asyncio.Queue()
-
-        def stream_callback(message):
-            message_queue.put_nowait(message)
-
-        # Run the crew in a background task 
-        asyncio.create_task(run_crew_stream(topic, stream_callback))
-
-        # Yield messages from the queue as they arrive
-        while True:
-            message = await message_queue.get()
-            yield message
-            if '"status": "complete"' in message or '"status": "error"' in message:
-                break
-    
+        position = None
+        try:
+            async with contextlib.aclosing(buffer.stream(after_seq, heartbeat=QUEUE_POSITION_INTERVAL)) as events:
+                async for event in events:
+                    if event is not None:
+                        yield event.to_sse()
+                        continue
+                    if await request.is_disconnected():
+                        print(f"DEBUG: Client of run {buffer.run_id} disconnected")
+                        break
+                    # Heartbeat: report queue movement without a numbered (replayable) event
+                    new_position = job_manager.queue_position(buffer.run_id)
+                    if new_position and new_position != position:
+                        position = new_position
+                        yield f"data: {json.dumps({'type': 'queued', 'status': 'queued', 'details': f'Job {buffer.run_id} queued at position {position}', 'job_id': buffer.run_id, 'queue_position': position})}\n\n"
+                    else:
+                        yield ": keep-alive\n\n"
+        finally:
+            if not buffer.closed:
+                # Give the client a chance to reconnect with Last-Event-ID before cancelling
+                task = asyncio.get_running_loop().create_task(_cancel_if_abandoned(buffer))
+                _abandon_checks.add(task)
+                task.add_done_callback(_abandon_checks.discard)
+
     return StreamingResponse(event_generator(), media_type="text/event-stream")
 
 
+def _publish_cached_result(cached: dict) -> RunEventBuffer:
+    """Replay a cached comic as a finished run, using the same event contract as a fresh run."""
+    run_id = uuid.uuid4().hex[:12]
+    buffer = get_event_hub().create(run_id)
+    buffer.publish('info', status='info', details=f"Found a cached comic for '{cached['topic']}'", cached=True)
+    buffer.publish('complete', status='complete', markdown=cached['markdown'], file_path=cached.get('file_path'),
+                   pdf_path=cached.get('pdf_path'), cached=True)
+    buffer.close()
+    return buffer
+
+
+def _validate_panel_count(panel_count: Optional[int]):
+    if panel_count is not None and not 1 <= panel_count <= MAX_PANEL_COUNT:
+        raise HTTPException(status_code=400, detail=f"panel_count must be between 1 and {MAX_PANEL_COUNT}")
+
+
+def _start_run(topic: str, force_regenerate: bool = False, panel_count: Optional[int] = None) -> RunEventBuffer:
+    """
+    Start a comic run and return its event buffer. Blocking (the result cache is read from
+    disk), so async callers should run it in a thread.
+
+    Raises:
+        JobQueueFullError: if the worker pool's queue is full
+    """
+    if CACHE_ENABLED and not force_regenerate:
+        cached = get_result_cache().get(topic, panel_count)
+        if cached is not None:
+            return _publish_cached_result(cached)
+
+    job_manager = get_job_manager()
+    # Each run gets its own workspace so concurrent comics do not share a registry
+    run_context = RunContext.create()
+    buffer = get_event_hub().create(run_context.run_id)
+    _active_runs[run_context.run_id] = run_context
+
+    def run_job():
+        export_job = None
+        try:
+            run_context.cancel_token.raise_if_cancelled()
+            with run_context_scope(run_context):
+                export_job = run_crew_stream(topic, buffer.publish_status, run_context=run_context,
+                                             panel_count=panel_count)
+        except RunCancelledError as e:
+            buffer.publish('cancelled', status='cancelled', details=str(e))
+        finally:
+            _finish_run(run_context, cancelled=run_context.cancel_token.is_cancelled)
+            # The worker is free now; batches may launch their next topic while the PDF renders
+            buffer.settle()
+            if export_job is not None:
+                # The stream stays open for the export_ready / export_failed event
+                export_job.future.add_done_callback(lambda _future: buffer.close())
+            else:
+                # Ends every stream of this run, even if it returned without a final status
+                buffer.close()
+
+    try:
+        job = job_manager.submit(run_job, topic=topic, job_id=run_context.run_id,
+                                 cancel_token=run_context.cancel_token)
+    except JobQueueFullError as e:
+        _finish_run(run_context, cancelled=True)
+        buffer.publish('error', status='error', details=str(e))
+        buffer.close()
+        raise
+
+    buffer.add_close_callback(lambda buf: RUNS_TOTAL.inc(outcome=buf.outcome or 'failed'))
+    position = job_manager.queue_position(job.job_id)
+    details = f'Job {job.job_id} queued at position {position}' if position else f'Job {job.job_id} assigned to a worker'
+    buffer.publish('queued', status='queued', details=details, job_id=job.job_id, queue_position=position)
+    return buffer
+
+
+@app.get("/generate-comic/")
+async def generate_comic(request: Request, topic: str = "A cat who wants to fly", force_regenerate: bool = False,
+                         panel_count: Optional[int] = None):
+    """
+    Endpoint to generate a comic. It streams the progress of the CrewAI agents.
+    The run is queued on the worker pool; the stream reports its job ID and queue position.
+    Every event carries an ID of the form '<run_id>:<seq>'; a reconnect that sends
+    Last-Event-ID resumes the existing run instead of starting a new generation.
+    A topic that was already generated with the current crew configuration is answered
+    from the result cache unless force_regenerate is set.
+    panel_count sets the comic's length (1 to COMIC_MAX_PANEL_COUNT, default COMIC_DEFAULT_PANEL_COUNT).
+    """
+    _validate_panel_count(panel_count)
+    resume_run_id, resume_seq = parse_last_event_id(request.headers.get("last-event-id"))
+    if resume_run_id:
+        buffer = get_event_hub().get(resume_run_id)
+        if buffer is not None:
+            print(f"DEBUG: Resuming run {resume_run_id} after event {resume_seq}")
+            return _stream_run_events(request, buffer, resume_seq)
+
+    try:
+        buffer = await asyncio.to_thread(_start_run, topic, force_regenerate, panel_count)
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    return _stream_run_events(request, buffer)
+
+
+class BatchRequest(BaseModel):
+    topics: List[str]
+    max_concurrency: Optional[int] = None
+    force_regenerate: bool = False
+    panel_count: Optional[int] = None
+
+
+def _launch_batch_run(topic: str, options: dict) -> RunEventBuffer:
+    return _start_run(topic, force_regenerate=options.get('force_regenerate', False),
+                      panel_count=options.get('panel_count'))
+
+
+batch_scheduler = BatchScheduler(_launch_batch_run, default_concurrency=get_job_manager().max_workers)
+
+
+@app.post("/batches", status_code=202)
+async def create_batch(batch_request: BatchRequest):
+    """
+    Generate comics for a list of topics. The batch shares the worker pool with interactive
+    runs and keeps at most max_concurrency of its runs queued or running at once.
+    Each item's run_id can be followed through /runs/{run_id}/events.
+    """
+    _validate_panel_count(batch_request.panel_count)
+    try:
+        batch = await asyncio.to_thread(
+            batch_scheduler.create,
+            batch_request.topics,
+            batch_request.max_concurrency,
+            {'force_regenerate': batch_request.force_regenerate, 'panel_count': batch_request.panel_count},
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return batch.to_dict()
+
+
+@app.get("/batches")
+async def list_batches():
+    """List recent batches with their aggregate progress."""
+    return {'batches': batch_scheduler.list_batches()}
+
+
+@app.get("/batches/{batch_id}")
+async def get_batch(batch_id: str):
+    """Return per-topic status, aggregate progress and throughput (comics/hour) of a batch."""
+    batch = batch_scheduler.get(batch_id)
+    if batch is None:
+        raise HTTPException(status_code=404, detail=f"Batch {batch_id} not found")
+    return batch.to_dict()
+
+
+@app.get("/runs/{run_id}/events")
+async def get_run_events(request: Request, run_id: str, last_event_id: str = None):
+    """
+    Replay and follow the events of a run. The resume point comes from the Last-Event-ID
+    header (or last_event_id query parameter), either as '<run_id>:<seq>' or a bare sequence number.
+    """
+    buffer = get_event_hub().get(run_id)
+    if buffer is None:
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found")
+    resume_value = request.headers.get("last-event-id") or last_event_id
+    after_seq = 0
+    if resume_value:
+        parsed_run_id, parsed_seq = parse_last_event_id(resume_value)
+        if parsed_run_id == run_id:
+            after_seq = parsed_seq
+        elif resume_value.strip().isdigit():
+            after_seq = int(resume_value.strip())
+    return _stream_run_events(request, buffer, after_seq)
+
+
+@app.post("/runs/{run_id}/cancel")
+async def cancel_run(run_id: str):
+    """Cancel a queued or running comic generation run."""
+    if not _cancel_run(run_id, "cancelled by client"):
+        raise HTTPException(status_code=404, detail=f"Run {run_id} not found or already finished")
+    return {'run_id': run_id, 'status': 'cancelling'}
+
+
+@app.get("/runs/{run_id}/export")
+async def get_run_export(run_id: str, format: str = "pdf"):
+    """
+    Download an export of a finished run. Returns 202 while the PDF is still rendering.
+    Supported formats: 'pdf' and 'markdown'.
+    """
+    export_job = get_export_pipeline().get(run_id)
+    if export_job is None:
+        raise HTTPException(status_code=404, detail=f"No export for run {run_id}")
+    if format == "markdown":
+        return FileResponse(export_job.markdown_path, media_type="text/markdown",
+                            filename=Path(export_job.markdown_path).name)
+    if format != "pdf":
+        raise HTTPException(status_code=400, detail=f"Unsupported export format '{format}'")
+    if export_job.status == "pending":
+        return JSONResponse(status_code=202, content=export_job.to_dict())
+    if export_job.status == "failed" or not export_job.pdf_path or not Path(export_job.pdf_path).exists():
+        raise HTTPException(status_code=500, detail=f"PDF export failed: {export_job.error or 'file missing'}")
+    return FileResponse(export_job.pdf_path, media_type="application/pdf", filename=Path(export_job.pdf_path).name)
+
+
+@app.get("/jobs")
+async def list_jobs():
+    """List queued, running and recently finished comic generation jobs."""
+    job_manager = get_job_manager()
+    return {'stats': job_manager.stats(), 'jobs': job_manager.list_jobs()}
+
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Return the status and queue position of a single job."""
+    job_manager = get_job_manager()
+    job = job_manager.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    info = job.to_dict()
+    info['queue_position'] = job_manager.queue_position(job_id)
+    return info
+
+
+QUEUE_DEPTH.set_function(lambda: get_job_manager().queue_depth)
+ACTIVE_RUNS.set_function(lambda: get_job_manager().active_count)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Pipeline metrics in the Prometheus text exposition format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.on_event("shutdown")
+def shutdown_job_manager():
+    get_job_manager().shutdown(wait=False)
+    get_export_pipeline().shutdown(wait=False)
+
+
 
 
    
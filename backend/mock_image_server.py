@@ -0,0 +1,333 @@
+"""
+Mock Gemini Image Server
+A stand-in for the external gemini-image-tutorial server, for load tests and offline
+benchmarks. It implements the /generate-image/ contract the image tools use:
+
+    POST /generate-image/  {"prompt": str, "base_image_paths": [str, ...], "response_format": "path|base64|bytes"}
+                           base_image_paths may be replaced by inline references (the client's byte modes):
+                           "base_images": [{"filename": str, "image_base64": str}, ...]
+    -> {"status": "success", "image_path": "output/<file>.png"}        (MOCK_IMAGE_RESPONSE_SHAPE=image_path)
+    -> {"success": true, "local_path": "output/<file>.png"}            (MOCK_IMAGE_RESPONSE_SHAPE=local_path)
+    -> {"status": "success", "image_base64": ..., "filename": ...}     (response_format=base64)
+    -> raw image/png body with an X-Image-Filename header             (response_format=bytes)
+
+Images are deterministic PIL renderings of the prompt and the base images, so the same
+request always produces the same pixels. Latency, failures and concurrency are configurable:
+
+    MOCK_IMAGE_LATENCY          fixed:S | uniform:A,B | normal:MEAN,STDDEV | lognormal:MU,SIGMA | exponential:MEAN
+    MOCK_IMAGE_FAILURE_RATE     fraction of requests answered with MOCK_IMAGE_FAILURE_STATUS (default 500)
+    MOCK_IMAGE_MAX_CONCURRENCY  requests generated at once; others queue (or get 429 with MOCK_IMAGE_REJECT_WHEN_BUSY=1)
+    MOCK_IMAGE_SEED             seed for latency and failure sampling
+    MOCK_IMAGE_OUTPUT_ROOT      folder images are saved under (default GEMINI_IMAGE_ROOT), as output/<file>.png
+
+Run it in place of the real server:
+    python mock_image_server.py --port 8000 --latency uniform:2,6 --failure-rate 0.05 --max-concurrency 4
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import io
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse, Response
+from PIL import Image, ImageDraw
+from pydantic import BaseModel
+
+
+def _dbg(msg: str):
+    print(f"[MockImageServer] {msg}")
+
+
+class LatencyDistribution:
+    """Samples request latencies in seconds from a 'kind:params' spec."""
+
+    KINDS = ("fixed", "uniform", "normal", "lognormal", "exponential")
+
+    def __init__(self, spec: str = "fixed:0"):
+        kind, _, params = (spec or "fixed:0").partition(":")
+        self.kind = kind.strip().lower()
+        if self.kind not in self.KINDS:
+            raise ValueError(f"Unknown latency distribution '{kind}', expected one of {', '.join(self.KINDS)}")
+        self.params = [float(value) for value in params.split(",") if value.strip()] or [0.0]
+        self.spec = spec
+
+    def sample(self, rng: random.Random) -> float:
+        p = self.params
+        if self.kind == "fixed":
+            value = p[0]
+        elif self.kind == "uniform":
+            value = rng.uniform(p[0], p[1] if len(p) > 1 else p[0])
+        elif self.kind == "normal":
+            value = rng.gauss(p[0], p[1] if len(p) > 1 else 0.0)
+        elif self.kind == "lognormal":
+            value = rng.lognormvariate(p[0], p[1] if len(p) > 1 else 0.0)
+        else:
+            value = rng.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+        return max(0.0, value)
+
+
+@dataclass
+class MockServerConfig:
+    latency: str = "fixed:0"
+    failure_rate: float = 0.0
+    failure_status: int = 500
+    max_concurrency: int = 0  # 0 = unlimited
+    reject_when_busy: bool = False
+    response_shape: str = "image_path"  # image_path | local_path
+    seed: Optional[int] = None
+    image_size: int = 512
+    output_root: Path = field(default_factory=lambda: Path(os.getenv(
+        "GEMINI_IMAGE_ROOT", "C:/Users/ninic/projects/Datacamp_projects/gemini-image-tutorial")))
+
+    @classmethod
+    def from_env(cls) -> "MockServerConfig":
+        seed = os.getenv("MOCK_IMAGE_SEED")
+        config = cls(
+            latency=os.getenv("MOCK_IMAGE_LATENCY", "fixed:0"),
+            failure_rate=float(os.getenv("MOCK_IMAGE_FAILURE_RATE", "0")),
+            failure_status=int(os.getenv("MOCK_IMAGE_FAILURE_STATUS", "500")),
+            max_concurrency=int(os.getenv("MOCK_IMAGE_MAX_CONCURRENCY", "0")),
+            reject_when_busy=os.getenv("MOCK_IMAGE_REJECT_WHEN_BUSY", "false").lower() in ("1", "true", "yes"),
+            response_shape=os.getenv("MOCK_IMAGE_RESPONSE_SHAPE", "image_path"),
+            seed=int(seed) if seed else None,
+            image_size=int(os.getenv("MOCK_IMAGE_SIZE", "512")),
+        )
+        if os.getenv("MOCK_IMAGE_OUTPUT_ROOT"):
+            config.output_root = Path(os.getenv("MOCK_IMAGE_OUTPUT_ROOT"))
+        return config
+
+
+class InlineImage(BaseModel):
+    filename: Optional[str] = None
+    image_base64: str
+
+
+class GenerateImageRequest(BaseModel):
+    prompt: str
+    base_image_paths: Optional[List[str]] = None
+    base_images: Optional[List[InlineImage]] = None
+    response_format: Optional[str] = "path"
+
+
+class _Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.rejected = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.total_latency = 0.0
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return {
+                'requests': self.requests,
+                'succeeded': self.succeeded,
+                'failed': self.failed,
+                'rejected': self.rejected,
+                'in_flight': self.in_flight,
+                'max_in_flight': self.max_in_flight,
+                'mean_latency': round(self.total_latency / self.requests, 4) if self.requests else 0.0,
+            }
+
+
+def render_image(prompt: str, base_images: List[bytes], size: int = 512) -> bytes:
+    """Deterministic PNG for a prompt and base images: same inputs, same pixels."""
+    digest = hashlib.sha256(prompt.encode("utf-8"))
+    for data in base_images:
+        digest.update(hashlib.sha256(data).digest())
+    seed = digest.digest()
+    background = tuple(64 + seed[i] // 2 for i in range(3))
+    image = Image.new("RGB", (size, size), background)
+    draw = ImageDraw.Draw(image)
+
+    # A few hash-derived shapes so different prompts are visually distinct
+    for i in range(6):
+        x0, y0 = seed[3 + i] * size // 256, seed[9 + i] * size // 256
+        radius = 20 + seed[15 + i] % (size // 6)
+        color = tuple(seed[(21 + i + c) % len(seed)] for c in range(3))
+        draw.ellipse([x0 - radius, y0 - radius, x0 + radius, y0 + radius], fill=color)
+
+    # Base images as thumbnails along the bottom edge
+    thumb = size // 5
+    for index, data in enumerate(base_images[:4]):
+        try:
+            with Image.open(io.BytesIO(data)) as base:
+                base = base.convert("RGB")
+                base.thumbnail((thumb, thumb))
+                image.paste(base, (8 + index * (thumb + 8), size - thumb - 8))
+        except Exception:
+            draw.rectangle([8 + index * (thumb + 8), size - thumb - 8, 8 + index * (thumb + 8) + thumb, size - 8],
+                           outline=(0, 0, 0), width=3)
+
+    # Prompt text, wrapped
+    words, lines, line = prompt.split(), [], ""
+    for word in words:
+        if len(line) + len(word) + 1 > size // 8:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}".strip()
+    lines.append(line)
+    for row, text in enumerate(lines[:12]):
+        draw.text((10, 10 + row * 14), text, fill=(0, 0, 0))
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG", optimize=False)
+    return buffer.getvalue()
+
+
+def create_app(config: Optional[MockServerConfig] = None) -> FastAPI:
+    """Build the mock server app; tests create one per configuration."""
+    config = config or MockServerConfig.from_env()
+    latency = LatencyDistribution(config.latency)
+    rng = random.Random(config.seed)
+    rng_lock = threading.Lock()
+    stats = _Stats()
+    semaphore = asyncio.Semaphore(config.max_concurrency) if config.max_concurrency > 0 else None
+    output_dir = Path(config.output_root) / "output"
+    counter = {'value': 0}
+
+    app = FastAPI(title="Mock Gemini Image Server", version="1.0.0")
+    app.state.config = config
+    app.state.stats = stats
+
+    def _error(status: int, message: str) -> JSONResponse:
+        return JSONResponse(status_code=status, content={"status": "error", "error": message, "detail": message})
+
+    def _generate(request: GenerateImageRequest) -> dict:
+        base_images = []
+        for path in request.base_image_paths or []:
+            base_path = Path(path)
+            if not base_path.is_file():
+                raise FileNotFoundError(path)
+            base_images.append(base_path.read_bytes())
+        for inline in request.base_images or []:
+            try:
+                base_images.append(base64.b64decode(inline.image_base64, validate=True))
+            except ValueError as e:
+                raise ValueError(f"{inline.filename or 'inline image'}: {e}") from e
+        data = render_image(request.prompt, base_images, config.image_size)
+        with rng_lock:
+            counter['value'] += 1
+            sequence = counter['value']
+        filename = f"mock_{hashlib.sha256(data).hexdigest()[:12]}_{sequence:06d}.png"
+        return {'data': data, 'filename': filename}
+
+    @app.get("/health")
+    async def health():
+        return {"status": "ok", "latency": latency.spec, "failure_rate": config.failure_rate,
+                "max_concurrency": config.max_concurrency}
+
+    @app.get("/stats")
+    async def get_stats():
+        return stats.to_dict()
+
+    @app.post("/generate-image/")
+    async def generate_image(request: GenerateImageRequest):
+        start = time.monotonic()
+        with stats.lock:
+            stats.requests += 1
+        if semaphore is not None and config.reject_when_busy and semaphore.locked():
+            with stats.lock:
+                stats.rejected += 1
+            return _error(429, "Server busy")
+        with rng_lock:
+            delay = latency.sample(rng)
+            fail = rng.random() < config.failure_rate
+
+        async def handle():
+            with stats.lock:
+                stats.in_flight += 1
+                stats.max_in_flight = max(stats.max_in_flight, stats.in_flight)
+            try:
+                await asyncio.sleep(delay)
+                if fail:
+                    with stats.lock:
+                        stats.failed += 1
+                    return _error(config.failure_status, "Injected failure")
+                try:
+                    generated = await asyncio.to_thread(_generate, request)
+                except FileNotFoundError as e:
+                    with stats.lock:
+                        stats.failed += 1
+                    return _error(400, f"Base image not found: {e}")
+                except ValueError as e:
+                    with stats.lock:
+                        stats.failed += 1
+                    return _error(400, f"Invalid inline base image: {e}")
+                with stats.lock:
+                    stats.succeeded += 1
+                return _respond(request, generated)
+            finally:
+                with stats.lock:
+                    stats.in_flight -= 1
+                    stats.total_latency += time.monotonic() - start
+
+        if semaphore is None:
+            return await handle()
+        async with semaphore:
+            return await handle()
+
+    def _respond(request: GenerateImageRequest, generated: dict):
+        data, filename = generated['data'], generated['filename']
+        response_format = (request.response_format or "path").lower()
+        if response_format == "bytes":
+            return Response(content=data, media_type="image/png", headers={"X-Image-Filename": filename})
+        if response_format == "base64":
+            return {"status": "success", "filename": filename, "image_base64": base64.b64encode(data).decode("ascii")}
+        output_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_dir / f".{filename}.tmp"
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, output_dir / filename)
+        relative_path = f"output/{filename}"
+        if config.response_shape == "local_path":
+            return {"success": True, "local_path": relative_path}
+        return {"status": "success", "image_path": relative_path}
+
+    return app
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock Gemini image server for load tests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", help="Latency distribution, e.g. fixed:2 or uniform:1,5")
+    parser.add_argument("--failure-rate", type=float)
+    parser.add_argument("--failure-status", type=int)
+    parser.add_argument("--max-concurrency", type=int)
+    parser.add_argument("--reject-when-busy", action="store_true")
+    parser.add_argument("--response-shape", choices=["image_path", "local_path"])
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--output-root", help="Folder images are written under (as output/<file>.png)")
+    args = parser.parse_args()
+
+    config = MockServerConfig.from_env()
+    overrides = {
+        'latency': args.latency, 'failure_rate': args.failure_rate, 'failure_status': args.failure_status,
+        'max_concurrency': args.max_concurrency, 'response_shape': args.response_shape, 'seed': args.seed,
+        'output_root': Path(args.output_root) if args.output_root else None,
+    }
+    for name, value in overrides.items():
+        if value is not None:
+            setattr(config, name, value)
+    if args.reject_when_busy:
+        config.reject_when_busy = True
+    _dbg(f"Serving on http://{args.host}:{args.port}/generate-image/ with {config}")
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,7 @@
 # utils/__init__.py
-from .path_utils import get_repo_root, get_output_path, get_backend_output_path, get_frontend_public_path, get_registry_path
-from .image_utils import copy_image_to_output, resolve_image_path, prepare_temp_images_for_gemini, verify_image_readable, retry_file_check, clean_temp_folder, clean_all_gemini_temp_folders
-from .registry_utils import update_registry_entry, read_registry, _ensure_registry_exists
+from .path_utils import get_repo_root, get_output_path, get_backend_output_path, get_frontend_public_path, get_registry_path, get_character_references_path
+from .run_context import RunContext, get_current_run_context, run_context_scope
+from .image_utils import copy_image_to_output, write_image_to_output, resolve_image_path, prepare_temp_images_for_gemini, verify_image_readable, retry_file_check, clean_temp_folder, clean_all_gemini_temp_folders
+from .registry_utils import update_registry_entry, read_registry, registry_snapshot, _ensure_registry_exists
 from .comic_exporter import ComicExporter
 from .panel_registry_inspector_utils import verify_image, inspect_panel_registry
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""
+Batch Scheduler for Comic Generation
+Runs many topics as one batch on the shared JobManager worker pool. A batch never has
+more than max_concurrency runs queued or running at once, so interactive requests keep
+getting a worker while a large campaign is being generated.
+"""
+
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from src.utils.job_manager import JobQueueFullError
+from src.utils.run_events import RunEventBuffer
+
+
+MAX_BATCH_SIZE = int(os.getenv("COMIC_MAX_BATCH_SIZE", "100"))
+# Seconds to wait before retrying a topic that found the job queue full
+QUEUE_FULL_RETRY_SECONDS = float(os.getenv("COMIC_BATCH_RETRY_SECONDS", "5"))
+# Number of batches kept around for status lookups
+BATCH_HISTORY = 50
+
+
+def _dbg(msg: str):
+    print(f"[BatchScheduler] {msg}")
+
+
+@dataclass
+class BatchItem:
+    """One topic of a batch."""
+    topic: str
+    run_id: Optional[str] = None
+    status: str = "pending"  # pending | running | completed | failed | cancelled
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'topic': self.topic,
+            'run_id': self.run_id,
+            'status': self.status,
+            'duration_seconds': round(self.finished_at - self.started_at, 1) if self.finished_at and self.started_at else None,
+        }
+
+
+@dataclass
+class Batch:
+    """A set of topics generated together with a shared concurrency limit."""
+    batch_id: str
+    items: List[BatchItem]
+    max_concurrency: int
+    options: Dict[str, Any] = field(default_factory=dict)
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    # Set while a thread is launching this batch's runs; other threads leave a note instead
+    dispatching: bool = field(default=False, repr=False)
+    dispatch_again: bool = field(default=False, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return all(item.status in ('completed', 'failed', 'cancelled') for item in self.items)
+
+    def progress(self) -> Dict[str, Any]:
+        counts = {status: 0 for status in ('pending', 'running', 'completed', 'failed', 'cancelled')}
+        for item in self.items:
+            counts[item.status] += 1
+        finished = counts['completed'] + counts['failed'] + counts['cancelled']
+        elapsed = (self.finished or time.time()) - self.started
+        counts.update({
+            'total': len(self.items),
+            'percent': round(100.0 * finished / len(self.items), 1) if self.items else 100.0,
+            'elapsed_seconds': round(elapsed, 1),
+            # Throughput counts only successful comics
+            'comics_per_hour': round(counts['completed'] * 3600.0 / elapsed, 2) if elapsed > 0 else 0.0,
+        })
+        return counts
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'batch_id': self.batch_id,
+            'status': 'finished' if self.done else 'running',
+            'created_at': self.created_at,
+            'max_concurrency': self.max_concurrency,
+            'options': self.options,
+            'progress': self.progress(),
+            'items': [item.to_dict() for item in self.items],
+        }
+
+
+class BatchScheduler:
+    """
+    Feeds the topics of each batch to a run launcher, keeping at most max_concurrency
+    runs of the batch in flight. A new run is launched whenever one of the batch's runs
+    settles, i.e. as soon as its crew result is in, while its PDF may still be rendering.
+    """
+
+    def __init__(self, launch_run: Callable[[str, Dict[str, Any]], RunEventBuffer], default_concurrency: int = 2):
+        """
+        Args:
+            launch_run: Starts a run for (topic, options) and returns its RunEventBuffer;
+                may raise JobQueueFullError, in which case the topic is retried later
+            default_concurrency: Concurrency used when a batch does not specify one
+        """
+        self.launch_run = launch_run
+        self.default_concurrency = max(1, default_concurrency)
+        self._lock = threading.Lock()
+        self._batches: "OrderedDict[str, Batch]" = OrderedDict()
+
+    def create(self, topics: List[str], max_concurrency: Optional[int] = None,
+               options: Optional[Dict[str, Any]] = None) -> Batch:
+        """Create a batch and launch its first runs."""
+        topics = [topic.strip() for topic in topics if topic and topic.strip()]
+        if not topics:
+            raise ValueError("A batch needs at least one topic")
+        if len(topics) > MAX_BATCH_SIZE:
+            raise ValueError(f"A batch can hold at most {MAX_BATCH_SIZE} topics")
+        batch = Batch(
+            batch_id=uuid.uuid4().hex[:12],
+            items=[BatchItem(topic=topic) for topic in topics],
+            max_concurrency=max(1, max_concurrency or self.default_concurrency),
+            options=dict(options or {}),
+        )
+        with self._lock:
+            self._batches[batch.batch_id] = batch
+            while len(self._batches) > BATCH_HISTORY:
+                self._batches.popitem(last=False)
+        _dbg(f"Created batch {batch.batch_id} with {len(topics)} topics (concurrency {batch.max_concurrency})")
+        self._dispatch(batch)
+        return batch
+
+    def get(self, batch_id: str) -> Optional[Batch]:
+        with self._lock:
+            return self._batches.get(batch_id)
+
+    def list_batches(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            batches = list(self._batches.values())
+        return [{'batch_id': b.batch_id, 'created_at': b.created_at, 'progress': b.progress()} for b in batches]
+
+    def _dispatch(self, batch: Batch):
+        """
+        Launch pending items until the batch's concurrency limit is reached.
+
+        Runs that settle while launching (cached topics settle at once) only leave a note for
+        the thread that is already launching, so a batch of cached topics is a loop, not a
+        recursion as deep as the batch.
+        """
+        with self._lock:
+            if batch.dispatching:
+                batch.dispatch_again = True
+                return
+            batch.dispatching = True
+        try:
+            while self._launch_pending(batch):
+                with self._lock:
+                    if not batch.dispatch_again:
+                        break
+                    batch.dispatch_again = False
+        finally:
+            with self._lock:
+                batch.dispatching = False
+                batch.dispatch_again = False
+
+    def _launch_pending(self, batch: Batch) -> bool:
+        """Launch runs while there is room; False if the job queue was full and a retry is scheduled."""
+        while True:
+            with self._lock:
+                in_flight = sum(1 for item in batch.items if item.status == 'running')
+                item = next((i for i in batch.items if i.status == 'pending'), None)
+                if item is None or in_flight >= batch.max_concurrency:
+                    return True
+                item.status = 'running'
+                item.started_at = time.time()
+            try:
+                buffer = self.launch_run(item.topic, batch.options)
+            except JobQueueFullError:
+                with self._lock:
+                    item.status = 'pending'
+                    item.started_at = None
+                _dbg(f"Job queue full; retrying batch {batch.batch_id} in {QUEUE_FULL_RETRY_SECONDS}s")
+                timer = threading.Timer(QUEUE_FULL_RETRY_SECONDS, self._dispatch, args=(batch,))
+                timer.daemon = True
+                timer.start()
+                return False
+            except Exception as e:
+                _dbg(f"Could not launch '{item.topic}': {e}")
+                self._finish_item(batch, item, 'failed')
+                continue
+            item.run_id = buffer.run_id
+            buffer.add_settle_callback(lambda buf, item=item: self._on_run_settled(batch, item, buf))
+
+    def _on_run_settled(self, batch: Batch, item: BatchItem, buffer: RunEventBuffer):
+        self._finish_item(batch, item, buffer.outcome or 'failed')
+        self._dispatch(batch)
+
+    def _finish_item(self, batch: Batch, item: BatchItem, status: str):
+        with self._lock:
+            item.status = status
+            item.finished_at = time.time()
+            if batch.done and batch.finished is None:
+                batch.finished = item.finished_at
+        _dbg(f"Batch {batch.batch_id}: '{item.topic}' {status}")
@@ -0,0 +1,74 @@
+"""
+Cooperative cancellation for comic generation runs.
+A CancellationToken travels with the RunContext; the crew callbacks and the image tools
+check it between steps so an abandoned run stops spending LLM tokens and image-server time.
+"""
+
+import threading
+from typing import Optional
+
+
+class RunCancelledError(TimeoutError):
+    """
+    Raised when a run has been cancelled.
+
+    Subclasses TimeoutError on purpose: CrewAI's Agent.execute_task re-raises TimeoutError
+    without its usual retries, so a cancellation aborts the crew right away.
+    """
+
+
+class CancellationToken:
+    """Thread-safe, one-way cancellation flag with a reason."""
+
+    def __init__(self):
+        self._event = threading.Event()
+        self._reason: Optional[str] = None
+
+    def cancel(self, reason: str = "cancelled"):
+        if not self._event.is_set():
+            self._reason = reason
+            self._event.set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._event.is_set()
+
+    @property
+    def reason(self) -> Optional[str]:
+        return self._reason
+
+    def raise_if_cancelled(self):
+        if self._event.is_set():
+            raise RunCancelledError(f"Run cancelled: {self._reason}")
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Block until cancelled or timeout; returns True if cancelled."""
+        return self._event.wait(timeout)
+
+
+def get_current_cancel_token() -> Optional[CancellationToken]:
+    """Return the cancellation token of the active run, if any."""
+    from src.utils.run_context import get_current_run_context
+    context = get_current_run_context()
+    return context.cancel_token if context is not None else None
+
+
+def is_run_cancelled() -> bool:
+    """True if the active run has been cancelled."""
+    token = get_current_cancel_token()
+    return token is not None and token.is_cancelled
+
+
+def check_cancelled():
+    """Raise RunCancelledError if the active run has been cancelled."""
+    token = get_current_cancel_token()
+    if token is not None:
+        token.raise_if_cancelled()
+
+
+def cancelled_tool_message(tool_name: str) -> Optional[str]:
+    """Return the message an image tool should return instead of working, or None to proceed."""
+    token = get_current_cancel_token()
+    if token is not None and token.is_cancelled:
+        return f"❌ Run cancelled ({token.reason}); {tool_name} skipped."
+    return None
@@ -0,0 +1,179 @@
+"""
+Image Server Endpoint Pool
+Spreads image requests over several copies of the image server. GEMINI_IMAGE_SERVER_URL may
+list several endpoints, separated by commas; each request goes to the endpoint picked by
+IMAGE_SERVER_LB_STRATEGY:
+
+- least_outstanding (default): fewest requests in flight, ties broken by recent latency
+- latency: lowest (requests in flight + 1) * recent latency, so fast nodes take more work
+
+Every endpoint has its own circuit breaker and rate governor. An endpoint whose breaker is
+open is skipped until its cool-down ends (passive ejection). With more than one endpoint a
+background thread also checks each one every IMAGE_SERVER_HEALTH_INTERVAL_SECONDS and ejects
+it after IMAGE_SERVER_EJECT_AFTER failed checks; one good check brings it back. Any HTTP answer
+below 500 on the health path counts as alive, so servers without a /health route still pass.
+If every endpoint is ejected, requests still go out rather than failing locally.
+"""
+
+import os
+import random
+import threading
+from typing import Callable, Iterable, List, Optional, Set
+from urllib.parse import urlsplit, urlunsplit
+import requests
+from src.utils.rate_governor import RateGovernor, get_rate_governor
+from src.utils.resilience import CircuitBreaker, CircuitOpenError
+
+
+LB_STRATEGIES = ("least_outstanding", "latency")
+LB_STRATEGY = os.getenv("IMAGE_SERVER_LB_STRATEGY", "least_outstanding").lower()
+HEALTH_INTERVAL_SECONDS = float(os.getenv("IMAGE_SERVER_HEALTH_INTERVAL_SECONDS", "10"))
+HEALTH_PATH = os.getenv("IMAGE_SERVER_HEALTH_PATH", "/health")
+HEALTH_TIMEOUT_SECONDS = float(os.getenv("IMAGE_SERVER_HEALTH_TIMEOUT_SECONDS", "2"))
+# Consecutive failed health checks before an endpoint stops receiving requests
+EJECT_AFTER = int(os.getenv("IMAGE_SERVER_EJECT_AFTER", "2"))
+# Weight of the newest sample in an endpoint's moving average latency
+LATENCY_EWMA_ALPHA = 0.3
+
+
+def _dbg(msg: str):
+    print(f"[EndpointPool] {msg}")
+
+
+def parse_endpoints(value: str) -> List[str]:
+    """Split a comma (or whitespace) separated endpoint list, dropping duplicates."""
+    endpoints: List[str] = []
+    for item in value.replace(",", " ").split():
+        if item not in endpoints:
+            endpoints.append(item)
+    return endpoints
+
+
+class Endpoint:
+    """One image server instance and what the pool knows about it."""
+
+    def __init__(self, url: str, breaker: CircuitBreaker, governor: RateGovernor):
+        self.url = url
+        self.breaker = breaker
+        self.governor = governor
+        self.outstanding = 0
+        self.latency_ewma: Optional[float] = None
+        self.healthy = True
+        self.failed_checks = 0
+
+    @property
+    def health_url(self) -> str:
+        parts = urlsplit(self.url)
+        return urlunsplit((parts.scheme, parts.netloc, HEALTH_PATH, "", ""))
+
+    def observe(self, seconds: float):
+        if self.latency_ewma is None:
+            self.latency_ewma = seconds
+        else:
+            self.latency_ewma += LATENCY_EWMA_ALPHA * (seconds - self.latency_ewma)
+
+    def to_dict(self) -> dict:
+        return {
+            'url': self.url,
+            'healthy': self.healthy,
+            'circuit': self.breaker.state,
+            'outstanding': self.outstanding,
+            'latency_ewma': round(self.latency_ewma, 3) if self.latency_ewma is not None else None,
+        }
+
+
+class EndpointPool:
+    """Picks an endpoint per request and keeps track of endpoint health."""
+
+    def __init__(self, urls: Iterable[str], strategy: Optional[str] = None,
+                 breaker_factory: Optional[Callable[[str], CircuitBreaker]] = None,
+                 governor: Optional[RateGovernor] = None, health_interval: Optional[float] = None):
+        urls = list(urls)
+        if not urls:
+            raise ValueError("At least one image server endpoint is required")
+        self.strategy = (strategy or LB_STRATEGY).lower()
+        if self.strategy not in LB_STRATEGIES:
+            _dbg(f"Unknown strategy '{self.strategy}', using 'least_outstanding'")
+            self.strategy = "least_outstanding"
+        breaker_factory = breaker_factory or (lambda url: CircuitBreaker(f"image server {url}"))
+        self.endpoints = [Endpoint(url, breaker_factory(url), governor or get_rate_governor(url)) for url in urls]
+        self._lock = threading.Lock()
+        self.health_interval = HEALTH_INTERVAL_SECONDS if health_interval is None else health_interval
+        self._stop = threading.Event()
+        self._health_thread: Optional[threading.Thread] = None
+        if len(self.endpoints) > 1 and self.health_interval > 0:
+            self._health_thread = threading.Thread(target=self._health_loop, name="image-health", daemon=True)
+            self._health_thread.start()
+
+    def _score(self, endpoint: Endpoint, default_latency: float):
+        latency = endpoint.latency_ewma if endpoint.latency_ewma is not None else default_latency
+        if self.strategy == "latency":
+            return ((endpoint.outstanding + 1) * latency,)
+        return (endpoint.outstanding, latency)
+
+    def pick(self, exclude: Optional[Set[str]] = None, check_breaker: bool = True) -> Endpoint:
+        """
+        Choose an endpoint for one request and count it as in flight; pair with done().
+
+        Endpoints in exclude (already tried for this call) and ejected endpoints are used only
+        when nothing else is left.
+
+        Raises:
+            CircuitOpenError: when every endpoint's circuit is open
+        """
+        exclude = exclude or set()
+        with self._lock:
+            known = [e.latency_ewma for e in self.endpoints if e.latency_ewma is not None]
+            # Endpoints without samples yet look as fast as the average, so they get tried
+            default_latency = sum(known) / len(known) if known else 0.0
+            candidates = list(self.endpoints)
+            random.shuffle(candidates)
+            candidates.sort(key=lambda e: (not e.healthy, e.url in exclude) + self._score(e, default_latency))
+            retry_in = None
+            for endpoint in candidates:
+                if check_breaker:
+                    try:
+                        endpoint.breaker.before_call()
+                    except CircuitOpenError as e:
+                        retry_in = e.retry_in if retry_in is None else min(retry_in, e.retry_in)
+                        continue
+                endpoint.outstanding += 1
+                return endpoint
+        name = self.endpoints[0].url if len(self.endpoints) == 1 else f"all {len(self.endpoints)} image servers"
+        raise CircuitOpenError(name, retry_in or 0.0)
+
+    def done(self, endpoint: Endpoint, latency: Optional[float] = None):
+        """Finish a request started with pick(); latency is recorded for successful requests."""
+        with self._lock:
+            endpoint.outstanding = max(0, endpoint.outstanding - 1)
+            if latency is not None:
+                endpoint.observe(latency)
+
+    def check_health(self):
+        """Run one health check of every endpoint."""
+        for endpoint in self.endpoints:
+            try:
+                alive = requests.get(endpoint.health_url, timeout=HEALTH_TIMEOUT_SECONDS).status_code < 500
+            except requests.RequestException:
+                alive = False
+            with self._lock:
+                if alive:
+                    if not endpoint.healthy:
+                        _dbg(f"{endpoint.url} is healthy again")
+                    endpoint.healthy, endpoint.failed_checks = True, 0
+                else:
+                    endpoint.failed_checks += 1
+                    if endpoint.healthy and endpoint.failed_checks >= EJECT_AFTER:
+                        _dbg(f"Ejecting {endpoint.url} after {endpoint.failed_checks} failed health checks")
+                        endpoint.healthy = False
+
+    def _health_loop(self):
+        while not self._stop.wait(self.health_interval):
+            self.check_health()
+
+    def status(self) -> List[dict]:
+        with self._lock:
+            return [endpoint.to_dict() for endpoint in self.endpoints]
+
+    def close(self):
+        self._stop.set()
@@ -0,0 +1,154 @@
+"""
+Export Pipeline for Finished Comics
+Renders the PDF of a finished comic in a separate process pool so slow markdown-pdf or
+WeasyPrint rendering neither delays the 'complete' event nor holds a crew worker.
+"""
+
+import multiprocessing
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Callable, Optional
+
+
+DEFAULT_EXPORT_WORKERS = int(os.getenv("COMIC_EXPORT_WORKERS", "1"))
+# PDF backend passed to ComicExporter.generate_pdf ("markdown-pdf" or "weasyprint")
+PDF_METHOD = os.getenv("COMIC_PDF_METHOD", "markdown-pdf")
+# Number of export jobs kept around for /runs/{id}/export lookups
+EXPORT_JOB_HISTORY = 200
+
+
+def _dbg(msg: str):
+    print(f"[ExportPipeline] {msg}")
+
+
+def export_pdf(topic: str, markdown_content: str, timestamp: str, method: str = PDF_METHOD) -> str:
+    """
+    Render a comic PDF. Runs inside a pool process, so it must stay a picklable top-level function.
+
+    The exporter reuses the markdown file's timestamp so both exports share a basename.
+    """
+    from src.utils.comic_exporter import ComicExporter
+    exporter = ComicExporter(topic)
+    exporter.timestamp = timestamp
+    return exporter.generate_pdf(markdown_content, method=method)
+
+
+@dataclass
+class ExportJob:
+    """PDF export of one run."""
+    run_id: str
+    topic: str
+    markdown_path: Optional[str] = None
+    status: str = "pending"  # pending | ready | failed
+    pdf_path: Optional[str] = None
+    error: Optional[str] = None
+    started_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    finished_at: Optional[str] = None
+    future: Optional[Future] = field(default=None, repr=False)
+
+    def to_dict(self):
+        return {
+            'run_id': self.run_id,
+            'status': self.status,
+            'markdown_path': self.markdown_path,
+            'pdf_path': self.pdf_path,
+            'error': self.error,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+        }
+
+
+class ExportPipeline:
+    """
+    Process pool for PDF exports, with a bounded history of export jobs by run ID.
+
+    Processes are started with 'spawn' so the pool behaves the same on Windows and POSIX
+    and never forks a process that holds crew worker threads.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, export_func: Callable[..., str] = export_pdf):
+        self.max_workers = max(1, max_workers or DEFAULT_EXPORT_WORKERS)
+        self.export_func = export_func
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[str, ExportJob]" = OrderedDict()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        # Created lazily: spawning the pool is only worth it once a comic actually finishes
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context("spawn"))
+            _dbg(f"Started export pool with {self.max_workers} processes")
+        return self._executor
+
+    def submit(self, run_id: str, topic: str, markdown_content: str, timestamp: str,
+               markdown_path: Optional[str] = None,
+               on_done: Optional[Callable[[ExportJob], None]] = None) -> ExportJob:
+        """
+        Queue the PDF export of a run.
+
+        Args:
+            run_id: Run the export belongs to
+            topic: Sanitized topic used for the export filename
+            markdown_content: Comic markdown to render
+            timestamp: ComicExporter timestamp of the saved markdown
+            markdown_path: Path of the saved markdown, kept for lookups
+            on_done: Called with the finished ExportJob (from a pool management thread)
+
+        Returns:
+            The pending ExportJob
+        """
+        job = ExportJob(run_id=run_id, topic=topic, markdown_path=markdown_path)
+        with self._lock:
+            self._jobs[run_id] = job
+            while len(self._jobs) > EXPORT_JOB_HISTORY:
+                self._jobs.popitem(last=False)
+            job.future = self._get_executor().submit(self.export_func, topic, markdown_content, timestamp)
+        _dbg(f"Queued PDF export for run {run_id}")
+
+        def _finish(future: Future):
+            try:
+                job.pdf_path = future.result()
+                job.status = "ready"
+                _dbg(f"PDF export for run {run_id} ready: {job.pdf_path}")
+            except Exception as e:
+                job.status = "failed"
+                job.error = str(e) or type(e).__name__
+                _dbg(f"PDF export for run {run_id} failed: {job.error}")
+            job.finished_at = datetime.now().isoformat()
+            if on_done is not None:
+                try:
+                    on_done(job)
+                except Exception as e:
+                    _dbg(f"Export callback for run {run_id} failed: {e}")
+
+        job.future.add_done_callback(_finish)
+        return job
+
+    def get(self, run_id: str) -> Optional[ExportJob]:
+        with self._lock:
+            return self._jobs.get(run_id)
+
+    def shutdown(self, wait: bool = False):
+        with self._lock:
+            if self._executor is not None:
+                _dbg("Shutting down export pool")
+                self._executor.shutdown(wait=wait, cancel_futures=not wait)
+                self._executor = None
+
+
+_export_pipeline: Optional[ExportPipeline] = None
+_export_pipeline_lock = threading.Lock()
+
+
+def get_export_pipeline() -> ExportPipeline:
+    """Return the process-wide ExportPipeline."""
+    global _export_pipeline
+    with _export_pipeline_lock:
+        if _export_pipeline is None:
+            _export_pipeline = ExportPipeline()
+        return _export_pipeline
@@ -0,0 +1,164 @@
+"""
+File Readiness Waiter
+Waits until a file has been fully written instead of sleeping for fixed intervals. On Linux
+the parent folder is watched with inotify (through ctypes, no extra dependency) and the
+wait ends on IN_CLOSE_WRITE / IN_MOVED_TO for the file. Elsewhere, or when inotify is not
+available, the file is polled every few milliseconds.
+
+A file that already exists counts as ready once its size is non-zero and it has not been
+modified for SETTLE_SECONDS. The state is re-checked on every wake-up, so writes on network
+filesystems (which do not raise inotify events) are still picked up.
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+
+DEFAULT_TIMEOUT = float(os.getenv("FILE_WAIT_TIMEOUT_SECONDS", "3"))
+# A file untouched for this long is considered fully written
+SETTLE_SECONDS = float(os.getenv("FILE_WAIT_SETTLE_SECONDS", "0.05"))
+POLL_INTERVAL = 0.02
+# Longest inotify wait before re-checking the file (covers filesystems without events)
+RECHECK_INTERVAL = 0.25
+
+_IN_MODIFY = 0x00000002
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_TO = 0x00000080
+_IN_CREATE = 0x00000100
+_IN_NONBLOCK = 0o4000
+_IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+PathLike = Union[str, Path]
+
+
+def _dbg(msg: str):
+    print(f"[FileWaiter] {msg}")
+
+
+def _load_libc():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+_libc = _load_libc()
+
+
+class _DirectoryWatch:
+    """inotify watch on one folder; yields the names of files written or moved into it."""
+
+    def __init__(self, directory: Path):
+        self.fd = _libc.inotify_init1(_IN_NONBLOCK | _IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = _IN_CLOSE_WRITE | _IN_MOVED_TO | _IN_CREATE | _IN_MODIFY
+        if _libc.inotify_add_watch(self.fd, os.fsencode(str(directory)), mask) < 0:
+            errno = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(errno, f"inotify_add_watch failed for {directory}")
+
+    def read(self, timeout: float) -> Dict[str, int]:
+        """Wait up to timeout seconds; returns {filename: combined event mask}."""
+        ready, _, _ = select.select([self.fd], [], [], max(0.0, timeout))
+        events: Dict[str, int] = {}
+        if not ready:
+            return events
+        try:
+            buffer = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return events
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            _, mask, _, length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = buffer[offset:offset + length].rstrip(b"\0").decode(errors="replace")
+            offset += length
+            events[name] = events.get(name, 0) | mask
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+def inotify_available() -> bool:
+    return _libc is not None
+
+
+def _is_settled(path: Path) -> bool:
+    try:
+        stat = path.stat()
+    except OSError:
+        return False
+    return stat.st_size > 0 and time.time() - stat.st_mtime >= SETTLE_SECONDS
+
+
+def _poll(path: Path, deadline: float) -> bool:
+    while True:
+        if _is_settled(path):
+            return True
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return path.is_file()
+        time.sleep(min(POLL_INTERVAL, remaining))
+
+
+def wait_for_file(path: PathLike, timeout: Optional[float] = None) -> bool:
+    """
+    Block until a file exists and is fully written, or the timeout passes.
+
+    Args:
+        path: File to wait for
+        timeout: Seconds to wait at most (FILE_WAIT_TIMEOUT_SECONDS by default)
+
+    Returns:
+        True when the file is ready; at the timeout, whether the file exists at all
+    """
+    path = Path(path)
+    deadline = time.monotonic() + (DEFAULT_TIMEOUT if timeout is None else max(0.0, timeout))
+    if _is_settled(path):
+        return True
+    if _libc is None or not path.parent.is_dir():
+        return _poll(path, deadline)
+
+    try:
+        watch = _DirectoryWatch(path.parent)
+    except OSError as e:
+        _dbg(f"inotify unavailable ({e}), polling {path.name}")
+        return _poll(path, deadline)
+    try:
+        while True:
+            # The watch is in place before this check, so a write in between is not missed
+            if _is_settled(path):
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return path.is_file()
+            wait = min(remaining, RECHECK_INTERVAL)
+            if path.exists():
+                # Present but recently modified: a quiet SETTLE_SECONDS window is enough
+                wait = min(wait, SETTLE_SECONDS)
+            mask = watch.read(wait).get(path.name, 0)
+            if mask & (_IN_CLOSE_WRITE | _IN_MOVED_TO) and path.is_file():
+                return True
+    finally:
+        watch.close()
+
+
+def wait_for_files(paths: Iterable[PathLike], timeout: Optional[float] = None) -> Dict[str, bool]:
+    """Wait for several files within one shared timeout; returns {path: ready}."""
+    deadline = time.monotonic() + (DEFAULT_TIMEOUT if timeout is None else max(0.0, timeout))
+    return {str(path): wait_for_file(path, timeout=deadline - time.monotonic()) for path in paths}
@@ -0,0 +1,194 @@
+"""
+Generated Image Cache
+Content-addressed on-disk cache of images returned by the Gemini image server. The key is a
+hash of the prompt, the image model and the *contents* of the base images, so a rerun or a
+retry with the same inputs reuses the earlier image instead of paying for a new one, no
+matter where the reference images were staged.
+
+Entries live in a SQLite index (primary-key lookups, safe across threads and processes)
+and the images themselves under output/image_cache/objects. Once the stored bytes exceed
+the budget, the least recently used images are evicted.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Optional
+from src.utils.path_utils import get_backend_output_path
+
+
+CACHE_ENABLED = os.getenv("IMAGE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+DEFAULT_MAX_BYTES = int(os.getenv("IMAGE_CACHE_MAX_BYTES", str(512 * 1024 * 1024)))
+# The server decides which model it uses; set this when switching models so old images are not reused
+IMAGE_MODEL = os.getenv("GEMINI_IMAGE_MODEL", "default")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS images (
+    key TEXT PRIMARY KEY,
+    filename TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    prompt TEXT,
+    created_at REAL NOT NULL,
+    last_access REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS images_last_access ON images (last_access);
+"""
+
+
+def _dbg(msg: str):
+    print(f"[ImageCache] {msg}")
+
+
+def file_content_hash(path: str) -> str:
+    """sha256 of a file's contents; falls back to hashing the path if it cannot be read."""
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1024 * 1024), b""):
+                digest.update(chunk)
+    except OSError:
+        digest.update(f"<unreadable:{path}>".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def make_image_key(prompt: str, base_image_paths: Optional[Iterable[str]] = None, model: Optional[str] = None) -> str:
+    """Cache key of a generation request."""
+    raw = json.dumps({
+        'prompt': prompt or "",
+        'model': model or IMAGE_MODEL,
+        'base_images': [file_content_hash(path) for path in (base_image_paths or [])],
+    }, sort_keys=True)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ImageCache:
+    """SQLite-indexed, byte-bounded LRU cache of generated images."""
+
+    def __init__(self, cache_dir: Optional[Path] = None, max_bytes: Optional[int] = None):
+        self.cache_dir = Path(cache_dir or get_backend_output_path("image_cache"))
+        self.objects_dir = self.cache_dir / "objects"
+        self.index_path = self.cache_dir / "index.db"
+        self.max_bytes = DEFAULT_MAX_BYTES if max_bytes is None else max(0, max_bytes)
+        self._lock = threading.Lock()
+        self.objects_dir.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # A short-lived connection per operation keeps threads and processes independent
+        conn = sqlite3.connect(str(self.index_path), timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _object_path(self, key: str, filename: str) -> Path:
+        return self.objects_dir / key[:2] / filename
+
+    def get(self, key: str) -> Optional[Path]:
+        """Return the cached image for a key and mark it as recently used, or None on a miss."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT filename FROM images WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            path = self._object_path(key, row[0])
+            if not path.exists():
+                _dbg(f"Dropping entry {key[:12]} with missing file {path}")
+                conn.execute("DELETE FROM images WHERE key = ?", (key,))
+                return None
+            conn.execute("UPDATE images SET last_access = ?, hits = hits + 1 WHERE key = ?", (time.time(), key))
+        _dbg(f"Hit {key[:12]} -> {path}")
+        return path
+
+    def put(self, key: str, source_path: Path, prompt: Optional[str] = None) -> Optional[Path]:
+        """
+        Copy a generated image into the cache.
+
+        Returns:
+            Path of the cached copy, or None if the image does not fit the byte budget
+        """
+        source_path = Path(source_path)
+        return self._store(key, source_path.stat().st_size, source_path.suffix,
+                           lambda tmp_path: shutil.copyfile(source_path, tmp_path), prompt)
+
+    def put_bytes(self, key: str, data: bytes, suffix: str = ".png", prompt: Optional[str] = None) -> Optional[Path]:
+        """Store image bytes received from the server; same return value as put()."""
+        return self._store(key, len(data), suffix, lambda tmp_path: tmp_path.write_bytes(data), prompt)
+
+    def _store(self, key: str, size: int, suffix: str, write: Callable[[Path], object],
+               prompt: Optional[str]) -> Optional[Path]:
+        if size > self.max_bytes:
+            _dbg(f"Not caching {key[:12]}: {size} bytes exceeds the budget of {self.max_bytes}")
+            return None
+        filename = f"{key}{suffix or '.png'}"
+        path = self._object_path(key, filename)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f".{filename}.{os.getpid()}.{threading.get_ident()}.tmp")
+        write(tmp_path)
+        os.replace(tmp_path, path)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO images (key, filename, size, prompt, created_at, last_access, hits) "
+                "VALUES (?, ?, ?, ?, ?, ?, 0)",
+                (key, filename, size, (prompt or "")[:500], now, now))
+            self._evict(conn)
+        _dbg(f"Stored {key[:12]} ({size} bytes)")
+        return path
+
+    def invalidate(self, key: str) -> bool:
+        """Remove one entry and its file."""
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT filename FROM images WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return False
+            conn.execute("DELETE FROM images WHERE key = ?", (key,))
+        self._object_path(key, row[0]).unlink(missing_ok=True)
+        return True
+
+    @property
+    def total_bytes(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+
+    def __len__(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM images").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM images").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        # Least recently used first, until the budget is met
+        for key, filename, size in conn.execute(
+                "SELECT key, filename, size FROM images ORDER BY last_access ASC").fetchall():
+            if total <= self.max_bytes:
+                break
+            conn.execute("DELETE FROM images WHERE key = ?", (key,))
+            self._object_path(key, filename).unlink(missing_ok=True)
+            total -= size
+            _dbg(f"Evicted {key[:12]} ({size} bytes)")
+
+
+_image_cache: Optional[ImageCache] = None
+_image_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> Optional[ImageCache]:
+    """Return the process-wide ImageCache, or None when IMAGE_CACHE_ENABLED is off."""
+    global _image_cache
+    if not CACHE_ENABLED:
+        return None
+    with _image_cache_lock:
+        if _image_cache is None:
+            _image_cache = ImageCache()
+        return _image_cache
@@ -0,0 +1,722 @@
+"""
+Image Server Client
+One pooled HTTP client for every tool that talks to the Gemini image server. Connections
+are kept alive in a bounded pool, and all tools share the same connect/read timeouts.
+
+requests.Session connection pools are thread-safe, so a single client serves all crew
+worker threads of a process. The client is process-local: after a fork the child builds
+its own session instead of sharing sockets with the parent.
+
+send() retries 5xx responses, timeouts and connection errors with jittered exponential
+backoff, fails fast through a circuit breaker while the server is down and, when
+IMAGE_SERVER_HEDGING is on, fires a duplicate request once a call is slower than the recent
+p95 latency. Every call reports a CallOutcome (src/utils/resilience.py): generate() adds it to
+the result as result["outcome"], and attaches it to raised exceptions as error.outcome.
+Each HTTP request first waits for its turn from the backend's rate governor
+(src/utils/rate_governor.py), which keeps all threads and worker processes within the
+provider's QPS and concurrency quota.
+
+GEMINI_IMAGE_SERVER_URL may list several server instances, comma separated. Requests are
+then balanced over them (src/utils/endpoint_pool.py), each with its own breaker and governor,
+and failing instances are ejected. In the path transfer mode all instances must read
+references from and save to the shared GEMINI_IMAGE_ROOT; in the byte modes references and
+images travel inside the requests and responses, so the instances need no shared disk.
+
+generate() puts the content-addressed image cache (src/utils/image_cache.py) in front of
+the server, so every tool reuses images it has already paid for, and coalesces identical
+requests that are in flight at the same time (src/utils/singleflight.py): concurrent runs or
+agent retries sending the same prompt and references share one server call.
+
+Transfer modes (IMAGE_TRANSFER_MODE):
+- path:   the server reads the references from base_image_paths, saves the image and returns
+          {"image_path": ...}; both processes must share a disk (GEMINI_IMAGE_ROOT) and the
+          client waits for the file to appear.
+- base64: the request asks for {"response_format": "base64"} and the server returns
+          {"status": "success", "image_base64": ..., "filename": ...}.
+- bytes:  the request asks for {"response_format": "bytes"} and the server answers with the
+          raw image body (Content-Type image/*, optional X-Image-Filename header).
+In the byte modes base_image_paths is replaced by the references' contents,
+"base_images": [{"filename": ..., "image_base64": ...}], and generate() returns the image as
+result["image_bytes"], which the tools write straight into the panel folders.
+result["image_path"] then points to a local copy for tools that pass the image on as a file
+(see _keep_local_copy). A server that ignores response_format and returns a path still works.
+
+agenerate() is the asyncio version of generate() for the tools' _arun paths: the request is
+sent with httpx.AsyncClient, so a waiting image call holds no thread, and the cache, governor
+and file work runs briefly in worker threads. It shares the endpoint pool, breakers, retry
+policy, cache and metrics with the synchronous path; coalescing applies among the coroutines
+of one event loop.
+"""
+
+import asyncio
+import base64
+import contextvars
+import os
+import threading
+import time
+import uuid
+import weakref
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from pathlib import Path
+from typing import Any, Dict, Optional, Set, Tuple
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from src.utils.metrics import (
+    IMAGE_CACHE_LOOKUPS, IMAGE_REQUESTS_COALESCED, IMAGE_SERVER_HEDGES, IMAGE_SERVER_RETRIES, track_image_request,
+)
+from src.utils.cancellation import get_current_cancel_token
+from src.utils.resilience import (
+    CallOutcome, CircuitBreaker, CircuitOpenError, LatencyTracker, RetryPolicy,
+    classify_exception, is_retryable_status,
+)
+from src.utils.endpoint_pool import Endpoint, EndpointPool, parse_endpoints
+from src.utils.image_cache import ImageCache, get_image_cache, make_image_key
+from src.utils.image_utils import resolve_image_path, retry_file_check
+from src.utils.path_utils import get_backend_output_path
+from src.utils.rate_governor import GovernorTimeoutError, RateGovernor
+from src.utils.run_context import get_current_run_context
+from src.utils.singleflight import AsyncSingleFlight, SingleFlight
+
+
+IMAGE_SERVER_URL = os.getenv("GEMINI_IMAGE_SERVER_URL", "http://127.0.0.1:8000/generate-image/")
+# Keep-alive connections kept per host; callers beyond this wait for a free connection
+POOL_SIZE = int(os.getenv("IMAGE_SERVER_POOL_SIZE", "10"))
+CONNECT_TIMEOUT = float(os.getenv("IMAGE_SERVER_CONNECT_TIMEOUT", "5"))
+# Image generation routinely takes tens of seconds
+READ_TIMEOUT = float(os.getenv("IMAGE_SERVER_READ_TIMEOUT", "120"))
+MAX_ATTEMPTS = int(os.getenv("IMAGE_SERVER_MAX_ATTEMPTS", "3"))
+BACKOFF_BASE_SECONDS = float(os.getenv("IMAGE_SERVER_BACKOFF_BASE_SECONDS", "1"))
+BACKOFF_MAX_SECONDS = float(os.getenv("IMAGE_SERVER_BACKOFF_MAX_SECONDS", "10"))
+# Consecutive failures that open the circuit, and how long it stays open
+BREAKER_THRESHOLD = int(os.getenv("IMAGE_SERVER_BREAKER_THRESHOLD", "5"))
+BREAKER_RESET_SECONDS = float(os.getenv("IMAGE_SERVER_BREAKER_RESET_SECONDS", "30"))
+# Hedged requests duplicate slow calls; off by default since both requests are billed
+HEDGING_ENABLED = os.getenv("IMAGE_SERVER_HEDGING", "false").lower() in ("1", "true", "yes")
+HEDGE_PERCENTILE = float(os.getenv("IMAGE_SERVER_HEDGE_PERCENTILE", "0.95"))
+HEDGE_MIN_SAMPLES = int(os.getenv("IMAGE_SERVER_HEDGE_MIN_SAMPLES", "20"))
+TRANSFER_MODES = ("path", "base64", "bytes")
+TRANSFER_MODE = os.getenv("IMAGE_TRANSFER_MODE", "path").lower()
+
+
+def _dbg(msg: str):
+    print(f"[ImageClient] {msg}")
+
+
+class ImageServerClient:
+    """Keep-alive HTTP client for the image server's /generate-image/ endpoint."""
+
+    def __init__(self, server_url: Optional[str] = None, pool_size: Optional[int] = None,
+                 connect_timeout: Optional[float] = None, read_timeout: Optional[float] = None,
+                 transfer_mode: Optional[str] = None, retry_policy: Optional[RetryPolicy] = None,
+                 breaker: Optional[CircuitBreaker] = None, hedging: Optional[bool] = None,
+                 governor: Optional[RateGovernor] = None):
+        self.server_url = server_url or IMAGE_SERVER_URL
+        urls = parse_endpoints(self.server_url)
+        self.transfer_mode = (transfer_mode or TRANSFER_MODE).lower()
+        if self.transfer_mode not in TRANSFER_MODES:
+            _dbg(f"Unknown transfer mode '{self.transfer_mode}', using 'path'")
+            self.transfer_mode = "path"
+        self.pool_size = max(1, pool_size or POOL_SIZE)
+        self.connect_timeout = connect_timeout or CONNECT_TIMEOUT
+        self.read_timeout = read_timeout or READ_TIMEOUT
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, pool_block=True)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.retry_policy = retry_policy or RetryPolicy(MAX_ATTEMPTS, BACKOFF_BASE_SECONDS, BACKOFF_MAX_SECONDS)
+        self.hedging = HEDGING_ENABLED if hedging is None else hedging
+        if breaker is not None and len(urls) == 1:
+            breaker_factory = lambda url: breaker
+        else:
+            breaker_factory = lambda url: CircuitBreaker(f"image server {url}", BREAKER_THRESHOLD, BREAKER_RESET_SECONDS)
+        self.pool = EndpointPool(urls, breaker_factory=breaker_factory, governor=governor)
+        self.latency = LatencyTracker()
+        self._hedge_executor: Optional[ThreadPoolExecutor] = None
+        self._flights = SingleFlight("image requests")
+        # Event loop -> its httpx.AsyncClient and coalescing table (both are bound to one loop)
+        self._async_states: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncState]" = weakref.WeakKeyDictionary()
+        self._async_lock = threading.Lock()
+        _dbg(f"Pool of {self.pool_size} connections to {', '.join(urls)} "
+             f"(timeouts: connect {self.connect_timeout}s, read {self.read_timeout}s, transfer: {self.transfer_mode})")
+
+    @property
+    def timeout(self):
+        return (self.connect_timeout, self.read_timeout)
+
+    @property
+    def breaker(self) -> CircuitBreaker:
+        """Circuit breaker of the first endpoint (the only one in a single-server setup)."""
+        return self.pool.endpoints[0].breaker
+
+    def post(self, payload: Dict[str, Any], tool: str = "unknown", endpoint: Optional[Endpoint] = None) -> requests.Response:
+        """
+        POST a generation request and return the raw response.
+
+        Args:
+            payload: JSON body ({"prompt": ..., "base_image_paths": [...]})
+            tool: Name of the calling tool, used as a metrics label
+            endpoint: Endpoint picked by the caller; by default the pool picks one
+
+        Waits for the endpoint's rate governor first; the wait is not part of the request latency.
+
+        Raises:
+            requests.Timeout, requests.ConnectionError: as raised by requests
+            GovernorTimeoutError: no turn within IMAGE_SERVER_QUEUE_TIMEOUT_SECONDS (a requests.Timeout)
+        """
+        if endpoint is None:
+            endpoint = self.pool.pick(check_breaker=False)
+            try:
+                return self.post(payload, tool=tool, endpoint=endpoint)
+            finally:
+                self.pool.done(endpoint)
+        with endpoint.governor.slot(get_current_cancel_token()):
+            with track_image_request(tool) as request_metrics:
+                response = self.session.post(endpoint.url, json=payload, timeout=self.timeout)
+                request_metrics['status'] = response.status_code
+        return response
+
+    def send(self, payload: Dict[str, Any], tool: str = "unknown") -> Tuple[requests.Response, CallOutcome]:
+        """
+        POST with retries, the circuit breakers and (optionally) hedging. Retries and hedged
+        duplicates go to endpoints not yet tried for this call when there are any.
+
+        Returns:
+            The final response, which is a 5xx if every attempt failed that way, and its CallOutcome
+
+        Raises:
+            CircuitOpenError: while every endpoint's circuit is open (a requests.ConnectionError)
+            requests.Timeout, requests.ConnectionError: once retries are exhausted
+            RunCancelledError: if the run is cancelled while waiting to retry
+            The raised error carries the CallOutcome as error.outcome.
+        """
+        outcome = CallOutcome()
+        start = time.monotonic()
+        token = get_current_cancel_token()
+        response: Optional[requests.Response] = None
+        error: Optional[Exception] = None
+        tried: Set[str] = set()
+        for attempt in range(max(1, self.retry_policy.max_attempts)):
+            outcome.attempts = attempt + 1
+            response, error = None, None
+            try:
+                response, hedged = self._attempt(payload, tool, tried)
+                outcome.hedged = outcome.hedged or hedged
+            except CircuitOpenError as e:
+                error = e
+                break
+            except (requests.Timeout, requests.ConnectionError) as e:
+                error = e
+            else:
+                if self._accept(outcome, response, start):
+                    return response, outcome
+
+            delay = self._retry_delay(attempt, outcome, tool, error, response)
+            if delay is None:
+                break
+            if token is not None:
+                if token.wait(delay):
+                    token.raise_if_cancelled()
+            else:
+                time.sleep(delay)
+        return self._give_up(outcome, start, response, error)
+
+    @staticmethod
+    def _accept(outcome: CallOutcome, response, start: float) -> bool:
+        """Record a response in the outcome; True when it is final (not a retryable 5xx)."""
+        outcome.http_status = response.status_code
+        outcome.endpoint = str(response.url)
+        if is_retryable_status(response.status_code):
+            return False
+        outcome.status = "success" if response.status_code < 400 else "http_error"
+        outcome.elapsed = time.monotonic() - start
+        return True
+
+    def _retry_delay(self, attempt: int, outcome: CallOutcome, tool: str, error: Optional[Exception],
+                     response) -> Optional[float]:
+        """Backoff before the next attempt, or None when the attempts are used up."""
+        if attempt + 1 >= self.retry_policy.max_attempts:
+            return None
+        delay = self.retry_policy.backoff(attempt)
+        outcome.retry_delays.append(delay)
+        reason = classify_exception(error) if error is not None else f"http_{response.status_code}"
+        IMAGE_SERVER_RETRIES.inc(tool=tool, reason=reason)
+        _dbg(f"{tool}: attempt {attempt + 1} failed ({reason}), retrying in {delay:.2f}s")
+        return delay
+
+    @staticmethod
+    def _give_up(outcome: CallOutcome, start: float, response, error: Optional[Exception]):
+        """Return the last 5xx response, or raise the last error with the outcome attached."""
+        outcome.elapsed = time.monotonic() - start
+        if error is None:
+            outcome.status = "http_error"
+            return response, outcome
+        outcome.status = classify_exception(error)
+        outcome.error = str(error)
+        error.outcome = outcome
+        raise error
+
+    def _attempt(self, payload: Dict[str, Any], tool: str, tried: Set[str]) -> Tuple[requests.Response, bool]:
+        """One attempt; returns the response and whether a hedged duplicate was sent."""
+        threshold = self._hedge_threshold()
+        if threshold is None:
+            return self._timed_post(payload, tool, tried), False
+        return self._hedged_post(payload, tool, threshold, tried)
+
+    def _timed_post(self, payload: Dict[str, Any], tool: str, tried: Set[str]) -> requests.Response:
+        """POST to the endpoint the pool picks and feed the result to its breaker and latency stats."""
+        return self._post_to(self._pick(tried), payload, tool)
+
+    def _pick(self, tried: Set[str]) -> Endpoint:
+        """Pick an endpoint not yet tried for this call and mark it tried; pair with pool.done()."""
+        endpoint = self.pool.pick(exclude=tried)
+        tried.add(endpoint.url)
+        return endpoint
+
+    def _post_to(self, endpoint: Endpoint, payload: Dict[str, Any], tool: str) -> requests.Response:
+        """POST to a picked endpoint, record the result and hand the endpoint back to the pool."""
+        latency = None
+        try:
+            started = time.monotonic()
+            response = self.post(payload, tool=tool, endpoint=endpoint)
+            latency = self._record_response(endpoint, response, started)
+            return response
+        except GovernorTimeoutError:
+            # Waiting for our turn says nothing about the endpoint's health
+            raise
+        except (requests.Timeout, requests.ConnectionError):
+            endpoint.breaker.record_failure()
+            raise
+        finally:
+            self.pool.done(endpoint, latency)
+
+    def _record_response(self, endpoint: Endpoint, response, started: float) -> Optional[float]:
+        """Feed a response to the endpoint's breaker; returns its latency if it was a success."""
+        if is_retryable_status(response.status_code):
+            endpoint.breaker.record_failure()
+            return None
+        endpoint.breaker.record_success()
+        latency = time.monotonic() - started
+        self.latency.record(latency)
+        return latency
+
+    def _hedge_threshold(self) -> Optional[float]:
+        if not self.hedging or len(self.latency) < HEDGE_MIN_SAMPLES:
+            return None
+        return self.latency.percentile(HEDGE_PERCENTILE)
+
+    def _hedged_post(self, payload: Dict[str, Any], tool: str, hedge_after: float,
+                     tried: Set[str]) -> Tuple[requests.Response, bool]:
+        """Send the request; if it is still running after hedge_after seconds, send a duplicate and take the first good answer."""
+        if self._hedge_executor is None:
+            self._hedge_executor = ThreadPoolExecutor(max_workers=self.pool_size, thread_name_prefix="image-hedge")
+        # Endpoints are picked on this thread, so only this thread touches tried
+        primary = self._submit_post(self._pick(tried), payload, tool)
+        try:
+            return primary.result(timeout=hedge_after), False
+        except FutureTimeoutError:
+            pass
+        try:
+            hedge_endpoint = self._pick(tried)
+        except CircuitOpenError:
+            return primary.result(), False
+        _dbg(f"{tool}: no answer after {hedge_after:.1f}s (p{int(HEDGE_PERCENTILE * 100)}), sending a hedged request")
+        hedge = self._submit_post(hedge_endpoint, payload, tool)
+        names = {primary: "primary", hedge: "hedge"}
+        pending = {primary, hedge}
+        last_response, last_error = None, None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    last_error = e
+                    continue
+                if not is_retryable_status(response.status_code):
+                    IMAGE_SERVER_HEDGES.inc(tool=tool, winner=names[future])
+                    return response, True
+                last_response = response
+        IMAGE_SERVER_HEDGES.inc(tool=tool, winner="none")
+        if last_response is not None:
+            return last_response, True
+        raise last_error
+
+    def _submit_post(self, endpoint: Endpoint, payload: Dict[str, Any], tool: str) -> Future:
+        """Run _post_to on the hedge pool in a copy of this thread's context (run, cancellation token)."""
+        try:
+            return self._hedge_executor.submit(contextvars.copy_context().run, self._post_to, endpoint, payload, tool)
+        except BaseException:
+            self.pool.done(endpoint)
+            raise
+
+    def generate(self, payload: Dict[str, Any], tool: str = "unknown", use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Generate an image, serving identical requests from the image cache. Identical requests
+        that are already in flight are coalesced: they wait for that call and share its result.
+
+        Returns:
+            The server's JSON response with "outcome" (CallOutcome.to_dict()) added, plus "image_bytes"
+            in the byte transfer modes. Cache hits return
+            {"status": "success", "image_path": <cached file>, "cached": True}; the path is absolute so
+            resolve_image_path() leaves it untouched. Results shared with an in-flight call have
+            "coalesced": True.
+
+        Raises:
+            requests.HTTPError: for non-2xx responses (after retries for 5xx)
+            requests.Timeout, requests.ConnectionError, CircuitOpenError: see send()
+        """
+        cache, key, cached = self._lookup(payload, tool, use_cache)
+        if cached is not None:
+            return cached
+
+        # Identical requests already in flight (another run, or an agent retry) share that call
+        result, shared = self._flights.do(
+            f"{key}:{self.transfer_mode}",
+            lambda: self._generate_uncached(payload, tool, cache, key if cache is not None else None),
+            cancel_token=get_current_cancel_token(),
+        )
+        return self._shared_result(result, shared, tool)
+
+    @staticmethod
+    def _lookup(payload: Dict[str, Any], tool: str, use_cache: bool) -> Tuple[Optional[ImageCache], str, Optional[Dict[str, Any]]]:
+        """Cache key of a request and, on a cache hit, the result to return; (cache, key, hit or None)."""
+        cache = get_image_cache() if use_cache else None
+        # Hash the base images now; staged temp copies may be cleaned up after the request
+        key = make_image_key(payload.get("prompt", ""), payload.get("base_image_paths"), payload.get("model"))
+        if cache is not None:
+            cached_path = cache.get(key)
+            if cached_path is not None:
+                IMAGE_CACHE_LOOKUPS.inc(result="hit")
+                _dbg(f"{tool}: served from image cache ({cached_path.name})")
+                return cache, key, {"status": "success", "image_path": str(cached_path), "cached": True}
+            IMAGE_CACHE_LOOKUPS.inc(result="miss")
+        return cache, key, None
+
+    @staticmethod
+    def _shared_result(result: Dict[str, Any], shared: bool, tool: str) -> Dict[str, Any]:
+        if not shared:
+            return result
+        IMAGE_REQUESTS_COALESCED.inc(tool=tool)
+        _dbg(f"{tool}: joined an identical request already in flight")
+        return dict(result, coalesced=True)
+
+    def _request_payload(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Body sent to the server. In the byte modes the reference images are read here and sent
+        inline, since the server may not see this machine's disk.
+
+        Raises:
+            FileNotFoundError: if a reference image does not exist
+        """
+        if self.transfer_mode == "path":
+            return payload
+        request = dict(payload, response_format=self.transfer_mode)
+        base_image_paths = request.pop("base_image_paths", None)
+        if base_image_paths:
+            request["base_images"] = [self._inline_image(path) for path in base_image_paths]
+        return request
+
+    @staticmethod
+    def _inline_image(path: str) -> Dict[str, str]:
+        source = resolve_image_path(path)
+        return {"filename": source.name, "image_base64": base64.b64encode(source.read_bytes()).decode("ascii")}
+
+    def _generate_uncached(self, payload: Dict[str, Any], tool: str, cache: Optional[ImageCache],
+                           key: Optional[str]) -> Dict[str, Any]:
+        response, outcome = self.send(self._request_payload(payload), tool=tool)
+        self._raise_for_status(response, outcome)
+        result = self._parse_response(response)
+        result["outcome"] = outcome.to_dict()
+        self._keep_result(cache, key, result, payload.get("prompt"))
+        return result
+
+    @staticmethod
+    def _raise_for_status(response, outcome: CallOutcome):
+        """Raise requests.HTTPError (carrying the outcome) for a 4xx/5xx requests or httpx response."""
+        if response.status_code < 400:
+            return
+        reason = getattr(response, "reason", None) or getattr(response, "reason_phrase", "")
+        kind = "Client" if response.status_code < 500 else "Server"
+        error = requests.HTTPError(f"{response.status_code} {kind} Error: {reason} for url: {response.url}",
+                                   response=response)
+        error.outcome = outcome
+        raise error
+
+    def _keep_result(self, cache: Optional[ImageCache], key: Optional[str], result: Dict[str, Any],
+                     prompt: Optional[str]):
+        """Store a successful result in the cache, or keep a local copy of received bytes."""
+        if result.get("image_bytes") is not None:
+            self._keep_local_copy(cache, key, result, prompt)
+        elif key is not None and (result.get("status") == "success" or result.get("success")):
+            self._store_in_cache(cache, key, result, prompt)
+
+    @staticmethod
+    def _parse_response(response) -> Dict[str, Any]:
+        """Turn a JSON, base64 or raw-bytes response (requests or httpx) into a result dict."""
+        content_type = response.headers.get("Content-Type", "")
+        if content_type.startswith("image/"):
+            extension = content_type.split("/", 1)[1].split(";", 1)[0].strip() or "png"
+            filename = response.headers.get("X-Image-Filename") or f"{uuid.uuid4().hex}.{extension}"
+            return {"status": "success", "image_bytes": response.content, "image_path": filename}
+        result = response.json()
+        if result.get("image_base64"):
+            result["image_bytes"] = base64.b64decode(result.pop("image_base64"))
+            result["image_path"] = result.get("filename") or result.get("image_path") or f"{uuid.uuid4().hex}.png"
+        return result
+
+    @staticmethod
+    def _keep_local_copy(cache: Optional[ImageCache], key: Optional[str], result: Dict[str, Any],
+                         prompt: Optional[str]):
+        """
+        Point result['image_path'] at a local file holding the received bytes.
+
+        With the image cache enabled the cache entry is that file, so nothing is written twice.
+        Only without a cache do the bytes also go to the run's received_images folder: the panel
+        tools write image_bytes themselves, but CharacterConsistencyTool returns image_path as
+        the character reference that later requests send as base_image_paths.
+        """
+        name = Path(result["image_path"]).name
+        local_path = None
+        if cache is not None and key is not None:
+            try:
+                local_path = cache.put_bytes(key, result["image_bytes"], suffix=Path(name).suffix, prompt=prompt)
+            except OSError as e:
+                _dbg(f"Could not cache received image: {e}")
+        if local_path is None:
+            context = get_current_run_context()
+            folder = context.workspace / "received_images" if context else get_backend_output_path("received_images")
+            folder.mkdir(parents=True, exist_ok=True)
+            local_path = folder / name
+            local_path.write_bytes(result["image_bytes"])
+        result["image_path"] = str(local_path)
+
+    @staticmethod
+    def _store_in_cache(cache: ImageCache, key: str, result: Dict[str, Any], prompt: Optional[str]):
+        image_path = result.get("image_path") or result.get("local_path")
+        if not image_path:
+            return
+        source_path = resolve_image_path(image_path)
+        if not retry_file_check(source_path):
+            _dbg(f"Not caching {source_path}: file not found")
+            return
+        try:
+            cache.put(key, source_path, prompt=prompt)
+        except OSError as e:
+            _dbg(f"Could not cache {source_path}: {e}")
+
+    # Async path: same behaviour as post/send/generate, without holding a thread per request
+
+    def _async_state(self) -> "_AsyncState":
+        loop = asyncio.get_running_loop()
+        with self._async_lock:
+            state = self._async_states.get(loop)
+            if state is None:
+                state = _AsyncState(httpx.AsyncClient(
+                    limits=httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size),
+                    timeout=httpx.Timeout(self.read_timeout, connect=self.connect_timeout),
+                ))
+                self._async_states[loop] = state
+            return state
+
+    async def apost(self, payload: Dict[str, Any], tool: str = "unknown",
+                    endpoint: Optional[Endpoint] = None) -> httpx.Response:
+        """
+        Async post(). httpx errors are raised as their requests counterparts (requests.Timeout,
+        requests.ConnectionError) so callers handle both paths the same way.
+        """
+        if endpoint is None:
+            endpoint = self.pool.pick(check_breaker=False)
+            try:
+                return await self.apost(payload, tool=tool, endpoint=endpoint)
+            finally:
+                self.pool.done(endpoint)
+        slot = endpoint.governor.slot(get_current_cancel_token()) if endpoint.governor.enabled else None
+        if slot is not None:
+            await self._aenter_slot(slot)
+        try:
+            with track_image_request(tool) as request_metrics:
+                try:
+                    response = await self._async_state().http.post(endpoint.url, json=payload)
+                except httpx.TimeoutException as e:
+                    raise requests.Timeout(str(e) or type(e).__name__) from e
+                except httpx.TransportError as e:
+                    raise requests.ConnectionError(str(e) or type(e).__name__) from e
+                request_metrics['status'] = response.status_code
+            return response
+        finally:
+            if slot is not None:
+                await asyncio.to_thread(slot.__exit__, None, None, None)
+
+    @staticmethod
+    async def _aenter_slot(slot):
+        """
+        Wait for a governor turn off the event loop (the governor coordinates through SQLite).
+        If the caller is cancelled meanwhile, the worker thread still gets the slot, so it is
+        handed back as soon as that happens.
+        """
+        acquire = asyncio.ensure_future(asyncio.to_thread(slot.__enter__))
+        try:
+            await asyncio.shield(acquire)
+        except asyncio.CancelledError:
+            def release_if_acquired(future):
+                if not future.cancelled() and future.exception() is None:
+                    slot.__exit__(None, None, None)
+            acquire.add_done_callback(release_if_acquired)
+            raise
+
+    async def asend(self, payload: Dict[str, Any], tool: str = "unknown") -> Tuple[httpx.Response, CallOutcome]:
+        """Async send(): same retries, breakers and hedging; waits with asyncio instead of sleeping."""
+        outcome = CallOutcome()
+        start = time.monotonic()
+        token = get_current_cancel_token()
+        response: Optional[httpx.Response] = None
+        error: Optional[Exception] = None
+        tried: Set[str] = set()
+        for attempt in range(max(1, self.retry_policy.max_attempts)):
+            outcome.attempts = attempt + 1
+            response, error = None, None
+            try:
+                response, hedged = await self._aattempt(payload, tool, tried)
+                outcome.hedged = outcome.hedged or hedged
+            except CircuitOpenError as e:
+                error = e
+                break
+            except (requests.Timeout, requests.ConnectionError) as e:
+                error = e
+            else:
+                if self._accept(outcome, response, start):
+                    return response, outcome
+
+            delay = self._retry_delay(attempt, outcome, tool, error, response)
+            if delay is None:
+                break
+            await self._asleep(delay, token)
+        return self._give_up(outcome, start, response, error)
+
+    @staticmethod
+    async def _asleep(delay: float, token) -> None:
+        """asyncio.sleep that ends early with RunCancelledError when the run is cancelled."""
+        deadline = time.monotonic() + delay
+        while True:
+            if token is not None:
+                token.raise_if_cancelled()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            await asyncio.sleep(min(remaining, 0.1) if token is not None else remaining)
+
+    async def _aattempt(self, payload: Dict[str, Any], tool: str, tried: Set[str]) -> Tuple[httpx.Response, bool]:
+        threshold = self._hedge_threshold()
+        if threshold is None:
+            return await self._atimed_post(payload, tool, tried), False
+        return await self._ahedged_post(payload, tool, threshold, tried)
+
+    async def _atimed_post(self, payload: Dict[str, Any], tool: str, tried: Set[str]) -> httpx.Response:
+        endpoint = self._pick(tried)
+        latency = None
+        try:
+            started = time.monotonic()
+            response = await self.apost(payload, tool=tool, endpoint=endpoint)
+            latency = self._record_response(endpoint, response, started)
+            return response
+        except GovernorTimeoutError:
+            raise
+        except (requests.Timeout, requests.ConnectionError):
+            endpoint.breaker.record_failure()
+            raise
+        finally:
+            self.pool.done(endpoint, latency)
+
+    async def _ahedged_post(self, payload: Dict[str, Any], tool: str, hedge_after: float,
+                            tried: Set[str]) -> Tuple[httpx.Response, bool]:
+        """Async _hedged_post(); the losing request is cancelled instead of left running."""
+        primary = asyncio.ensure_future(self._atimed_post(payload, tool, tried))
+        done, _ = await asyncio.wait({primary}, timeout=hedge_after)
+        if done:
+            return primary.result(), False
+        _dbg(f"{tool}: no answer after {hedge_after:.1f}s (p{int(HEDGE_PERCENTILE * 100)}), sending a hedged request")
+        hedge = asyncio.ensure_future(self._atimed_post(payload, tool, tried))
+        names = {primary: "primary", hedge: "hedge"}
+        pending = {primary, hedge}
+        last_response, last_error = None, None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    response = task.result()
+                    if not is_retryable_status(response.status_code):
+                        IMAGE_SERVER_HEDGES.inc(tool=tool, winner=names[task])
+                        return response, True
+                    last_response = response
+        finally:
+            for task in pending:
+                task.cancel()
+        IMAGE_SERVER_HEDGES.inc(tool=tool, winner="none")
+        if last_response is not None:
+            return last_response, True
+        raise last_error
+
+    async def agenerate(self, payload: Dict[str, Any], tool: str = "unknown", use_cache: bool = True) -> Dict[str, Any]:
+        """
+        Async generate(): same result dict and the same exceptions (requests.HTTPError,
+        requests.Timeout, requests.ConnectionError, CircuitOpenError).
+        """
+        cache, key, cached = await asyncio.to_thread(self._lookup, payload, tool, use_cache)
+        if cached is not None:
+            return cached
+        result, shared = await self._async_state().flights.do(
+            f"{key}:{self.transfer_mode}",
+            lambda: self._agenerate_uncached(payload, tool, cache, key if cache is not None else None),
+            cancel_token=get_current_cancel_token(),
+        )
+        return self._shared_result(result, shared, tool)
+
+    async def _agenerate_uncached(self, payload: Dict[str, Any], tool: str, cache: Optional[ImageCache],
+                                  key: Optional[str]) -> Dict[str, Any]:
+        request = await asyncio.to_thread(self._request_payload, payload)
+        response, outcome = await self.asend(request, tool=tool)
+        self._raise_for_status(response, outcome)
+        result = self._parse_response(response)
+        result["outcome"] = outcome.to_dict()
+        await asyncio.to_thread(self._keep_result, cache, key, result, payload.get("prompt"))
+        return result
+
+    def close(self):
+        self.pool.close()
+        if self._hedge_executor is not None:
+            self._hedge_executor.shutdown(wait=False)
+        self.session.close()
+
+    async def aclose(self):
+        """Close the async client of the running event loop."""
+        state = self._async_states.pop(asyncio.get_running_loop(), None)
+        if state is not None:
+            await state.http.aclose()
+
+
+class _AsyncState:
+    """Per-event-loop async resources of an ImageServerClient."""
+
+    def __init__(self, http: httpx.AsyncClient):
+        self.http = http
+        self.flights = AsyncSingleFlight("async image requests")
+
+
+_client: Optional[ImageServerClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_image_client() -> ImageServerClient:
+    """Return this process's shared ImageServerClient."""
+    global _client, _client_pid
+    with _client_lock:
+        if _client is None or _client_pid != os.getpid():
+            _client = ImageServerClient()
+            _client_pid = os.getpid()
+        return _client
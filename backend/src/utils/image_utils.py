@@ -1,49 +1,37 @@
 import os
-import time
 import shutil
 import re
 from pathlib import Path
 from typing import Optional, Tuple,List
 from src.utils.registry_utils import update_registry_entry
 from src.utils.path_utils import get_backend_output_path, get_frontend_public_path
+from src.utils.run_context import scoped_temp_folder
+from src.utils.metrics import BYTES_COPIED
+from src.utils.file_waiter import wait_for_file
+from src.utils.reference_staging import get_reference_stager
 
 # Base directory for Gemini image server
 GEMINI_BASE_DIR = os.getenv("GEMINI_IMAGE_ROOT", r"C:\Users\ninic\projects\Datacamp_projects\gemini-image-tutorial")
 
 def prepare_temp_images_for_gemini(base_image_paths: List[str], temp_folder_name: str) -> List[str]:
     """
-    Copies base images to a Gemini-accessible temp folder and returns their absolute paths.
+    Makes base images visible to the Gemini server and returns their absolute paths.
+
+    Images are staged once per content hash (hardlink, symlink or copy) in a folder shared by
+    all runs, see src/utils/reference_staging.py. Each returned path holds a reference;
+    pass the paths to release_staged_references() once the request is done.
 
     Args:
         base_image_paths (List[str]): List of image paths from ComicBook side
-        temp_folder_name (str): Name of the temp folder inside Gemini-Image-Tutorial
+        temp_folder_name (str): Kept for compatibility; staging no longer uses per-tool folders
 
     Returns:
-        List[str]: List of absolute paths inside Gemini temp folder
+        List[str]: List of absolute paths inside the Gemini staging folder
     """
-    gemini_root = Path(os.getenv("GEMINI_IMAGE_ROOT", "C:/Users/ninic/projects/Datacamp_projects/gemini-image-tutorial"))
-    temp_dir = gemini_root / temp_folder_name
-    temp_dir.mkdir(parents=True, exist_ok=True)
-
-    copied_paths = []
-    for path_str in base_image_paths:
-        src_path = Path(path_str).resolve()
-        if not src_path.exists():
-            print(f"⚠️ Source image not found: {src_path}")
-            continue
-
-        # Create unique filename to avoid collisions
-        filename = src_path.name
-        dest_path = temp_dir / filename
-
-        try:
-            shutil.copy2(src_path, dest_path)
-            copied_paths.append(str(dest_path.resolve()))
-            print(f"📁 Copied to Gemini temp folder: {dest_path}")
-        except Exception as e:
-            print(f"⚠️ Failed to copy {src_path} to Gemini temp folder: {e}")
-
-    return copied_paths
+    staged_paths = get_reference_stager().stage_all(base_image_paths)
+    for path in staged_paths:
+        print(f"📁 Staged for Gemini: {path}")
+    return staged_paths
 
 def resolve_image_path(relative_path: str) -> Path:
     """Convert relative image path from Gemini server to absolute path."""
@@ -53,12 +41,8 @@ def resolve_image_path(relative_path: str) -> Path:
     return path
 
 def retry_file_check(path: Path, retries: int = 3, delay: float = 1.0) -> bool:
-    """Wait and retry until file exists."""
-    for _ in range(retries):
-        if path.exists():
-            return True
-        time.sleep(delay)
-    return False
+    """Wait until the file is fully written, for at most retries * delay seconds."""
+    return wait_for_file(path, timeout=retries * delay)
 
 def verify_image_readable(path: Path) -> bool:
     """Check if image file is readable."""
@@ -85,18 +69,44 @@ def copy_image_to_output(source_path: Path, filename: str) -> Tuple[Path, Path]:
     # Copy with safe guards and informative prints
     try:
         shutil.copy2(source_path, backend_path)
+        BYTES_COPIED.inc(backend_path.stat().st_size, destination="backend")
         print(f"[image_utils] Copied to backend: {backend_path}")
     except Exception as e:
         print(f"[image_utils] Failed to copy to backend: {e}")
 
     try:
         shutil.copy2(source_path, frontend_path)
+        BYTES_COPIED.inc(frontend_path.stat().st_size, destination="frontend")
         print(f"[image_utils] Copied to frontend: {frontend_path}")
     except Exception as e:
         print(f"[image_utils] Failed to copy to frontend: {e}")
 
     return backend_path, frontend_path
 
+def write_image_to_output(data: bytes, filename: str) -> Tuple[Path, Path]:
+    """Write image bytes received from the server straight to the backend and frontend directories."""
+    backend_dir = get_backend_output_path("comic_panels")
+    frontend_dir = get_frontend_public_path("comic_panels")
+    backend_dir.mkdir(parents=True, exist_ok=True)
+    frontend_dir.mkdir(parents=True, exist_ok=True)
+
+    backend_path = backend_dir / filename
+    frontend_path = frontend_dir / filename
+
+    try:
+        backend_path.write_bytes(data)
+        print(f"[image_utils] Wrote to backend: {backend_path}")
+    except Exception as e:
+        print(f"[image_utils] Failed to write to backend: {e}")
+
+    try:
+        frontend_path.write_bytes(data)
+        print(f"[image_utils] Wrote to frontend: {frontend_path}")
+    except Exception as e:
+        print(f"[image_utils] Failed to write to frontend: {e}")
+
+    return backend_path, frontend_path
+
 def extract_panel_id(prompt: str) -> Optional[str]:
     """Extract panel number from prompt text."""
     match = re.search(r'panel\s*(\d+)', prompt.lower())
@@ -116,14 +126,14 @@ def update_registry_for_image(panel_id: str, filename: str, backend: bool, front
     )
 
 def clean_temp_folder(folder_name: str, keep_recent: int = 0) -> None:
-    """Deletes files in a Gemini temp folder, keeping only the most recent if specified."""
+    """Deletes files in a Gemini temp folder (scoped to the active run), keeping only the most recent if specified."""
     gemini_root = Path(os.getenv("GEMINI_IMAGE_ROOT", "C:/Users/ninic/projects/Datacamp_projects/gemini-image-tutorial"))
-    temp_dir = gemini_root / folder_name
+    temp_dir = gemini_root / scoped_temp_folder(folder_name)
     if not temp_dir.exists():
         print(f"🧹 Temp folder not found: {temp_dir}")
         return
 
-    files = sorted(temp_dir.glob("*"), key=lambda x: x.stat().st_mtime, reverse=True)
+    files = sorted((f for f in temp_dir.glob("*") if f.is_file()), key=lambda x: x.stat().st_mtime, reverse=True)
     files_to_delete = files[keep_recent:] if keep_recent > 0 else files
 
     for file_path in files_to_delete:
@@ -0,0 +1,220 @@
+"""
+Job Manager for Comic Generation
+Runs comic generation jobs on a bounded pool of worker threads so the API event loop
+stays free to serve SSE streams and static files while comics render.
+"""
+
+import os
+import threading
+import uuid
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+from src.utils.cancellation import CancellationToken
+
+
+DEFAULT_WORKER_COUNT = int(os.getenv("COMIC_WORKER_COUNT", "2"))
+DEFAULT_MAX_QUEUED_JOBS = int(os.getenv("COMIC_MAX_QUEUED_JOBS", "50"))
+# Number of finished jobs kept around for status lookups
+FINISHED_JOB_HISTORY = 200
+
+
+def _dbg(msg: str):
+    print(f"[JobManager] {msg}")
+
+
+class JobQueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity."""
+
+
+@dataclass
+class Job:
+    """A single comic generation run tracked by the JobManager."""
+    job_id: str
+    topic: str = ""
+    status: str = "queued"  # queued | running | completed | failed | cancelled
+    submitted_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: Optional[str] = None
+    finished_at: Optional[str] = None
+    error: Optional[str] = None
+    result: Any = None
+    future: Optional[Future] = field(default=None, repr=False)
+    cancel_token: Optional[CancellationToken] = field(default=None, repr=False)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'job_id': self.job_id,
+            'topic': self.topic,
+            'status': self.status,
+            'submitted_at': self.submitted_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'error': self.error,
+        }
+
+
+class JobManager:
+    """
+    Bounded worker pool with a FIFO job queue.
+
+    Jobs are executed on a ThreadPoolExecutor; the manager keeps its own ordered view of
+    pending jobs so it can report queue positions. Context variables of the submitting
+    thread are copied into the worker so per-run state follows the job.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_queued: Optional[int] = None):
+        self.max_workers = max(1, max_workers or DEFAULT_WORKER_COUNT)
+        self.max_queued = max(1, max_queued or DEFAULT_MAX_QUEUED_JOBS)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="comic-worker")
+        self._lock = threading.Lock()
+        self._pending: "OrderedDict[str, Job]" = OrderedDict()
+        self._running: Dict[str, Job] = {}
+        self._finished: "OrderedDict[str, Job]" = OrderedDict()
+        _dbg(f"Started worker pool with {self.max_workers} workers (max queued: {self.max_queued})")
+
+    def submit(self, func: Callable[..., Any], *args, topic: str = "", job_id: Optional[str] = None,
+               cancel_token: Optional[CancellationToken] = None, **kwargs) -> Job:
+        """
+        Queue a callable for execution on the worker pool.
+
+        Args:
+            func: Blocking callable to run (e.g. a crew kickoff wrapper)
+            topic: Comic topic, kept for status reporting
+            job_id: Optional explicit job ID; a random one is generated otherwise
+            cancel_token: Token that cancel() sets; the callable is expected to honour it
+
+        Returns:
+            The queued Job
+        """
+        job = Job(job_id=job_id or uuid.uuid4().hex[:12], topic=topic, cancel_token=cancel_token or CancellationToken())
+        with self._lock:
+            if len(self._pending) >= self.max_queued:
+                raise JobQueueFullError(f"Job queue is full ({self.max_queued} jobs waiting)")
+            self._pending[job.job_id] = job
+
+        ctx = contextvars.copy_context()
+        try:
+            job.future = self._executor.submit(ctx.run, self._execute, job, func, args, kwargs)
+        except BaseException:
+            # e.g. RuntimeError after shutdown: the job will never run, so it must not look pending
+            with self._lock:
+                self._pending.pop(job.job_id, None)
+            raise
+        _dbg(f"Queued job {job.job_id} (topic='{topic}', position={self.queue_position(job.job_id)})")
+        return job
+
+    def _execute(self, job: Job, func: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+        with self._lock:
+            self._pending.pop(job.job_id, None)
+            self._running[job.job_id] = job
+        job.status = "running"
+        job.started_at = datetime.now().isoformat()
+        _dbg(f"Running job {job.job_id}")
+        try:
+            job.result = func(*args, **kwargs)
+            job.status = "cancelled" if job.cancel_token.is_cancelled else "completed"
+            return job.result
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            _dbg(f"Job {job.job_id} failed: {e}")
+            raise
+        finally:
+            job.finished_at = datetime.now().isoformat()
+            with self._lock:
+                self._running.pop(job.job_id, None)
+                self._record_finished(job)
+            _dbg(f"Job {job.job_id} finished with status '{job.status}'")
+
+    def cancel(self, job_id: str, reason: str = "cancelled") -> bool:
+        """
+        Cancel a job. A queued job is removed before it starts; a running job has its
+        cancellation token set and stops at its next checkpoint.
+
+        Returns:
+            True if the job was still queued and will never run
+        """
+        job = self.get(job_id)
+        if job is None:
+            return False
+        job.cancel_token.cancel(reason)
+        if job.future is not None and job.future.cancel():
+            with self._lock:
+                self._pending.pop(job_id, None)
+                self._record_finished(job)
+            job.status = "cancelled"
+            job.finished_at = datetime.now().isoformat()
+            _dbg(f"Cancelled queued job {job_id} ({reason})")
+            return True
+        _dbg(f"Requested cancellation of running job {job_id} ({reason})")
+        return False
+
+    def _record_finished(self, job: Job):
+        """Keep a finished job for lookups, up to FINISHED_JOB_HISTORY of them; call with the lock held."""
+        self._finished[job.job_id] = job
+        while len(self._finished) > FINISHED_JOB_HISTORY:
+            self._finished.popitem(last=False)
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by ID regardless of its state."""
+        with self._lock:
+            return self._pending.get(job_id) or self._running.get(job_id) or self._finished.get(job_id)
+
+    def queue_position(self, job_id: str) -> int:
+        """Return the 1-based position of a queued job, or 0 if it is no longer waiting."""
+        with self._lock:
+            for position, pending_id in enumerate(self._pending, start=1):
+                if pending_id == job_id:
+                    return position
+        return 0
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    @property
+    def active_count(self) -> int:
+        with self._lock:
+            return len(self._running)
+
+    def list_jobs(self) -> List[Dict[str, Any]]:
+        """Return status dictionaries for pending, running and recently finished jobs."""
+        with self._lock:
+            jobs = list(self._pending.values()) + list(self._running.values()) + list(self._finished.values())
+            # One pass over the queue instead of a queue_position() scan per job
+            positions = {job_id: position for position, job_id in enumerate(self._pending, start=1)}
+        result = []
+        for job in jobs:
+            info = job.to_dict()
+            info['queue_position'] = positions.get(job.job_id, 0)
+            result.append(info)
+        return result
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'workers': self.max_workers,
+            'queue_depth': self.queue_depth,
+            'active': self.active_count,
+        }
+
+    def shutdown(self, wait: bool = False):
+        """Stop accepting work and release worker threads."""
+        _dbg("Shutting down worker pool")
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+_job_manager: Optional[JobManager] = None
+_job_manager_lock = threading.Lock()
+
+
+def get_job_manager() -> JobManager:
+    """Return the process-wide JobManager, creating it on first use."""
+    global _job_manager
+    with _job_manager_lock:
+        if _job_manager is None:
+            _job_manager = JobManager()
+        return _job_manager
@@ -0,0 +1,292 @@
+"""
+Metrics for the Comic Pipeline
+A small in-process metrics registry (counters, gauges, histograms with labels) rendered in
+the Prometheus text exposition format by the API's /metrics endpoint.
+
+Task and tool timings are collected from CrewAI's event bus (see install_crewai_listeners),
+so individual tools do not need their own timing code.
+"""
+
+import abc
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+# Latency buckets in seconds: LLM tasks take minutes, image calls tens of seconds
+DEFAULT_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 20, 30, 60, 120, 300, 600, 1200)
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Dict[str, object]) -> LabelKey:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(key) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    escaped = [(name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for name, value in pairs]
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric(abc.ABC):
+    type_name = "untyped"
+
+    def __init__(self, name: str, help_text: str):
+        self.name = name
+        self.help_text = help_text
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} {self.type_name}"] + self._samples()
+
+    @abc.abstractmethod
+    def _samples(self) -> List[str]:
+        """Exposition lines of the metric's samples."""
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+    type_name = "counter"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that goes up and down; may be computed at scrape time with set_function()."""
+    type_name = "gauge"
+
+    def __init__(self, name: str, help_text: str):
+        super().__init__(name, help_text)
+        self._values: Dict[LabelKey, float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, function: Callable[[], float]):
+        """Compute the (unlabelled) value when metrics are rendered."""
+        self._function = function
+
+    def value(self, **labels) -> float:
+        if self._function is not None and not labels:
+            return float(self._function())
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                return [f"{self.name} {_format_value(self._function())}"]
+            except Exception:
+                return []
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {_format_value(value)}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+    type_name = "histogram"
+
+    def __init__(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help_text)
+        self.buckets = tuple(sorted(buckets))
+        # label key -> (per-bucket counts incl. +Inf, sum, count)
+        self._values: Dict[LabelKey, Tuple[List[int], float, int]] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts, total, count = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            counts[index] += 1
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            entry = self._values.get(_label_key(labels))
+            return entry[2] if entry else 0
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, (list(counts), total, count)) for key, (counts, total, count) in self._values.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, ('le', _format_value(bound)))} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {_format_value(total)}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Named collection of metrics, rendered together for /metrics."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name: str, help_text: str) -> Counter:
+        return self._register(Counter(name, help_text))
+
+    def gauge(self, name: str, help_text: str) -> Gauge:
+        return self._register(Gauge(name, help_text))
+
+    def histogram(self, name: str, help_text: str, buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, help_text, buckets))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = MetricsRegistry()
+
+TASK_DURATION = REGISTRY.histogram("comic_task_duration_seconds", "Duration of crew tasks by agent and task.")
+TOOL_CALLS = REGISTRY.counter("comic_tool_calls_total", "Tool calls by tool and outcome (ok, error).")
+TOOL_DURATION = REGISTRY.histogram("comic_tool_duration_seconds", "Duration of tool calls by tool.")
+IMAGE_SERVER_LATENCY = REGISTRY.histogram("comic_image_server_request_seconds",
+                                          "Latency of image server requests by tool and HTTP status.")
+QUEUE_DEPTH = REGISTRY.gauge("comic_queue_depth", "Comic generation jobs waiting for a worker.")
+ACTIVE_RUNS = REGISTRY.gauge("comic_active_runs", "Comic generation jobs currently running.")
+RUNS_TOTAL = REGISTRY.counter("comic_runs_total", "Finished comic runs by outcome.")
+BYTES_COPIED = REGISTRY.counter("comic_bytes_copied_total", "Bytes of image files copied, by destination.")
+IMAGE_SERVER_RETRIES = REGISTRY.counter("comic_image_server_retries_total", "Image server retries by tool and reason.")
+IMAGE_SERVER_HEDGES = REGISTRY.counter("comic_image_server_hedged_requests_total",
+                                       "Duplicate (hedged) image server requests by tool and which request won.")
+IMAGE_CACHE_LOOKUPS = REGISTRY.counter("comic_image_cache_lookups_total", "Generated-image cache lookups by result (hit, miss).")
+IMAGE_SERVER_QUEUE_WAIT = REGISTRY.histogram("comic_image_server_queue_wait_seconds",
+                                             "Time image requests waited for the backend's rate/concurrency governor.",
+                                             buckets=(0.01,) + DEFAULT_BUCKETS)
+IMAGE_REQUESTS_COALESCED = REGISTRY.counter("comic_image_requests_coalesced_total",
+                                            "Image requests that joined an identical request already in flight, by tool.")
+
+
+@contextmanager
+def track_image_request(tool: str) -> Iterator[Dict[str, object]]:
+    """
+    Time an image server request. Set result['status'] to the HTTP status inside the block;
+    requests that raise are recorded as 'timeout' or 'error'.
+    """
+    result: Dict[str, object] = {'status': 'error'}
+    start = time.perf_counter()
+    try:
+        yield result
+    except Exception as e:
+        result['status'] = 'timeout' if isinstance(e, TimeoutError) or 'Timeout' in type(e).__name__ else 'error'
+        raise
+    finally:
+        IMAGE_SERVER_LATENCY.observe(time.perf_counter() - start, tool=tool, status=result['status'])
+
+
+_listeners_installed = False
+_listeners_lock = threading.Lock()
+_task_starts: Dict[str, float] = {}
+
+
+def install_crewai_listeners():
+    """Record task durations and tool calls from CrewAI's event bus (idempotent)."""
+    global _listeners_installed
+    with _listeners_lock:
+        if _listeners_installed:
+            return
+        _listeners_installed = True
+
+    from crewai.events import (
+        crewai_event_bus, TaskStartedEvent, TaskCompletedEvent, TaskFailedEvent,
+        ToolUsageFinishedEvent, ToolUsageErrorEvent,
+    )
+
+    def _task_labels(task) -> Dict[str, str]:
+        agent = getattr(getattr(task, 'agent', None), 'role', None) or 'unknown'
+        return {'agent': str(agent).strip(), 'task': getattr(task, 'name', None) or 'unnamed'}
+
+    @crewai_event_bus.on(TaskStartedEvent)
+    def _on_task_started(source, event):
+        if event.task is not None:
+            _task_starts[str(event.task.id)] = time.perf_counter()
+
+    def _on_task_finished(event):
+        if event.task is None:
+            return
+        start = _task_starts.pop(str(event.task.id), None)
+        if start is not None:
+            TASK_DURATION.observe(time.perf_counter() - start, **_task_labels(event.task))
+
+    @crewai_event_bus.on(TaskCompletedEvent)
+    def _on_task_completed(source, event):
+        _on_task_finished(event)
+
+    @crewai_event_bus.on(TaskFailedEvent)
+    def _on_task_failed(source, event):
+        _on_task_finished(event)
+
+    @crewai_event_bus.on(ToolUsageFinishedEvent)
+    def _on_tool_finished(source, event):
+        # Tools report most failures as '❌ ...' strings rather than exceptions
+        outcome = 'error' if str(event.output).lstrip().startswith(('❌', 'Error')) else 'ok'
+        TOOL_CALLS.inc(tool=event.tool_name, outcome=outcome)
+        if event.started_at and event.finished_at:
+            TOOL_DURATION.observe((event.finished_at - event.started_at).total_seconds(), tool=event.tool_name)
+
+    @crewai_event_bus.on(ToolUsageErrorEvent)
+    def _on_tool_error(source, event):
+        TOOL_CALLS.inc(tool=event.tool_name, outcome='error')
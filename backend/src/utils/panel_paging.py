@@ -0,0 +1,87 @@
+"""
+Panel Count and Paging
+How many panels a comic has comes from the data (the story's panels, the registry, or an
+explicit count), never from a constant. Long comics are handled a page of panels at a time,
+so layout, validation and export work through 50-500 panels in one linear pass per page.
+"""
+
+import math
+import os
+import re
+from typing import Iterable, Optional
+
+# Panels per comic when neither the caller, the story nor the registry says otherwise
+DEFAULT_PANEL_COUNT = int(os.getenv("COMIC_DEFAULT_PANEL_COUNT", "6"))
+# Longest comic a run may ask for
+MAX_PANEL_COUNT = int(os.getenv("COMIC_MAX_PANEL_COUNT", "500"))
+# Panels handled per page by layout, validation and layout export
+PANEL_PAGE_SIZE = int(os.getenv("COMIC_PANEL_PAGE_SIZE", "50"))
+
+_PANEL_NUMBER = re.compile(r'^(?:panel_)?(\d+)$', re.IGNORECASE)
+
+
+def panel_number(panel_id) -> Optional[int]:
+    """Panel number of 'panel_12', '12' or 12; None for anything else."""
+    match = _PANEL_NUMBER.match(str(panel_id).strip())
+    return int(match.group(1)) if match else None
+
+
+def highest_panel_number(panel_ids: Iterable) -> int:
+    """Highest panel number among panel IDs (registry keys, panel_map keys); 0 if there are none."""
+    return max((n for n in map(panel_number, panel_ids) if n is not None), default=0)
+
+
+def resolve_panel_count(expected: Optional[int] = None, panel_ids: Iterable = ()) -> int:
+    """
+    Number of panels of the current comic.
+
+    Args:
+        expected: Explicit count from the caller; wins when set
+        panel_ids: Additional panel IDs the caller knows about (e.g. a panel_map's keys)
+
+    Returns:
+        The largest of the story's panel count, the highest panel number in the registry and
+        in panel_ids, or DEFAULT_PANEL_COUNT if none of them knows about any panel
+    """
+    if expected:
+        return expected
+    from src.utils.registry_utils import registry_snapshot
+    from src.utils.story_metadata_manager import get_current_story_metadata
+
+    story = get_current_story_metadata()
+    count = max(
+        story.get_panel_count() if story is not None else 0,
+        highest_panel_number(registry_snapshot()),
+        highest_panel_number(panel_ids),
+    )
+    return count or DEFAULT_PANEL_COUNT
+
+
+def page_count(total: int, page_size: Optional[int] = None) -> int:
+    return max(1, math.ceil(total / (page_size or PANEL_PAGE_SIZE)))
+
+
+def page_range(total: int, page: Optional[int] = None, page_size: Optional[int] = None) -> range:
+    """
+    Panel numbers on a 1-based page; all panels when page is None.
+
+    Raises:
+        ValueError: if the page does not exist
+    """
+    if page is None:
+        return range(1, total + 1)
+    page_size = page_size or PANEL_PAGE_SIZE
+    pages = page_count(total, page_size)
+    if page < 1 or page > pages:
+        raise ValueError(f"Page {page} does not exist; {total} panels make {pages} page(s) of {page_size}")
+    start = (page - 1) * page_size + 1
+    return range(start, min(start + page_size, total + 1))
+
+
+def describe_page(numbers: range, total: int, page: Optional[int], page_size: Optional[int] = None) -> str:
+    """'Page 2/10 (panels 51-100 of 500)', or '' when not paging."""
+    if page is None:
+        return ""
+    if not numbers:
+        return f"Page {page}/{page_count(total, page_size)} (no panels)"
+    return f"Page {page}/{page_count(total, page_size)} (panels {numbers[0]}-{numbers[-1]} of {total})"
@@ -10,9 +10,10 @@ def verify_image(path: Path) -> bool:
     except Exception:
         return False
 
-def inspect_panel_registry(image_paths: List[str], dialogue: List[str]) -> Tuple[bool, List[str]]:
+def inspect_panel_registry(image_paths: List[str], dialogue: List[str], first_panel: int = 1) -> Tuple[bool, List[str]]:
     """
     Verifies that all image paths exist and are readable.
+    first_panel is the number of the first panel in the lists (for a page of a longer comic).
     Returns a tuple: (is_valid, report_lines)
     """
     report = []
@@ -22,9 +23,8 @@ def inspect_panel_registry(image_paths: List[str], dialogue: List[str]) -> Tuple
         report.append(f"❌ Mismatch: {len(image_paths)} images vs {len(dialogue)} dialogue lines")
         valid = False
 
-    for i, path_str in enumerate(image_paths):
+    for panel_num, path_str in enumerate(image_paths, start=first_panel):
         path = Path(path_str)
-        panel_num = i + 1
 
         if not path.exists():
             report.append(f"❌ Panel {panel_num}: Missing file → {path}")
@@ -25,4 +25,17 @@ def get_backend_output_path(subfolder: str = "") -> Path:
     return get_repo_root() / "backend" / "output" / subfolder
 
 def get_registry_path() -> Path:
-    return get_backend_output_path("panel_registry.yaml")   #"registry/panel_registry.yaml" if later move to subfolder registry
\ No newline at end of file
+    """Returns the panel registry of the active run, or the shared registry outside of a run."""
+    from src.utils.run_context import get_current_run_context
+    context = get_current_run_context()
+    if context is not None:
+        return context.registry_path
+    return get_backend_output_path("panel_registry.yaml")   #"registry/panel_registry.yaml" if later move to subfolder registry
+
+def get_character_references_path() -> Path:
+    """Returns the character references folder of the active run, or the shared folder."""
+    from src.utils.run_context import get_current_run_context
+    context = get_current_run_context()
+    if context is not None:
+        return context.character_references_dir
+    return get_backend_output_path("character_references")
\ No newline at end of file
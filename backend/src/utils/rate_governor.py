@@ -0,0 +1,261 @@
+"""
+Image Backend Rate Governor
+Keeps calls to an image backend within its quota: a token bucket caps requests per second
+(with a burst allowance) and a semaphore caps requests in flight. Callers over the limit
+wait in line instead of hitting the provider and failing, so throughput stays at the quota
+instead of collapsing into timeouts and retry storms.
+
+The bucket and the semaphore live in a small SQLite database (output/rate_governor/state.db,
+or RATE_GOVERNOR_STATE_PATH), updated in short IMMEDIATE transactions, so every thread and
+every worker process on the machine shares the same quota. Slots held by a process that
+died, or for longer than RATE_GOVERNOR_LEASE_SECONDS, are reclaimed.
+
+Limits are set per backend. IMAGE_SERVER_RATE_LIMIT (requests/second), IMAGE_SERVER_RATE_BURST
+and IMAGE_SERVER_MAX_CONCURRENCY are the defaults; IMAGE_SERVER_LIMITS overrides them per
+backend URL as JSON, e.g. {"http://127.0.0.1:8000/generate-image/": {"rate": 2, "burst": 4,
+"max_concurrency": 3}}. A limit of 0 means unlimited; with both unlimited the governor is a no-op.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+import requests
+from src.utils.cancellation import CancellationToken
+from src.utils.metrics import IMAGE_SERVER_QUEUE_WAIT
+from src.utils.path_utils import get_backend_output_path
+
+
+DEFAULT_RATE = float(os.getenv("IMAGE_SERVER_RATE_LIMIT", "0"))
+DEFAULT_BURST = float(os.getenv("IMAGE_SERVER_RATE_BURST", "0"))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("IMAGE_SERVER_MAX_CONCURRENCY", "0"))
+# Longest a call waits for its turn before giving up with GovernorTimeoutError
+QUEUE_TIMEOUT_SECONDS = float(os.getenv("IMAGE_SERVER_QUEUE_TIMEOUT_SECONDS", "300"))
+# A slot held longer than this is assumed to belong to a stuck or killed caller
+LEASE_SECONDS = float(os.getenv("RATE_GOVERNOR_LEASE_SECONDS", "600"))
+# How often callers waiting for a concurrency slot look again
+SLOT_POLL_INTERVAL = 0.05
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS buckets (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS slots (
+    holder TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    acquired REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS slots_name ON slots (name);
+"""
+
+
+def _dbg(msg: str):
+    print(f"[RateGovernor] {msg}")
+
+
+class GovernorTimeoutError(requests.Timeout):
+    """Raised when a call waited longer than the queue timeout for its turn."""
+
+
+@dataclass
+class RateLimits:
+    rate: float = 0.0  # requests per second, 0 = unlimited
+    burst: float = 0.0  # bucket size; defaults to max(1, rate)
+    max_concurrency: int = 0  # requests in flight, 0 = unlimited
+
+
+def limits_for(backend: str) -> RateLimits:
+    """Configured limits of a backend: IMAGE_SERVER_LIMITS entry, else the IMAGE_SERVER_* defaults."""
+    limits = RateLimits(DEFAULT_RATE, DEFAULT_BURST, DEFAULT_MAX_CONCURRENCY)
+    raw = os.getenv("IMAGE_SERVER_LIMITS")
+    if raw:
+        try:
+            overrides = json.loads(raw).get(backend) or {}
+        except (ValueError, AttributeError) as e:
+            _dbg(f"Ignoring invalid IMAGE_SERVER_LIMITS: {e}")
+            overrides = {}
+        limits.rate = float(overrides.get("rate", limits.rate))
+        limits.burst = float(overrides.get("burst", limits.burst))
+        limits.max_concurrency = int(overrides.get("max_concurrency", limits.max_concurrency))
+    return limits
+
+
+def _default_state_path() -> Path:
+    configured = os.getenv("RATE_GOVERNOR_STATE_PATH")
+    return Path(configured) if configured else get_backend_output_path("rate_governor") / "state.db"
+
+
+def _pid_alive(pid: int) -> bool:
+    if os.name != "posix":
+        # os.kill(pid, 0) would terminate the process on Windows; rely on the lease there
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class RateGovernor:
+    """Token bucket plus concurrency semaphore for one backend, shared across processes."""
+
+    def __init__(self, name: str, rate: float = 0.0, burst: float = 0.0, max_concurrency: int = 0,
+                 state_path: Optional[Path] = None, queue_timeout: Optional[float] = None,
+                 lease_seconds: Optional[float] = None):
+        self.name = name
+        self.rate = max(0.0, rate)
+        self.burst = max(1.0, burst or self.rate)
+        self.max_concurrency = max(0, max_concurrency)
+        self.queue_timeout = QUEUE_TIMEOUT_SECONDS if queue_timeout is None else queue_timeout
+        self.lease_seconds = LEASE_SECONDS if lease_seconds is None else lease_seconds
+        self.state_path = Path(state_path or _default_state_path())
+        if self.enabled:
+            self.state_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.state_path), timeout=30)
+            try:
+                conn.executescript(_SCHEMA)
+            finally:
+                conn.close()
+            _dbg(f"{name}: {self.rate or 'unlimited'} req/s (burst {self.burst:g}), "
+                 f"max {self.max_concurrency or 'unlimited'} in flight")
+
+    @classmethod
+    def for_backend(cls, backend: str, state_path: Optional[Path] = None) -> "RateGovernor":
+        limits = limits_for(backend)
+        return cls(backend, limits.rate, limits.burst, limits.max_concurrency, state_path=state_path)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rate > 0 or self.max_concurrency > 0
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # IMMEDIATE takes the write lock up front, so read-modify-write is atomic across processes
+        conn = sqlite3.connect(str(self.state_path), timeout=30, isolation_level=None)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    @contextmanager
+    def slot(self, cancel_token: Optional[CancellationToken] = None) -> Iterator[float]:
+        """
+        Wait for a token and a free slot, hold the slot for the block and release it afterwards.
+
+        Yields:
+            Seconds spent waiting in line
+
+        Raises:
+            GovernorTimeoutError: after queue_timeout seconds without a turn
+            RunCancelledError: if cancel_token is cancelled while waiting
+        """
+        if not self.enabled:
+            yield 0.0
+            return
+        holder = f"{os.getpid()}:{threading.get_ident()}:{uuid.uuid4().hex[:8]}"
+        waited = self._acquire(holder, cancel_token)
+        try:
+            yield waited
+        finally:
+            self._release(holder)
+
+    def _acquire(self, holder: str, cancel_token: Optional[CancellationToken]) -> float:
+        start = time.monotonic()
+        deadline = start + self.queue_timeout
+        while True:
+            acquired, retry_after = self._try_acquire(holder)
+            if acquired:
+                waited = time.monotonic() - start
+                IMAGE_SERVER_QUEUE_WAIT.observe(waited, backend=self.name)
+                return waited
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                IMAGE_SERVER_QUEUE_WAIT.observe(time.monotonic() - start, backend=self.name)
+                raise GovernorTimeoutError(f"No turn for {self.name} within {self.queue_timeout:.0f}s")
+            delay = min(retry_after, remaining)
+            if cancel_token is not None:
+                if cancel_token.wait(delay):
+                    cancel_token.raise_if_cancelled()
+            else:
+                time.sleep(delay)
+
+    def _try_acquire(self, holder: str) -> Tuple[bool, float]:
+        """One attempt to take a token and a slot; returns (acquired, seconds to wait before retrying)."""
+        now = time.time()
+        with self._transaction() as conn:
+            if self.max_concurrency:
+                in_flight = self._in_flight(conn, now)
+                if in_flight >= self.max_concurrency:
+                    return False, SLOT_POLL_INTERVAL
+            if self.rate:
+                row = conn.execute("SELECT tokens, updated FROM buckets WHERE name = ?", (self.name,)).fetchone()
+                tokens, updated = row if row else (self.burst, now)
+                tokens = min(self.burst, tokens + max(0.0, now - updated) * self.rate)
+                if tokens < 1.0:
+                    conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                                 (self.name, tokens, now))
+                    return False, (1.0 - tokens) / self.rate
+                conn.execute("INSERT OR REPLACE INTO buckets (name, tokens, updated) VALUES (?, ?, ?)",
+                             (self.name, tokens - 1.0, now))
+            if self.max_concurrency:
+                conn.execute("INSERT INTO slots (holder, name, pid, acquired) VALUES (?, ?, ?, ?)",
+                             (holder, self.name, os.getpid(), now))
+        return True, 0.0
+
+    def _in_flight(self, conn: sqlite3.Connection, now: float) -> int:
+        rows = conn.execute("SELECT holder, pid, acquired FROM slots WHERE name = ?", (self.name,)).fetchall()
+        if len(rows) < self.max_concurrency:
+            return len(rows)
+        # Full: reclaim slots of dead processes and expired leases before making the caller wait
+        stale = [holder for holder, pid, acquired in rows
+                 if now - acquired > self.lease_seconds or (pid != os.getpid() and not _pid_alive(pid))]
+        if stale:
+            _dbg(f"{self.name}: reclaiming {len(stale)} stale slot(s)")
+            conn.executemany("DELETE FROM slots WHERE holder = ?", [(holder,) for holder in stale])
+        return len(rows) - len(stale)
+
+    def _release(self, holder: str):
+        if not self.max_concurrency:
+            return
+        try:
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM slots WHERE holder = ?", (holder,))
+        except sqlite3.Error as e:
+            # The lease reclaims it eventually
+            _dbg(f"Could not release slot {holder}: {e}")
+
+    def in_flight(self) -> int:
+        if not self.max_concurrency:
+            return 0
+        with self._transaction() as conn:
+            return conn.execute("SELECT COUNT(*) FROM slots WHERE name = ?", (self.name,)).fetchone()[0]
+
+
+_governors: Dict[str, RateGovernor] = {}
+_governors_lock = threading.Lock()
+
+
+def get_rate_governor(backend: str) -> RateGovernor:
+    """Return this process's governor for a backend URL."""
+    with _governors_lock:
+        governor = _governors.get(backend)
+        if governor is None:
+            governor = _governors[backend] = RateGovernor.for_backend(backend)
+        return governor
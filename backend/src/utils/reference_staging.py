@@ -0,0 +1,230 @@
+"""
+Reference Image Staging
+Makes reference images (character references, panels to refine) visible to the Gemini image
+server without copying them for every request. Each image is staged once under
+GEMINI_IMAGE_ROOT/staged_references, named by its content hash, as a hardlink to the source
+(or a symlink, or a copy when neither is possible). Every panel and every run that uses the
+same reference gets the same staged file.
+
+stage() takes a reference on the staged file and release() drops it. Staged files nobody
+references are kept for reuse and removed REFERENCE_STAGING_TTL_SECONDS after they were last
+staged or released. That time is recorded in a hidden ".<name>.used" file next to each staged
+file, because a hardlink's own mtime is its source's, and the record has to be visible to
+every process sharing the folder.
+"""
+
+import os
+import shutil
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+from src.utils.image_cache import file_content_hash
+from src.utils.metrics import BYTES_COPIED
+
+
+# Unreferenced staged files are removed after this long
+STAGING_TTL_SECONDS = float(os.getenv("REFERENCE_STAGING_TTL_SECONDS", "3600"))
+PRUNE_INTERVAL_SECONDS = 60.0
+# Source files whose content hash is remembered
+MAX_REMEMBERED_HASHES = 4096
+
+
+def _dbg(msg: str):
+    print(f"[ReferenceStaging] {msg}")
+
+
+def _default_staging_dir() -> Path:
+    gemini_root = Path(os.getenv("GEMINI_IMAGE_ROOT", "C:/Users/ninic/projects/Datacamp_projects/gemini-image-tutorial"))
+    return gemini_root / "staged_references"
+
+
+class ReferenceStager:
+    """Content-addressed, reference-counted staging folder shared by all tools and runs."""
+
+    def __init__(self, staging_dir: Optional[Path] = None, ttl_seconds: Optional[float] = None):
+        self.staging_dir = Path(staging_dir or _default_staging_dir())
+        self.ttl_seconds = STAGING_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self._lock = threading.Lock()
+        # staged filename -> number of requests using it
+        self._refs: Dict[str, int] = {}
+        # staged filename -> (size, mtime_ns) when staged, to spot sources edited in place
+        self._signatures: Dict[str, Tuple[int, int]] = {}
+        # (source path, size, mtime_ns) -> content hash, so unchanged sources are not re-read; LRU
+        self._hashes: "OrderedDict[Tuple[str, int, int], str]" = OrderedDict()
+        self._last_prune = 0.0
+
+    def stage(self, source_path: str) -> Optional[str]:
+        """
+        Stage one image and take a reference on it.
+
+        Returns:
+            Absolute path of the staged file, or None if the source does not exist
+        """
+        source = Path(source_path).resolve()
+        try:
+            stat = source.stat()
+        except OSError:
+            _dbg(f"Source image not found: {source}")
+            return None
+        digest = self._content_hash(source, stat)
+        name = f"{digest[:32]}{source.suffix.lower() or '.png'}"
+        staged = self.staging_dir / name
+
+        with self._lock:
+            if not self._is_current(staged, name):
+                self._link(source, staged)
+                self._signatures[name] = self._signature(staged)
+            self._refs[name] = self._refs.get(name, 0) + 1
+            self._mark_used(name)
+        return os.path.abspath(staged)
+
+    def stage_all(self, source_paths: Iterable[str]) -> List[str]:
+        """Stage several images; sources that do not exist are skipped."""
+        staged = (self.stage(path) for path in source_paths)
+        return [path for path in staged if path]
+
+    def release(self, staged_paths: Iterable[str]):
+        """Drop one reference per path; unreferenced files become eligible for pruning."""
+        now = time.time()
+        with self._lock:
+            for staged_path in staged_paths:
+                name = Path(staged_path).name
+                count = self._refs.get(name, 0) - 1
+                if count > 0:
+                    self._refs[name] = count
+                else:
+                    self._refs.pop(name, None)
+                    self._mark_used(name)
+            if now - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+                self._last_prune = now
+                self._prune_locked(now)
+
+    def refcount(self, staged_path: str) -> int:
+        with self._lock:
+            return self._refs.get(Path(staged_path).name, 0)
+
+    def prune(self) -> int:
+        """Remove unreferenced staged files older than the TTL; returns how many were removed."""
+        with self._lock:
+            return self._prune_locked(time.time())
+
+    def _prune_locked(self, now: float) -> int:
+        if not self.staging_dir.exists():
+            return 0
+        removed = 0
+        for path in self.staging_dir.iterdir():
+            name = path.name
+            if name in self._refs or name.startswith("."):
+                continue
+            last_used = self._last_used(name)
+            if last_used is None:
+                # Staged before use was recorded: start its TTL now
+                self._mark_used(name)
+                continue
+            if now - last_used < self.ttl_seconds:
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except OSError as e:
+                _dbg(f"Could not remove {path}: {e}")
+            self._used_marker(name).unlink(missing_ok=True)
+            self._signatures.pop(name, None)
+        if removed:
+            _dbg(f"Pruned {removed} unreferenced staged images")
+        return removed
+
+    def _content_hash(self, source: Path, stat: os.stat_result) -> str:
+        hash_key = (str(source), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._hashes.get(hash_key)
+            if digest is not None:
+                self._hashes.move_to_end(hash_key)
+                return digest
+        # Read outside the lock; two threads hashing the same new source agree on the result
+        digest = file_content_hash(str(source))
+        with self._lock:
+            self._hashes[hash_key] = digest
+            while len(self._hashes) > MAX_REMEMBERED_HASHES:
+                self._hashes.popitem(last=False)
+        return digest
+
+    def _used_marker(self, name: str) -> Path:
+        return self.staging_dir / f".{name}.used"
+
+    def _mark_used(self, name: str):
+        try:
+            self._used_marker(name).touch()
+        except OSError as e:
+            _dbg(f"Could not record use of {name}: {e}")
+
+    def _last_used(self, name: str) -> Optional[float]:
+        try:
+            return self._used_marker(name).stat().st_mtime
+        except OSError:
+            return None
+
+    @staticmethod
+    def _signature(path: Path) -> Tuple[int, int]:
+        stat = path.stat()
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def _is_current(self, staged: Path, name: str) -> bool:
+        """Whether an existing staged file can be reused (it exists and still has the hashed content)."""
+        try:
+            signature = self._signature(staged)
+        except OSError:
+            # Missing, or a symlink whose source is gone
+            staged.unlink(missing_ok=True)
+            return False
+        known = self._signatures.get(name)
+        if known is None:
+            # Staged by an earlier process: trust it only if the content still matches its name
+            if not file_content_hash(str(staged)).startswith(Path(name).stem):
+                staged.unlink(missing_ok=True)
+                return False
+            self._signatures[name] = signature
+            return True
+        if known != signature:
+            # A hardlinked source was rewritten in place
+            staged.unlink(missing_ok=True)
+            return False
+        return True
+
+    def _link(self, source: Path, staged: Path):
+        staged.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = staged.with_name(f".{staged.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp_path.unlink(missing_ok=True)
+        try:
+            os.link(source, tmp_path)
+            method = "hardlink"
+        except OSError:
+            try:
+                os.symlink(source, tmp_path)
+                method = "symlink"
+            except OSError:
+                shutil.copy2(source, tmp_path)
+                BYTES_COPIED.inc(tmp_path.stat().st_size, destination="gemini_temp")
+                method = "copy"
+        os.replace(tmp_path, staged)
+        _dbg(f"Staged {source.name} as {staged.name} ({method})")
+
+
+_stager: Optional[ReferenceStager] = None
+_stager_lock = threading.Lock()
+
+
+def get_reference_stager() -> ReferenceStager:
+    """Return the process-wide ReferenceStager."""
+    global _stager
+    with _stager_lock:
+        if _stager is None:
+            _stager = ReferenceStager()
+        return _stager
+
+
+def release_staged_references(staged_paths: Iterable[str]):
+    """Release references taken by prepare_temp_images_for_gemini()."""
+    get_reference_stager().release([path for path in staged_paths if path])
@@ -0,0 +1,126 @@
+"""
+Registry Change Notifications
+Every committed registry transaction is announced as a list of RegistryChange objects, so
+consumers learn about new or verified panels without re-reading the registry.
+
+Two channels carry the changes:
+- in-process: subscribe(callback) registers a callback that the writing thread calls right
+  after the transaction commits (the API uses it to push panel_ready SSE events);
+- cross-process: the same changes are appended to a change log (a JSON-lines file next to
+  the YAML registry, or the `events` table of the SQLite registry) inside the write lock, so
+  another process can follow them in commit order with registry_utils.read_changes().
+"""
+
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+
+@dataclass(frozen=True)
+class RegistryChange:
+    """One panel entry before and after a registry write."""
+    run_id: str
+    panel_id: str
+    before: Dict[str, Any] = field(default_factory=dict)
+    after: Dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def filename(self):
+        return self.after.get('filename')
+
+    @property
+    def became_verified(self) -> bool:
+        """True if this write made the panel verified, or replaced the image of a verified panel."""
+        if not self.after.get('verified') or not self.filename:
+            return False
+        return not self.before.get('verified') or self.before.get('filename') != self.filename
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'run_id': self.run_id, 'panel_id': self.panel_id, 'before': self.before, 'after': self.after}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RegistryChange":
+        return cls(run_id=data.get('run_id', ''), panel_id=data['panel_id'],
+                   before=data.get('before') or {}, after=data.get('after') or {})
+
+
+RegistryCallback = Callable[[RegistryChange], None]
+
+_subscribers: List[RegistryCallback] = []
+_subscribers_lock = threading.Lock()
+
+
+def subscribe(callback: RegistryCallback) -> Callable[[], None]:
+    """
+    Call callback(change) for every registry change made by this process. Callbacks run on the
+    writing thread after the write has committed, so they should be quick and must not raise.
+
+    Returns:
+        A function that removes the subscription
+    """
+    with _subscribers_lock:
+        _subscribers.append(callback)
+
+    def unsubscribe():
+        with _subscribers_lock:
+            if callback in _subscribers:
+                _subscribers.remove(callback)
+    return unsubscribe
+
+
+def publish(changes: List[RegistryChange]):
+    """Hand committed changes to the in-process subscribers."""
+    with _subscribers_lock:
+        subscribers = list(_subscribers)
+    for change in changes:
+        for callback in subscribers:
+            try:
+                callback(change)
+            except Exception as e:
+                print(f"[RegistryEvents] Subscriber failed on {change.panel_id}: {e}")
+
+
+def change_log_path(registry_path: Path) -> Path:
+    """Change log of a YAML registry: panel_registry.yaml -> panel_registry.events.jsonl"""
+    return registry_path.with_name(f"{registry_path.stem}.events.jsonl")
+
+
+def append_changes(log_path: Path, changes: List[RegistryChange], durable: bool = True):
+    """
+    Append changes to a change log; called under the registry lock, so lines stay in commit order.
+    With durable, the log is fsynced like the registry write it belongs to.
+    """
+    if not changes:
+        return
+    log_path.parent.mkdir(parents=True, exist_ok=True)
+    lines = "".join(json.dumps(change.to_dict()) + "\n" for change in changes)
+    with open(log_path, 'a') as f:
+        f.write(lines)
+        if durable:
+            f.flush()
+            os.fsync(f.fileno())
+
+
+def read_change_log(log_path: Path, offset: int = 0) -> Tuple[List[RegistryChange], int]:
+    """
+    Changes appended to a change log after byte offset `offset`.
+
+    Returns:
+        (changes, offset to pass next time); a partially written last line is left for the next call
+    """
+    try:
+        with open(log_path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            if offset > f.tell():
+                # The log was cleared since the last read; start over
+                offset = 0
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    complete = data[:data.rfind(b"\n") + 1]
+    changes = [RegistryChange.from_dict(json.loads(line)) for line in complete.splitlines() if line.strip()]
+    return changes, offset + len(complete)
@@ -1,44 +1,328 @@
+import itertools
+import os
+import tempfile
+import threading
+import weakref
 import yaml
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
-from src.utils.path_utils import get_backend_output_path
+from types import MappingProxyType
+from typing import Any, Dict, Iterator, List, Mapping, Tuple
+from src.utils.path_utils import get_backend_output_path, get_registry_path
+from src.utils.registry_events import RegistryChange, append_changes, change_log_path, publish, read_change_log
+from src.utils.sqlite_registry import get_sqlite_registry
 
+try:
+    import fcntl
+except ImportError:  # Windows: only threads of this process are serialized
+    fcntl = None
+
+# Shared registry used outside of a run; runs get their own via get_registry_path()
 REGISTRY_PATH = get_backend_output_path("panel_registry.yaml")
+# "yaml" (one panel_registry.yaml per run) or "sqlite" (one row per panel, see sqlite_registry).
+# YAML stays the default: the maintenance scripts read the YAML file directly, and nothing is migrated.
+REGISTRY_BACKEND = os.getenv("PANEL_REGISTRY_BACKEND", "yaml").lower()
+# Registry path -> thread lock serializing its read-modify-write cycles; each run has its own file,
+# so runs never wait for each other. Dropped once no thread holds or waits for it.
+_path_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = weakref.WeakValueDictionary()
+# Registry paths locked by the current thread, to catch re-entry instead of deadlocking
+_held = threading.local()
+# Guards _path_locks and the in-memory snapshot cache below
+_registry_lock = threading.RLock()
+# Registry location -> stamp of the last write from this process; YAML mtimes alone can miss
+# two writes in one tick. Stamps come from one counter, so a forgotten location never reuses one.
+_local_versions: "OrderedDict[tuple, int]" = OrderedDict()
+_write_stamps = itertools.count(1)
+# Registry location -> (version it was read at, immutable snapshot), least recently used first
+_snapshots: "OrderedDict[tuple, Tuple[tuple, Mapping]]" = OrderedDict()
+# Finished runs are forgotten by forget_run_snapshots(); the cap covers runs that never finish cleanly
+MAX_CACHED_SNAPSHOTS = 64
+# update_registry_entry() argument -> registry field
+_FIELD_NAMES = {'filename': 'filename', 'backend': 'backend_synced', 'frontend': 'frontend_synced', 'verified': 'verified'}
+
+def _use_sqlite() -> bool:
+    return REGISTRY_BACKEND == "sqlite"
+
+def _current_run_id() -> str:
+    """Registry key of the active run; "" for the shared registry."""
+    from src.utils.run_context import get_current_run_context
+    context = get_current_run_context()
+    return context.run_id if context is not None else ""
+
+def _normalize_panel_id(panel_id) -> str:
+    # Standardize panel_id format to always start with "panel_"
+    panel_id = str(panel_id)
+    return panel_id if panel_id.startswith("panel_") else f"panel_{panel_id}"
+
+def _path_lock(registry_path: Path) -> threading.Lock:
+    with _registry_lock:
+        lock = _path_locks.get(str(registry_path))
+        if lock is None:
+            lock = _path_locks[str(registry_path)] = threading.Lock()
+        return lock
+
+@contextmanager
+def _locked(registry_path: Path) -> Iterator[None]:
+    """Hold the registry's lock: a thread lock per registry file, plus an fcntl lock shared with other processes."""
+    held = _held.__dict__.setdefault('paths', set())
+    if str(registry_path) in held:
+        # A second fcntl lock on a new fd would wait for this thread's first one forever
+        raise RuntimeError(f"Registry {registry_path} is already locked by this thread; "
+                           "make nested writes through the open registry_transaction()")
+    with _path_lock(registry_path):
+        held.add(str(registry_path))
+        try:
+            with _file_locked(registry_path):
+                yield
+        finally:
+            held.discard(str(registry_path))
+
+@contextmanager
+def _file_locked(registry_path: Path) -> Iterator[None]:
+    """fcntl lock on the registry's .lock file; a no-op where fcntl is missing."""
+    if fcntl is None:
+        yield
+        return
+    registry_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(registry_path.with_name(registry_path.name + ".lock"), 'a') as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _write_yaml(registry_path: Path, registry: dict, durable: bool = True):
+    """
+    Write to a temp file and rename it over the registry, so readers never see a partial file.
+    With durable, the file is fsynced first so the write also survives a crash of the machine.
+    """
+    registry_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=registry_path.parent, prefix=f".{registry_path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            yaml.dump(registry, f)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(tmp_path, registry_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
 
 def _ensure_registry_exists():
-    if not REGISTRY_PATH.exists():
-        REGISTRY_PATH.parent.mkdir(parents=True, exist_ok=True)
-        with open(REGISTRY_PATH, 'w') as f:
-            yaml.dump({}, f)
+    if _use_sqlite():
+        get_sqlite_registry().ensure_exists()
+        return
+    registry_path = get_registry_path()
+    if not registry_path.exists():
+        with _locked(registry_path):
+            # Another process may have created it while we waited for the lock
+            if not registry_path.exists():
+                _write_yaml(registry_path, {})
 
-def read_registry() -> dict:
-    _ensure_registry_exists()
-    with open(REGISTRY_PATH, 'r') as f:
-        return yaml.safe_load(f) or {}
+def _read_yaml(registry_path: Path) -> dict:
+    try:
+        with open(registry_path, 'r') as f:
+            return yaml.safe_load(f) or {}
+    except FileNotFoundError:
+        return {}
 
-def update_registry_entry(panel_id: str, filename: str = None, backend: bool = None, frontend: bool = None, verified: bool = None):
-    """Update a single panel entry in the registry."""
-    print("[Tool] Registry update triggered")
+def _load_registry() -> dict:
+    if _use_sqlite():
+        return get_sqlite_registry().read(_current_run_id())
     _ensure_registry_exists()
-    registry = read_registry()
+    return _read_yaml(get_registry_path())
 
-    # Standardize panel_id format to always start with "panel_"
-    if not panel_id.startswith("panel_"):
-        panel_id = f"panel_{panel_id}"
+def _registry_key() -> tuple:
+    """Cache key of the current registry: its YAML file, or its run in the SQLite database."""
+    if _use_sqlite():
+        return ('sqlite', str(get_sqlite_registry().db_path), _current_run_id())
+    return ('yaml', str(get_registry_path()))
 
-    if panel_id not in registry:
-        registry[panel_id] = {}
+def _registry_version() -> Tuple[tuple, tuple]:
+    """(cache key, version) of the current registry; the version changes with every write to it, from any process."""
+    key = _registry_key()
+    with _registry_lock:
+        local_version = _local_versions.get(key, 0)
+    if key[0] == 'sqlite':
+        return key, (local_version, get_sqlite_registry().version(key[2]))
+    try:
+        stat = Path(key[1]).stat()
+        file_version = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        file_version = None
+    return key, (local_version, file_version)
 
-    if filename is not None:
-        registry[panel_id]['filename'] = filename
-    if backend is not None:
-        registry[panel_id]['backend_synced'] = backend
-    if frontend is not None:
-        registry[panel_id]['frontend_synced'] = frontend
-    if verified is not None:
-        registry[panel_id]['verified'] = verified
+def registry_snapshot() -> Mapping[str, Mapping]:
+    """
+    Read-only view of the registry, cached until the registry changes.
+
+    Repeated calls only check the version (a stat() of the YAML file, or one indexed row for
+    SQLite) and return the same snapshot without parsing anything. Use read_registry() for a
+    copy you can modify.
+    """
+    key, version = _registry_version()
+    with _registry_lock:
+        cached = _snapshots.get(key)
+        if cached is not None and cached[0] == version:
+            _snapshots.move_to_end(key)
+            return cached[1]
+    registry = _load_registry()
+    snapshot = MappingProxyType({
+        panel_id: MappingProxyType(dict(entry or {})) for panel_id, entry in registry.items()
+    })
+    with _registry_lock:
+        # Stored with the version seen *before* loading, so a write in between is picked up next time
+        _snapshots[key] = (version, snapshot)
+        _snapshots.move_to_end(key)
+        while len(_snapshots) > MAX_CACHED_SNAPSHOTS:
+            _snapshots.popitem(last=False)
+    return snapshot
+
+def forget_run_snapshots(run_context) -> int:
+    """Drop the cached snapshots (and write stamps) of a finished run; returns how many snapshots were dropped."""
+    registry_path = str(run_context.registry_path)
 
-    with open(REGISTRY_PATH, 'w') as f:
-        yaml.dump(registry, f)
+    def belongs_to_run(key: tuple) -> bool:
+        return (key[0] == 'yaml' and key[1] == registry_path) or (key[0] == 'sqlite' and key[2] == run_context.run_id)
+
+    with _registry_lock:
+        stale = [key for key in _snapshots if belongs_to_run(key)]
+        for key in stale:
+            del _snapshots[key]
+        for key in [key for key in _local_versions if belongs_to_run(key)]:
+            del _local_versions[key]
+    return len(stale)
+
+def read_registry() -> dict:
+    """The registry as a plain dict ({panel_id: {field: value}}) that the caller may modify."""
+    return {panel_id: dict(entry) for panel_id, entry in registry_snapshot().items()}
+
+def _changed():
+    """Invalidate the cached snapshot of the current registry, and only that one."""
+    key = _registry_key()
+    with _registry_lock:
+        _local_versions[key] = next(_write_stamps)
+        _local_versions.move_to_end(key)
+        while len(_local_versions) > MAX_CACHED_SNAPSHOTS:
+            _local_versions.popitem(last=False)
+
+
+class RegistryTransaction:
+    """Pending registry updates; see registry_transaction()."""
+
+    def __init__(self, registry: dict):
+        # Current entries, read under the lock
+        self.registry = registry
+        self.updates: Dict[str, Dict[str, Any]] = {}
+
+    def get(self, panel_id: str) -> dict:
+        """Entry of a panel including the updates made in this transaction so far."""
+        panel_id = _normalize_panel_id(panel_id)
+        return {**(self.registry.get(panel_id) or {}), **self.updates.get(panel_id, {})}
+
+    def update(self, panel_id: str, filename: str = None, backend: bool = None, frontend: bool = None, verified: bool = None):
+        """Same arguments as update_registry_entry(); written when the transaction ends."""
+        fields = {
+            _FIELD_NAMES[name]: value
+            for name, value in (('filename', filename), ('backend', backend), ('frontend', frontend), ('verified', verified))
+            if value is not None
+        }
+        self.updates.setdefault(_normalize_panel_id(panel_id), {}).update(fields)
+
+    def changes(self, run_id: str) -> List[RegistryChange]:
+        """Entries whose values the pending updates actually change, before and after."""
+        changes = []
+        for panel_id in self.updates:
+            before = dict(self.registry.get(panel_id) or {})
+            after = self.get(panel_id)
+            if after != before:
+                changes.append(RegistryChange(run_id=run_id, panel_id=panel_id, before=before, after=after))
+        return changes
+
+
+@contextmanager
+def registry_transaction(durable: bool = True) -> Iterator[RegistryTransaction]:
+    """
+    Read-check-update the registry atomically and write all changes at once.
+
+    Other writers of the same registry (threads, and processes via an fcntl lock or SQLite's
+    write lock) wait until the block ends, so keep it short. Nothing is written if the block
+    raises. Committed changes are logged and handed to registry_events subscribers.
+
+    The transaction is not re-entrant: inside the block, update through the transaction, not
+    with update_registry_entry() or another registry_transaction() (a nested YAML write raises
+    RuntimeError). durable=False skips the fsync of the YAML file and change log; the write is
+    still atomic for readers, only a machine crash can lose it.
+    """
+    if _use_sqlite():
+        sqlite_registry = get_sqlite_registry()
+        run_id = _current_run_id()
+        with sqlite_registry.transaction(run_id) as conn:
+            transaction = RegistryTransaction(sqlite_registry.read(run_id, conn))
+            yield transaction
+            changes = transaction.changes(run_id)
+            for panel_id, fields in transaction.updates.items():
+                sqlite_registry.upsert(conn, run_id, panel_id, fields)
+            if changes:
+                sqlite_registry.record_changes(conn, run_id, [change.to_dict() for change in changes])
+    else:
+        registry_path = get_registry_path()
+        with _locked(registry_path):
+            # Not _load_registry(): creating a missing file would take the lock a second time (see _locked)
+            registry = _read_yaml(registry_path)
+            transaction = RegistryTransaction(registry)
+            yield transaction
+            changes = transaction.changes(_current_run_id())
+            if transaction.updates:
+                for panel_id, fields in transaction.updates.items():
+                    registry.setdefault(panel_id, {}).update(fields)
+                _write_yaml(registry_path, registry, durable=durable)
+            if changes:
+                append_changes(change_log_path(registry_path), changes, durable=durable)
+    if transaction.updates:
+        _changed()
+    if changes:
+        publish(changes)
+
+def read_changes(cursor: int = 0) -> Tuple[List[RegistryChange], int]:
+    """
+    Registry changes committed by any process since `cursor`, in commit order.
+
+    Start with cursor 0 and pass the returned cursor to the next call to follow the registry
+    of the current run (see registry_events). In-process consumers can subscribe() instead.
+    """
+    if _use_sqlite():
+        records, cursor = get_sqlite_registry().changes_after(_current_run_id(), cursor)
+        return [RegistryChange.from_dict(record) for record in records], cursor
+    return read_change_log(change_log_path(get_registry_path()), cursor)
+
+def update_many(updates: Dict[str, Dict[str, Any]]):
+    """
+    Update several panels in one write.
+
+    Args:
+        updates: {panel_id: {"filename": ..., "backend": ..., "frontend": ..., "verified": ...}},
+            the same keyword arguments as update_registry_entry(); None values are skipped
+    """
+    with registry_transaction() as transaction:
+        for panel_id, fields in updates.items():
+            transaction.update(panel_id, **fields)
+    print(f"[Registry] Updated {len(updates)} panel(s) in one write")
+
+def update_registry_entry(panel_id: str, filename: str = None, backend: bool = None, frontend: bool = None, verified: bool = None):
+    """Update a single panel entry in the registry."""
+    print("[Tool] Registry update triggered")
+    panel_id = _normalize_panel_id(panel_id)
+
+    # A single field change is cheap to redo; only batch writes are fsynced
+    with registry_transaction(durable=False) as transaction:
+        transaction.update(panel_id, filename=filename, backend=backend, frontend=frontend, verified=verified)
+    registry_path = get_sqlite_registry().db_path if _use_sqlite() else get_registry_path()
 
     status_parts = []
     if filename is not None:
@@ -51,11 +335,16 @@ def update_registry_entry(panel_id: str, filename: str = None, backend: bool = N
         status_parts.append(f"verified={verified}")
 
     print(f"[Registry] Updated {panel_id}: {', '.join(status_parts)}")
-    print(f"[Registry] Using path: {REGISTRY_PATH}")
+    print(f"[Registry] Using path: {registry_path}")
 
 def clear_registry():
     """Clear the registry by writing an empty dictionary to the file."""
-    _ensure_registry_exists()
-    with open(REGISTRY_PATH, 'w') as f:
-        yaml.dump({}, f)
+    if _use_sqlite():
+        get_sqlite_registry().clear(_current_run_id())
+    else:
+        registry_path = get_registry_path()
+        with _locked(registry_path):
+            _write_yaml(registry_path, {})
+            change_log_path(registry_path).unlink(missing_ok=True)
+    _changed()
     print("[Registry] Cleared registry")
@@ -0,0 +1,176 @@
+"""
+Resilience Helpers for Remote Calls
+Building blocks the image client uses so transient image-server failures are retried in
+code instead of by the agent (which costs a full LLM round-trip per retry):
+
+- RetryPolicy: exponential backoff with full jitter
+- CircuitBreaker: fails fast while the server is down, probes again after a cool-down
+- LatencyTracker: rolling latency window, used to pick the hedging threshold (p95)
+- CallOutcome: structured record of what happened to a call (attempts, hedging, error)
+"""
+
+import random
+import threading
+import time
+from collections import deque
+from dataclasses import asdict, dataclass, field
+from typing import Any, Deque, Dict, List, Optional
+import requests
+
+
+def _dbg(msg: str):
+    print(f"[Resilience] {msg}")
+
+
+class CircuitOpenError(requests.ConnectionError):
+    """Raised instead of calling a server whose circuit breaker is open."""
+
+    def __init__(self, name: str, retry_in: float):
+        super().__init__(f"Circuit for {name} is open; not calling it for another {retry_in:.1f}s")
+        self.retry_in = retry_in
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter: attempt n waits uniform(0, min(max_delay, base_delay * 2**n))."""
+    max_attempts: int = 3
+    base_delay: float = 1.0
+    max_delay: float = 10.0
+
+    def backoff(self, attempt: int) -> float:
+        """Delay before retry number attempt (0-based)."""
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+
+class CircuitBreaker:
+    """
+    Closed -> open after failure_threshold consecutive failures; open -> half-open after
+    reset_timeout, when a single probe call is let through; the probe's result closes or
+    re-opens the circuit.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self):
+        """Raise CircuitOpenError unless a call may go through now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return
+            waited = time.monotonic() - self._opened_at
+            if self._state == self.OPEN and waited >= self.reset_timeout:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                _dbg(f"{self.name}: half-open, sending a probe request")
+                return
+            raise CircuitOpenError(self.name, max(0.0, self.reset_timeout - waited))
+
+    def record_success(self):
+        with self._lock:
+            if self._state != self.CLOSED:
+                _dbg(f"{self.name}: circuit closed")
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    _dbg(f"{self.name}: circuit opened after {self._failures} failures")
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+                self._probe_in_flight = False
+
+
+class LatencyTracker:
+    """Latencies of the most recent successful calls."""
+
+    def __init__(self, window: int = 200):
+        self._samples: Deque[float] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._samples)
+
+    def percentile(self, fraction: float) -> Optional[float]:
+        with self._lock:
+            samples = sorted(self._samples)
+        if not samples:
+            return None
+        index = min(len(samples) - 1, max(0, int(round(fraction * len(samples))) - 1))
+        return samples[index]
+
+
+@dataclass
+class CallOutcome:
+    """What happened to one logical call, across retries and hedges."""
+    status: str = "pending"  # success, http_error, timeout, connection_error, circuit_open
+    attempts: int = 0
+    hedged: bool = False
+    http_status: Optional[int] = None
+    elapsed: float = 0.0
+    error: Optional[str] = None
+    endpoint: Optional[str] = None  # server that produced the final response
+    retry_delays: List[float] = field(default_factory=list)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "success"
+
+    def to_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data['elapsed'] = round(self.elapsed, 3)
+        data['retry_delays'] = [round(delay, 3) for delay in self.retry_delays]
+        return data
+
+
+def classify_exception(error: BaseException) -> str:
+    """CallOutcome status for an exception raised by requests."""
+    if isinstance(error, CircuitOpenError):
+        return "circuit_open"
+    if isinstance(error, requests.Timeout):
+        return "timeout"
+    if isinstance(error, requests.ConnectionError):
+        return "connection_error"
+    if isinstance(error, requests.HTTPError):
+        return "http_error"
+    return "error"
+
+
+def is_retryable_status(status_code: int) -> bool:
+    """5xx responses are worth retrying; 4xx mean the request itself is wrong."""
+    return 500 <= status_code < 600
+
+
+def describe_failure(error: BaseException) -> str:
+    """Suffix for tool error messages, e.g. ' [timeout after 3 attempts]', from error.outcome."""
+    outcome = getattr(error, 'outcome', None)
+    if outcome is None:
+        return ""
+    return f" [{outcome.status} after {outcome.attempts} attempt{'s' if outcome.attempts != 1 else ''}]"
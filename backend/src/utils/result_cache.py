@@ -0,0 +1,197 @@
+"""
+Result Cache for Completed Comics
+Maps a normalized topic plus a hash of the crew configuration (agents.yaml / tasks.yaml)
+to the markdown and exported files of a finished run, so repeating a topic does not rerun
+the whole agent pipeline. Comics of a non-default length are cached under their own key.
+Entries expire after a TTL and the least recently used entries
+are evicted once the cache is full.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from src.utils.path_utils import get_backend_output_path
+from src.utils.panel_paging import DEFAULT_PANEL_COUNT
+
+
+CACHE_ENABLED = os.getenv("COMIC_RESULT_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+DEFAULT_TTL_SECONDS = float(os.getenv("COMIC_RESULT_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+DEFAULT_MAX_ENTRIES = int(os.getenv("COMIC_RESULT_CACHE_MAX_ENTRIES", "100"))
+
+# Crew configuration whose contents are part of the cache key
+CONFIG_DIR = Path(__file__).resolve().parent.parent / "visual_comic_crew" / "config"
+DEFAULT_CONFIG_FILES = [CONFIG_DIR / "agents.yaml", CONFIG_DIR / "tasks.yaml"]
+
+
+def _dbg(msg: str):
+    print(f"[ResultCache] {msg}")
+
+
+def normalize_topic(topic: str) -> str:
+    """Case- and whitespace-insensitive form of a topic (not truncated, unlike filenames)."""
+    text = (topic or "").strip().lower()
+    text = re.sub(r"[^a-z0-9]+", " ", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def config_hash(config_files: Optional[List[Path]] = None) -> str:
+    """Hash of the crew configuration files; editing agents or tasks invalidates cached comics."""
+    digest = hashlib.sha256()
+    for path in config_files or DEFAULT_CONFIG_FILES:
+        digest.update(str(Path(path).name).encode("utf-8"))
+        try:
+            digest.update(Path(path).read_bytes())
+        except FileNotFoundError:
+            digest.update(b"<missing>")
+    return digest.hexdigest()[:16]
+
+
+class ComicResultCache:
+    """
+    JSON-indexed cache of completed comics.
+
+    The markdown of each entry is kept in the cache folder; the entry also records the
+    exported markdown and PDF paths written by ComicExporter.
+    """
+
+    def __init__(self, cache_dir: Optional[Path] = None, ttl_seconds: Optional[float] = None,
+                 max_entries: Optional[int] = None, config_files: Optional[List[Path]] = None):
+        self.cache_dir = Path(cache_dir or get_backend_output_path("result_cache"))
+        self.ttl_seconds = DEFAULT_TTL_SECONDS if ttl_seconds is None else ttl_seconds
+        self.max_entries = max(1, max_entries or DEFAULT_MAX_ENTRIES)
+        self.config_files = config_files
+        self.index_path = self.cache_dir / "index.json"
+        self._lock = threading.Lock()
+
+    def make_key(self, topic: str, panel_count: Optional[int] = None) -> str:
+        """Cache key of a topic (and panel count) under the current crew configuration."""
+        raw = f"{normalize_topic(topic)}|{config_hash(self.config_files)}"
+        if panel_count and panel_count != DEFAULT_PANEL_COUNT:
+            raw += f"|panels={panel_count}"
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
+
+    def get(self, topic: str, panel_count: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Look up a completed comic for a topic.
+
+        Returns:
+            Dict with markdown, file_path and pdf_path, or None on a miss
+        """
+        key = self.make_key(topic, panel_count)
+        with self._lock:
+            index = self._load_index()
+            entry = index.get(key)
+            if entry is None:
+                return None
+            markdown_file = self.cache_dir / f"{key}.md"
+            if self._is_expired(entry) or not markdown_file.exists():
+                _dbg(f"Dropping stale entry for '{entry.get('topic')}'")
+                self._remove(index, key)
+                self._save_index(index)
+                return None
+            entry['last_access'] = time.time()
+            entry['hits'] = entry.get('hits', 0) + 1
+            self._save_index(index)
+        _dbg(f"Hit for '{topic}' (key {key})")
+        result = dict(entry)
+        result['markdown'] = markdown_file.read_text(encoding="utf-8")
+        return result
+
+    def put(self, topic: str, markdown: str, file_path: Optional[str] = None, pdf_path: Optional[str] = None,
+            panel_count: Optional[int] = None) -> str:
+        """Store a completed comic; returns its cache key."""
+        key = self.make_key(topic, panel_count)
+        now = time.time()
+        with self._lock:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+            (self.cache_dir / f"{key}.md").write_text(markdown, encoding="utf-8")
+            index = self._load_index()
+            index[key] = {
+                'key': key,
+                'topic': topic,
+                'normalized_topic': normalize_topic(topic),
+                'config_hash': config_hash(self.config_files),
+                'file_path': str(file_path) if file_path else None,
+                'pdf_path': str(pdf_path) if pdf_path else None,
+                'created_at': now,
+                'last_access': now,
+                'hits': 0,
+            }
+            self._evict(index)
+            self._save_index(index)
+        _dbg(f"Stored '{topic}' (key {key})")
+        return key
+
+    def invalidate(self, topic: str, panel_count: Optional[int] = None) -> bool:
+        """Remove the entry for a topic, if any."""
+        key = self.make_key(topic, panel_count)
+        with self._lock:
+            index = self._load_index()
+            if key not in index:
+                return False
+            self._remove(index, key)
+            self._save_index(index)
+            return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load_index())
+
+    def _is_expired(self, entry: Dict[str, Any]) -> bool:
+        return self.ttl_seconds > 0 and time.time() - entry.get('created_at', 0) > self.ttl_seconds
+
+    def _evict(self, index: Dict[str, Dict[str, Any]]):
+        for key in [k for k, entry in index.items() if self._is_expired(entry)]:
+            self._remove(index, key)
+        # Least recently used first
+        overflow = len(index) - self.max_entries
+        if overflow > 0:
+            for key in sorted(index, key=lambda k: index[k].get('last_access', 0))[:overflow]:
+                _dbg(f"Evicting '{index[key].get('topic')}'")
+                self._remove(index, key)
+
+    def _remove(self, index: Dict[str, Dict[str, Any]], key: str):
+        index.pop(key, None)
+        (self.cache_dir / f"{key}.md").unlink(missing_ok=True)
+
+    def _load_index(self) -> Dict[str, Dict[str, Any]]:
+        if not self.index_path.exists():
+            return {}
+        try:
+            with self.index_path.open("r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, json.JSONDecodeError) as e:
+            _dbg(f"Unreadable index, starting empty: {e}")
+            return {}
+
+    def _save_index(self, index: Dict[str, Dict[str, Any]]):
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # A unique temp file per writer, so two processes saving at once cannot clobber each other's
+        with tempfile.NamedTemporaryFile("w", encoding="utf-8", dir=self.cache_dir, prefix=".index.",
+                                         suffix=".tmp", delete=False) as f:
+            json.dump(index, f, indent=2)
+        try:
+            os.replace(f.name, self.index_path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+
+
+_result_cache: Optional[ComicResultCache] = None
+_result_cache_lock = threading.Lock()
+
+
+def get_result_cache() -> ComicResultCache:
+    """Return the process-wide ComicResultCache."""
+    global _result_cache
+    with _result_cache_lock:
+        if _result_cache is None:
+            _result_cache = ComicResultCache()
+        return _result_cache
@@ -0,0 +1,102 @@
+"""
+Run Context for Comic Generation
+Gives every comic run its own workspace (panel registry, story metadata file, caches,
+temp folders and panel filename namespace) so concurrent runs do not clobber each other.
+
+The active context is held in a ContextVar. Code that runs outside of any run context
+(CLI scripts, tests) keeps using the shared backend/output locations.
+"""
+
+import contextvars
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator, Optional
+from src.utils.path_utils import get_backend_output_path
+from src.utils.cancellation import CancellationToken
+
+
+_current_run_context: contextvars.ContextVar = contextvars.ContextVar("current_run_context", default=None)
+
+
+@dataclass(frozen=True)
+class RunContext:
+    """Per-run locations, naming rules and cancellation token for a single comic generation run."""
+    run_id: str
+    cancel_token: CancellationToken = field(default_factory=CancellationToken, compare=False, repr=False)
+
+    @classmethod
+    def create(cls, run_id: Optional[str] = None) -> "RunContext":
+        """Create a context (and its workspace) for a new run."""
+        context = cls(run_id=run_id or uuid.uuid4().hex[:12])
+        context.ensure_workspace()
+        return context
+
+    @property
+    def workspace(self) -> Path:
+        """Root folder holding all per-run state."""
+        return get_backend_output_path(f"runs/{self.run_id}")
+
+    @property
+    def registry_path(self) -> Path:
+        return self.workspace / "panel_registry.yaml"
+
+    @property
+    def metadata_file(self) -> Path:
+        return self.workspace / f"story_metadata_{self.run_id}.yaml"
+
+    @property
+    def character_references_dir(self) -> Path:
+        return self.workspace / "character_references"
+
+    @property
+    def panel_prefix(self) -> str:
+        """Prefix applied to panel image filenames written by this run."""
+        return f"run_{self.run_id}_"
+
+    def namespaced_filename(self, filename: str) -> str:
+        """Prefix a panel filename with the run namespace (idempotent)."""
+        if filename.startswith(self.panel_prefix):
+            return filename
+        return f"{self.panel_prefix}{filename}"
+
+    def temp_folder(self, folder_name: str) -> str:
+        """Name of a Gemini temp folder scoped to this run."""
+        return f"{folder_name}/{self.run_id}"
+
+    def ensure_workspace(self):
+        self.workspace.mkdir(parents=True, exist_ok=True)
+        self.character_references_dir.mkdir(parents=True, exist_ok=True)
+
+
+def get_current_run_context() -> Optional[RunContext]:
+    """Return the RunContext of the current run, or None outside of a run."""
+    return _current_run_context.get()
+
+
+def set_current_run_context(context: Optional[RunContext]) -> contextvars.Token:
+    """Bind a RunContext to the current execution context. Returns a token for reset."""
+    return _current_run_context.set(context)
+
+
+@contextmanager
+def run_context_scope(context: RunContext) -> Iterator[RunContext]:
+    """Bind a RunContext for the duration of a with-block."""
+    token = _current_run_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_run_context.reset(token)
+
+
+def namespaced_panel_filename(filename: str) -> str:
+    """Apply the current run's panel namespace to a filename, if a run is active."""
+    context = get_current_run_context()
+    return context.namespaced_filename(filename) if context else filename
+
+
+def scoped_temp_folder(folder_name: str) -> str:
+    """Return the current run's variant of a Gemini temp folder name, if a run is active."""
+    context = get_current_run_context()
+    return context.temp_folder(folder_name) if context else folder_name
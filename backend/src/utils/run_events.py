@@ -0,0 +1,262 @@
+"""
+Run Events for Comic Generation
+Typed, numbered progress events kept in a per-run ring buffer so SSE clients can
+reconnect with Last-Event-ID and replay what they missed instead of starting over.
+"""
+
+import asyncio
+import json
+import os
+import threading
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+
+
+# Events kept per run; older events are dropped from the front of the ring
+DEFAULT_BUFFER_SIZE = int(os.getenv("COMIC_EVENT_BUFFER_SIZE", "1000"))
+# Finished runs whose events stay available for replay
+MAX_RETAINED_RUNS = int(os.getenv("COMIC_EVENT_RETAINED_RUNS", "100"))
+
+# Event types that end a run, mapped to the run's outcome
+_TERMINAL_OUTCOMES = {'complete': 'completed', 'error': 'failed', 'cancelled': 'cancelled'}
+
+# Status values that map to their own event type; everything else is a progress 'status' event
+_TYPED_STATUSES = {'queued', 'info', 'error', 'complete', 'cancelled', 'export_started', 'export_ready', 'export_failed'}
+
+
+@dataclass
+class RunEvent:
+    """A single progress event of a run."""
+    run_id: str
+    seq: int
+    type: str
+    data: Dict[str, Any]
+    timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
+
+    @property
+    def event_id(self) -> str:
+        """SSE event ID, carrying the run ID so a reconnect can find the run again."""
+        return f"{self.run_id}:{self.seq}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        payload = {'type': self.type, 'run_id': self.run_id, 'seq': self.seq}
+        payload.update(self.data)
+        return payload
+
+    def to_sse(self) -> str:
+        """Format the event as an SSE message (unnamed, so EventSource.onmessage receives it)."""
+        return f"id: {self.event_id}\ndata: {json.dumps(self.to_dict())}\n\n"
+
+
+def parse_last_event_id(value: Optional[str]) -> Tuple[Optional[str], int]:
+    """
+    Split a Last-Event-ID value of the form '<run_id>:<seq>'.
+
+    Returns:
+        (run_id, seq); run_id is None if the value cannot be parsed
+    """
+    if not value or ':' not in value:
+        return None, 0
+    run_id, _, seq = value.strip().rpartition(':')
+    try:
+        return run_id or None, int(seq)
+    except ValueError:
+        return None, 0
+
+
+class RunEventBuffer:
+    """
+    Thread-safe ring buffer of RunEvents for one run.
+
+    Producers (crew worker threads) call publish(); consumers (SSE handlers on the event
+    loop) iterate stream(), which replays buffered events and then waits for new ones.
+    """
+
+    def __init__(self, run_id: str, maxlen: Optional[int] = None):
+        self.run_id = run_id
+        self._events: deque = deque(maxlen=maxlen or DEFAULT_BUFFER_SIZE)
+        self._lock = threading.Lock()
+        self._next_seq = 1
+        self._closed = False
+        self._settled = False
+        self._settle_callbacks: List[Callable[["RunEventBuffer"], None]] = []
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = []
+        self._close_callbacks: List[Callable[["RunEventBuffer"], None]] = []
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    @property
+    def subscriber_count(self) -> int:
+        """Number of streams currently following this run."""
+        with self._lock:
+            return len(self._waiters)
+
+    @property
+    def last_seq(self) -> int:
+        with self._lock:
+            return self._next_seq - 1
+
+    @property
+    def outcome(self) -> Optional[str]:
+        """'completed', 'failed' or 'cancelled' once the run has ended, otherwise None."""
+        with self._lock:
+            for event in reversed(self._events):
+                if event.type in _TERMINAL_OUTCOMES:
+                    return _TERMINAL_OUTCOMES[event.type]
+            return 'failed' if self._closed else None
+
+    def publish(self, event_type: str, **data) -> RunEvent:
+        """Append an event and wake up any waiting subscribers."""
+        with self._lock:
+            event = RunEvent(run_id=self.run_id, seq=self._next_seq, type=event_type, data=data)
+            self._next_seq += 1
+            self._events.append(event)
+        self._notify()
+        return event
+
+    def publish_status(self, payload: Dict[str, Any]) -> RunEvent:
+        """Publish a legacy {'status': ..., ...} payload, deriving the event type from the status."""
+        status = payload.get('status')
+        event_type = status if status in _TYPED_STATUSES else 'status'
+        return self.publish(event_type, **payload)
+
+    def settle(self):
+        """
+        Mark the run's own work as done: its worker is free again, although the stream may stay
+        open for events that follow (e.g. the background PDF export). close() settles as well.
+        """
+        with self._lock:
+            if self._settled:
+                return
+            self._settled = True
+            callbacks, self._settle_callbacks = self._settle_callbacks, []
+        self._run_callbacks(callbacks, "Settle")
+
+    def add_settle_callback(self, callback: Callable[["RunEventBuffer"], None]):
+        """Call callback(buffer) once the run has settled (immediately if it already has)."""
+        with self._lock:
+            if not self._settled:
+                self._settle_callbacks.append(callback)
+                return
+        callback(self)
+
+    def close(self):
+        """Mark the run as finished; subscribers stop once they have drained the buffer."""
+        self.settle()
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            callbacks, self._close_callbacks = self._close_callbacks, []
+        self._notify()
+        self._run_callbacks(callbacks, "Close")
+
+    def add_close_callback(self, callback: Callable[["RunEventBuffer"], None]):
+        """Call callback(buffer) once the run is closed (immediately if it already is)."""
+        with self._lock:
+            if not self._closed:
+                self._close_callbacks.append(callback)
+                return
+        callback(self)
+
+    def events_after(self, seq: int) -> List[RunEvent]:
+        """Return buffered events with a sequence number greater than seq."""
+        with self._lock:
+            return [event for event in self._events if event.seq > seq]
+
+    def _run_callbacks(self, callbacks: List[Callable[["RunEventBuffer"], None]], kind: str):
+        for callback in callbacks:
+            try:
+                callback(self)
+            except Exception as e:
+                print(f"[RunEvents] {kind} callback of run {self.run_id} failed: {e}")
+
+    def _notify(self):
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(waiter.set)
+            except RuntimeError:
+                # Subscriber's loop is gone
+                pass
+
+    async def stream(self, after_seq: int = 0, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[RunEvent]]:
+        """
+        Yield events after after_seq until the buffer is closed and drained.
+
+        Args:
+            after_seq: Last sequence number the client has already seen
+            heartbeat: If set, yield None whenever no event arrived for this many seconds
+
+        Yields:
+            RunEvent objects, or None on heartbeat timeouts
+        """
+        waiter = asyncio.Event()
+        entry = (asyncio.get_running_loop(), waiter)
+        with self._lock:
+            self._waiters.append(entry)
+        try:
+            while True:
+                waiter.clear()
+                events = self.events_after(after_seq)
+                for event in events:
+                    after_seq = event.seq
+                    yield event
+                if events:
+                    continue
+                if self._closed:
+                    return
+                try:
+                    await asyncio.wait_for(waiter.wait(), timeout=heartbeat)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            with self._lock:
+                if entry in self._waiters:
+                    self._waiters.remove(entry)
+
+
+class RunEventHub:
+    """Registry of event buffers by run ID, keeping a bounded number of finished runs."""
+
+    def __init__(self, max_retained: Optional[int] = None):
+        self.max_retained = max_retained or MAX_RETAINED_RUNS
+        self._buffers: "OrderedDict[str, RunEventBuffer]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def create(self, run_id: str) -> RunEventBuffer:
+        buffer = RunEventBuffer(run_id)
+        with self._lock:
+            self._buffers[run_id] = buffer
+            self._evict()
+        return buffer
+
+    def get(self, run_id: str) -> Optional[RunEventBuffer]:
+        with self._lock:
+            return self._buffers.get(run_id)
+
+    def _evict(self):
+        # Only finished runs are evicted, oldest first
+        excess = len(self._buffers) - self.max_retained
+        if excess <= 0:
+            return
+        for run_id in [rid for rid, buf in self._buffers.items() if buf.closed][:excess]:
+            del self._buffers[run_id]
+
+
+_event_hub: Optional[RunEventHub] = None
+_event_hub_lock = threading.Lock()
+
+
+def get_event_hub() -> RunEventHub:
+    """Return the process-wide RunEventHub."""
+    global _event_hub
+    with _event_hub_lock:
+        if _event_hub is None:
+            _event_hub = RunEventHub()
+        return _event_hub
@@ -0,0 +1,133 @@
+"""
+Request Coalescing (singleflight)
+Concurrent calls with the same key share one execution: the first caller runs the function,
+callers that arrive while it is running wait for it and receive the same result (or the same
+exception). Once the call finishes the key is forgotten, so later calls run again (by then
+the image cache usually answers them).
+
+AsyncSingleFlight does the same for coroutines of one event loop.
+
+A waiting caller still honours its own run's cancellation. If the running call was aborted
+because the *other* run was cancelled, the waiters do not inherit that cancellation: one of
+them runs the call again.
+"""
+
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+from src.utils.cancellation import CancellationToken, RunCancelledError
+
+# How often a waiting caller checks its own cancellation token
+WAIT_CHECK_INTERVAL = 0.1
+
+
+def _dbg(msg: str):
+    print(f"[SingleFlight] {msg}")
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key."""
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._calls: Dict[str, _Call] = {}
+        self._lock = threading.Lock()
+
+    def do(self, key: str, fn: Callable[[], Any],
+           cancel_token: Optional[CancellationToken] = None) -> Tuple[Any, bool]:
+        """
+        Run fn() once for all concurrent callers with this key.
+
+        Returns:
+            (result, shared): shared is True when the result came from another caller's call
+
+        Raises:
+            Whatever fn() raised, in every caller that shared the call
+            RunCancelledError: if cancel_token is cancelled while waiting
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                leader = call is None
+                if leader:
+                    call = self._calls[key] = _Call()
+                else:
+                    call.waiters += 1
+
+            if leader:
+                try:
+                    call.result = fn()
+                    return call.result, False
+                except BaseException as e:
+                    call.error = e
+                    raise
+                finally:
+                    with self._lock:
+                        self._calls.pop(key, None)
+                    if call.waiters:
+                        _dbg(f"{self.name}: {call.waiters} duplicate call(s) shared one result")
+                    call.done.set()
+
+            while not call.done.wait(WAIT_CHECK_INTERVAL if cancel_token is not None else None):
+                cancel_token.raise_if_cancelled()
+            if isinstance(call.error, RunCancelledError):
+                # The caller that ran it was cancelled, not us: run it again
+                continue
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
+
+
+class AsyncSingleFlight:
+    """Coalesces concurrent coroutines of one event loop that share a key."""
+
+    def __init__(self, name: str = "singleflight"):
+        self.name = name
+        self._calls: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]],
+                 cancel_token: Optional[CancellationToken] = None) -> Tuple[Any, bool]:
+        """Async version of SingleFlight.do(); fn is called (and awaited) once for all concurrent callers."""
+        while True:
+            future = self._calls.get(key)
+            if future is None:
+                future = self._calls[key] = asyncio.get_running_loop().create_future()
+                try:
+                    result = await fn()
+                except asyncio.CancelledError:
+                    future.cancel()
+                    raise
+                except BaseException as e:
+                    future.set_exception(e)
+                    # Mark the exception as retrieved; callers without waiters would otherwise log it
+                    future.exception()
+                    raise
+                else:
+                    future.set_result(result)
+                    return result, False
+                finally:
+                    if self._calls.get(key) is future:
+                        del self._calls[key]
+
+            while not future.done():
+                await asyncio.wait({future}, timeout=WAIT_CHECK_INTERVAL if cancel_token is not None else None)
+                if cancel_token is not None:
+                    cancel_token.raise_if_cancelled()
+            if future.cancelled() or isinstance(future.exception(), RunCancelledError):
+                # The coroutine that ran it was cancelled, not us: run it again
+                continue
+            if future.exception() is not None:
+                raise future.exception()
+            return future.result(), True
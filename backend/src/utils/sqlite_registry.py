@@ -0,0 +1,188 @@
+"""
+SQLite Panel Registry
+Stores panel registry entries as rows of a `panels` table keyed by (run_id, panel_id), so an
+update is one row-level upsert instead of re-reading and rewriting the whole YAML file. The
+database runs in WAL mode: readers never block the writer, and concurrent writers from any
+thread or worker process queue on SQLite's lock instead of overwriting each other.
+
+Selected with PANEL_REGISTRY_BACKEND=sqlite (see registry_utils). All runs share one database
+(output/panel_registry.db, or PANEL_REGISTRY_DB_PATH); entries written outside of a run use
+run_id "".
+
+Every write also bumps the run's row in `versions` in the same transaction, so readers can
+tell whether a cached copy of a run's registry is still current with one indexed lookup.
+The `events` table is the cross-process change log of registry_events: each transaction
+appends its changes there before committing, and other processes read them by event id.
+"""
+
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+from src.utils.path_utils import get_backend_output_path
+
+# Registry fields and their columns; a NULL column means the field was never set
+FIELDS = ("filename", "backend_synced", "frontend_synced", "verified")
+_BOOL_FIELDS = ("backend_synced", "frontend_synced", "verified")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS panels (
+    run_id TEXT NOT NULL,
+    panel_id TEXT NOT NULL,
+    filename TEXT,
+    backend_synced INTEGER,
+    frontend_synced INTEGER,
+    verified INTEGER,
+    updated REAL NOT NULL,
+    PRIMARY KEY (run_id, panel_id)
+);
+CREATE TABLE IF NOT EXISTS versions (
+    run_id TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id TEXT NOT NULL,
+    change TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_by_run ON events (run_id, id);
+"""
+
+
+def default_db_path() -> Path:
+    configured = os.getenv("PANEL_REGISTRY_DB_PATH")
+    return Path(configured) if configured else get_backend_output_path("panel_registry.db")
+
+
+class SqliteRegistry:
+    """Panel registry rows in one SQLite database; each thread keeps its own connection."""
+
+    def __init__(self, db_path: Optional[Path] = None):
+        self.db_path = Path(db_path or default_db_path())
+        self._local = threading.local()
+        self._schema_ready = False
+        self._schema_lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.db_path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(str(self.db_path), timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            # WAL keeps committed data safe on a crash with NORMAL; only power loss can drop the last commits
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    conn.executescript(_SCHEMA)
+                    self._schema_ready = True
+        return conn
+
+    def ensure_exists(self):
+        self._connection()
+
+    @contextmanager
+    def transaction(self, run_id: str) -> Iterator[sqlite3.Connection]:
+        """
+        Write transaction on a run's rows; bumps the run's version with it. Other writers wait
+        until it ends, so a read-check-write inside it is atomic.
+        """
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+            conn.execute("INSERT INTO versions (run_id, version) VALUES (?, 1) "
+                         "ON CONFLICT (run_id) DO UPDATE SET version = version + 1", (run_id,))
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        conn.execute("COMMIT")
+
+    def version(self, run_id: str) -> int:
+        """Changes whenever any process writes to the run's rows."""
+        row = self._connection().execute("SELECT version FROM versions WHERE run_id = ?", (run_id,)).fetchone()
+        return row[0] if row else 0
+
+    def read(self, run_id: str, conn: Optional[sqlite3.Connection] = None) -> Dict[str, dict]:
+        """All entries of a run, shaped like the YAML registry: {panel_id: {field: value}}."""
+        rows = (conn or self._connection()).execute(
+            f"SELECT panel_id, {', '.join(FIELDS)} FROM panels WHERE run_id = ? ORDER BY panel_id",
+            (run_id,),
+        ).fetchall()
+        return {row[0]: _entry(row[1:]) for row in rows}
+
+    def update(self, run_id: str, panel_id: str, fields: Dict[str, object]):
+        """Upsert one panel row; only the given fields change."""
+        with self.transaction(run_id) as conn:
+            self.upsert(conn, run_id, panel_id, fields)
+
+    def update_many(self, run_id: str, updates: Dict[str, Dict[str, object]]):
+        """Upsert several panel rows ({panel_id: fields}) in one transaction."""
+        with self.transaction(run_id) as conn:
+            for panel_id, fields in updates.items():
+                self.upsert(conn, run_id, panel_id, fields)
+
+    @staticmethod
+    def upsert(conn: sqlite3.Connection, run_id: str, panel_id: str, fields: Dict[str, object]):
+        """Upsert one panel row inside a transaction(); only the given fields change."""
+        fields = {name: value for name, value in fields.items() if name in FIELDS}
+        columns = ", ".join(("run_id", "panel_id", *fields, "updated"))
+        placeholders = ", ".join("?" * (len(fields) + 3))
+        assignments = ", ".join(f"{name} = excluded.{name}" for name in (*fields, "updated"))
+        values = [int(value) if name in _BOOL_FIELDS else value for name, value in fields.items()]
+        conn.execute(
+            f"INSERT INTO panels ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT (run_id, panel_id) DO UPDATE SET {assignments}",
+            (run_id, panel_id, *values, time.time()),
+        )
+
+    @staticmethod
+    def record_changes(conn: sqlite3.Connection, run_id: str, changes: List[dict]):
+        """Append change records (JSON-serializable dicts) to the run's change log inside a transaction()."""
+        conn.executemany("INSERT INTO events (run_id, change) VALUES (?, ?)",
+                         [(run_id, json.dumps(change)) for change in changes])
+
+    def changes_after(self, run_id: str, after_id: int = 0) -> Tuple[List[dict], int]:
+        """Change records of a run logged after event id after_id, and the id to pass next time."""
+        rows = self._connection().execute(
+            "SELECT id, change FROM events WHERE run_id = ? AND id > ? ORDER BY id", (run_id, after_id),
+        ).fetchall()
+        return [json.loads(row[1]) for row in rows], (rows[-1][0] if rows else after_id)
+
+    def clear(self, run_id: str):
+        with self.transaction(run_id) as conn:
+            conn.execute("DELETE FROM panels WHERE run_id = ?", (run_id,))
+            conn.execute("DELETE FROM events WHERE run_id = ?", (run_id,))
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def _entry(values) -> dict:
+    entry = {}
+    for name, value in zip(FIELDS, values):
+        if value is not None:
+            entry[name] = bool(value) if name in _BOOL_FIELDS else value
+    return entry
+
+
+_registries: Dict[str, SqliteRegistry] = {}
+_registries_lock = threading.Lock()
+
+
+def get_sqlite_registry(db_path: Optional[Path] = None) -> SqliteRegistry:
+    """Return this process's SqliteRegistry for a database (the configured one by default)."""
+    path = str(Path(db_path or default_db_path()))
+    with _registries_lock:
+        registry = _registries.get(path)
+        if registry is None:
+            registry = _registries[path] = SqliteRegistry(Path(path))
+        return registry
@@ -7,9 +7,11 @@ import yaml
 import json
 import os
 from pathlib import Path
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 from datetime import datetime
 from src.utils.path_utils import get_backend_output_path
+from src.utils.panel_paging import page_count, page_range
+from src.utils.run_context import get_current_run_context
 
 
 class StoryMetadataManager:
@@ -24,18 +26,29 @@ class StoryMetadataManager:
         Initialize the StoryMetadataManager.
         
         Args:
-            story_id: Unique identifier for the story. If None, will use timestamp-based ID.
+            story_id: Unique identifier for the story. If None, will use the active run ID
+                or a timestamp-based ID outside of a run.
         """
+        run_context = get_current_run_context()
         if story_id is None:
-            story_id = f"story_{int(datetime.now().timestamp())}"
+            story_id = run_context.run_id if run_context else f"story_{int(datetime.now().timestamp())}"
         
         self.story_id = story_id
-        self.metadata_file = get_backend_output_path(f"story_metadata_{story_id}.yaml")
+        if run_context is not None and story_id == run_context.run_id:
+            # Keep the run's metadata inside its own workspace
+            self.metadata_file = run_context.metadata_file
+        else:
+            self.metadata_file = get_backend_output_path(f"story_metadata_{story_id}.yaml")
+        # Bumped by every write through this manager; mtimes alone can miss two writes in one tick
+        self._writes = 0
+        # (file version it was built at, {panel number: panel}); see get_panel_index()
+        self._panel_index: Optional[Tuple[tuple, Dict[int, Dict[str, Any]]]] = None
         self._ensure_metadata_file()
     
     def _ensure_metadata_file(self):
         """Create the metadata file with initial structure if it doesn't exist."""
         if not os.path.exists(self.metadata_file):
+            Path(self.metadata_file).parent.mkdir(parents=True, exist_ok=True)
             initial_data = {
                 'story_metadata': {
                     'story_id': self.story_id,
@@ -72,6 +85,7 @@ class StoryMetadataManager:
             
             with open(self.metadata_file, 'w', encoding='utf-8') as f:
                 yaml.dump(data, f, default_flow_style=False, allow_unicode=True, indent=2)
+            self._writes += 1
         except Exception as e:
             print(f"Error writing metadata file: {e}")
     
@@ -142,13 +156,36 @@ class StoryMetadataManager:
         data = self._read_metadata()
         return data.get('story_content', {}).get('panels', [])
     
+    def _file_version(self) -> tuple:
+        try:
+            stat = os.stat(self.metadata_file)
+            return (self._writes, stat.st_mtime_ns, stat.st_size)
+        except FileNotFoundError:
+            return (self._writes, None)
+
+    def get_panel_index(self) -> Dict[int, Dict[str, Any]]:
+        """
+        Panels keyed by panel number, rebuilt only when the metadata file changes.
+        Panels without a 'number' are keyed by their position (1-based).
+        """
+        version = self._file_version()
+        if self._panel_index is not None and self._panel_index[0] == version:
+            return self._panel_index[1]
+        index = {}
+        for position, panel in enumerate(self.get_panels(), start=1):
+            if isinstance(panel, dict):
+                number = panel.get('number')
+                index[int(number) if str(number).isdigit() else position] = panel
+        self._panel_index = (version, index)
+        return index
+
+    def get_panel_count(self) -> int:
+        """Number of panels in the story (its highest panel number); 0 before panels are set."""
+        return max(self.get_panel_index(), default=0)
+
     def get_panel_by_number(self, panel_number: int) -> Optional[Dict[str, Any]]:
         """Get a specific panel by its number."""
-        panels = self.get_panels()
-        for panel in panels:
-            if panel.get('number') == panel_number:
-                return panel
-        return None
+        return self.get_panel_index().get(int(panel_number))
     
     def set_image_filename(self, panel_number: int, filename: str, agent_name: str = 'visual_director'):
         """Set the image filename for a specific panel."""
@@ -240,45 +277,50 @@ class StoryMetadataManager:
             'metadata_file': self.metadata_file
         }
     
-    def export_for_layout(self) -> Dict[str, Any]:
+    def export_for_layout(self, page: Optional[int] = None, page_size: Optional[int] = None) -> Dict[str, Any]:
         """
         Export story data in format suitable for comic layout generation.
         
+        Args:
+            page: 1-based page of panels to export; all panels when None
+            page_size: Panels per page (default: PANEL_PAGE_SIZE)
+        
         Returns:
-            Dictionary with panels, dialogue, and image_paths for ComicLayoutTool
+            Dictionary with panels, dialogue, and image_paths for ComicLayoutTool, plus the
+            panel_numbers they belong to, the story's panel_count and the page_count
         """
-        panels = self.get_panels()
+        index = self.get_panel_index()
         image_filenames = self.get_all_image_filenames()
+        panel_count = max(index, default=0)
+        numbers = page_range(panel_count, page, page_size)
         
         # Extract panel descriptions and dialogue in order
         panel_descriptions = []
         dialogue_list = []
         image_paths = []
         
-        for i in range(1, 7):  # Expecting 6 panels
-            panel = self.get_panel_by_number(i)
-            if panel:
-                panel_descriptions.append(panel.get('description', ''))
-                dialogue_list.append(panel.get('dialogue', ''))
-                
-                # Get image path
-                image_filename = image_filenames.get(str(i))
-                if image_filename:
-                    # Construct full path to image
-                    image_path = get_backend_output_path(f"comic_panels/{image_filename}")
-                    image_paths.append(image_path)
-                else:
-                    image_paths.append(None)
+        for i in numbers:
+            panel = index.get(i) or {}
+            panel_descriptions.append(panel.get('description', ''))
+            dialogue_list.append(panel.get('dialogue', ''))
+            
+            # Get image path
+            image_filename = image_filenames.get(str(i))
+            if image_filename:
+                # Construct full path to image
+                image_paths.append(str(get_backend_output_path(f"comic_panels/{image_filename}")))
             else:
-                panel_descriptions.append('')
-                dialogue_list.append('')
                 image_paths.append(None)
         
         return {
             'panels': panel_descriptions,
             'dialogue': dialogue_list,
             'image_paths': image_paths,
-            'story_text': self.get_full_story_text()
+            'story_text': self.get_full_story_text(),
+            'panel_numbers': list(numbers),
+            'panel_count': panel_count,
+            'page': page,
+            'page_count': page_count(panel_count, page_size),
         }
     
     def cleanup(self):
@@ -326,6 +368,12 @@ class StoryMetadataManager:
 def get_current_story_metadata() -> Optional[StoryMetadataManager]:
     """
     Convenience function to get the current story metadata manager.
-    Tries to load the latest story or returns None if no active story found.
+    Inside a run this is always the run's own story; otherwise tries to load the
+    latest story or returns None if no active story found.
     """
+    run_context = get_current_run_context()
+    if run_context is not None:
+        if run_context.metadata_file.exists():
+            return StoryMetadataManager(run_context.run_id)
+        return None
     return StoryMetadataManager.load_latest()
\ No newline at end of file
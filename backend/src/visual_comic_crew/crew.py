@@ -1,5 +1,5 @@
 from crewai import Agent, Crew, Process, Task
-from crewai.project import CrewBase, agent, crew, task
+from crewai.project import CrewBase, agent, before_kickoff, crew, task
 from .tools.gemini_image_tool import GeminiImageTool
 from .tools.comic_layout_tool import ComicLayoutTool
 from .tools.character_consistency_tool import CharacterConsistencyTool
@@ -10,6 +10,7 @@ from .tools.panel_validation_tool import PanelValidationTool
 from .tools.panel_registry_inspector_tool import PanelRegistryInspectorTool
 from .tools.visual_director_output_formatter import VisualDirectorOutputFormatter
 from .tools.story_parser_tool import StoryParserTool
+from .tools.panel_batch_generation_tool import PanelBatchGenerationTool
 from .tools.story_metadata_tool import (
     StoryMetadataReaderTool, 
     StoryMetadataWriterTool, 
@@ -19,8 +20,15 @@ from .tools.story_metadata_tool import (
     story_metadata_layout
 )
 import traceback    
+import copy
 import os
+import threading
+import yaml
 from pathlib import Path
+from typing import Optional
+from src.utils.run_context import RunContext, run_context_scope
+from src.utils.metrics import install_crewai_listeners
+from src.utils.panel_paging import DEFAULT_PANEL_COUNT
 
 # Load environment variables from .env file
 try:
@@ -35,9 +43,13 @@ except ImportError:
 class VisualComicCrew():
     """Visual AI Comic Strip Creation Crew"""
     
-    def __init__(self):
+    def __init__(self, run_context: Optional[RunContext] = None):
         # Call the parent class constructor which handles the configuration loading
         super().__init__()
+        # Per-run workspace (registry, metadata, caches); None keeps the shared output folder
+        self.run_context = run_context
+        # Task and tool timings for /metrics come from CrewAI's event bus
+        install_crewai_listeners()
         
         # Add debug prints to check if configurations are loaded
         print("DEBUG: VisualComicCrew.__init__ called")
@@ -55,14 +67,23 @@ class VisualComicCrew():
         else:
             print(f"DEBUG: tasks_config keys: {list(self.tasks_config.keys())}")
 
-        # Clear the registry at the start of each run
+        # Clear the registry at the start of each run (only this run's registry when scoped)
         try:
             from src.utils.registry_utils import clear_registry
-            clear_registry()
+            if self.run_context is not None:
+                with run_context_scope(self.run_context):
+                    clear_registry()
+            else:
+                clear_registry()
             print("DEBUG: Registry cleared at start of run")
         except Exception as e:
             print(f"WARNING: Could not clear registry: {e}")
 
+    def _raise_if_cancelled(self, _output=None):
+        """Crew step/task callback that aborts the run once its cancellation token is set."""
+        if self.run_context is not None:
+            self.run_context.cancel_token.raise_if_cancelled()
+
     def _create_agent_with_fallback(self, cfg: dict, **kwargs):
         """
         Try to create an Agent with provided cfg. If creation fails due to
@@ -112,7 +133,7 @@ class VisualComicCrew():
         print("DEBUG: Creating visual_director agent")
         agent_cfg = self.agents_config.get('visual_director', {})
         agent = self._create_agent_with_fallback(agent_cfg, verbose=True, multimodal=True,
-                                               tools=[StoryParserTool(), GeminiImageTool(), CharacterConsistencyTool(), MultiCharacterSceneTool(), ImageRefinementTool(), VisualDirectorOutputFormatter(), story_metadata_reader, story_metadata_writer])
+                                               tools=[StoryParserTool(), PanelBatchGenerationTool(), GeminiImageTool(), CharacterConsistencyTool(), MultiCharacterSceneTool(), ImageRefinementTool(), VisualDirectorOutputFormatter(), story_metadata_reader, story_metadata_writer])
         print(f"DEBUG: visual_director agent created with LLM: {agent.llm}")
         return agent
 
@@ -232,6 +253,13 @@ class VisualComicCrew():
     
 
 
+    @before_kickoff
+    def _default_panel_count(self, inputs: dict) -> dict:
+        """The prompts ask for {panel_count} panels; callers that only pass a topic get the default."""
+        if inputs:
+            inputs.setdefault('panel_count', DEFAULT_PANEL_COUNT)
+        return inputs
+
     @crew
     def crew(self) -> Crew:
         print("DEBUG: Creating crew instance")
@@ -292,7 +320,10 @@ class VisualComicCrew():
                 agents=self.agents,
                 tasks=self.tasks,
                 process=Process.sequential,
-                verbose=True
+                verbose=True,
+                # Cooperative cancellation: abort between agent steps and between tasks
+                step_callback=self._raise_if_cancelled,
+                task_callback=self._raise_if_cancelled
             )
             print(f"DEBUG: Crew created with {len(crew_instance.agents)} agents and {len(crew_instance.tasks)} tasks")
             return crew_instance
@@ -309,6 +340,9 @@ class VisualComicCrew():
         This forwards to the underlying Crew instance's kickoff method.
         """
         print("DEBUG: VisualComicCrew.kickoff called - forwarding to crew().kickoff")
+        if self.run_context is not None:
+            with run_context_scope(self.run_context):
+                return self.crew().kickoff(inputs=inputs or {})
         return self.crew().kickoff(inputs=inputs or {})
 
     def run(self, inputs: dict = None):
@@ -317,6 +351,28 @@ class VisualComicCrew():
         print("DEBUG: VisualComicCrew.run called - forwarding to crew().kickoff")
         return self.kickoff(inputs=inputs or {})
 
+
+_config_cache = {}
+_config_cache_lock = threading.Lock()
+
+
+def _load_yaml_cached(config_path: Path):
+    """Parse a crew config file once per modification; every crew gets its own deep copy."""
+    path = Path(config_path)
+    mtime = path.stat().st_mtime_ns
+    with _config_cache_lock:
+        cached = _config_cache.get(str(path))
+        if cached is None or cached[0] != mtime:
+            with open(path, "r", encoding="utf-8") as f:
+                cached = (mtime, yaml.safe_load(f))
+            _config_cache[str(path)] = cached
+    # Copies, because CrewBase and the LLM fallback in api.py mutate the loaded config
+    return copy.deepcopy(cached[1])
+
+
+# CrewBase re-reads agents.yaml/tasks.yaml for every instance; reuse the parsed files instead
+VisualComicCrew.load_yaml = staticmethod(_load_yaml_cached)
+
 ###not to use 
 #####if __name__ == "__main__":
     # Create an instance of the crew
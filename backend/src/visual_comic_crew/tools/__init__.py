@@ -5,9 +5,10 @@ from .panel_validation_tool import PanelValidationTool
 from .panel_registry_inspector_tool import PanelRegistryInspectorTool
 from .image_refinement_tool import ImageRefinementTool
 from .story_parser_tool import StoryParserTool
+from .panel_batch_generation_tool import PanelBatchGenerationTool
 from .registry import _ensure_registry_exists, read_registry, get_panel_status, get_unverified_panels
 from .visual_director_output_formatter import VisualDirectorOutputFormatter    
 
 __all__ = ['ComicLayoutTool', 'CharacterConsistencyTool', 'GeminiImageTool', 'PanelValidationTool',
-           'PanelRegistryInspectorTool', 'ImageRefinementTool', 'StoryParserTool',
+           'PanelRegistryInspectorTool', 'ImageRefinementTool', 'StoryParserTool', 'PanelBatchGenerationTool',
            '_ensure_registry_exists', 'read_registry', 'get_panel_status', 'get_unverified_panels', 'VisualDirectorOutputFormatter']
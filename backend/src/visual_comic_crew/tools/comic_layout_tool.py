@@ -11,8 +11,11 @@ from src.utils.comic_exporter import ComicExporter
 from src.utils.registry_utils import update_registry_entry
 from datetime import datetime
 from src.utils.path_utils import get_backend_output_path
-from src.utils.registry_utils import _ensure_registry_exists, read_registry, update_registry_entry
+from src.utils.registry_utils import _ensure_registry_exists, registry_snapshot, update_registry_entry
 from src.utils.panel_registry_inspector_utils import verify_image, inspect_panel_registry
+from src.utils.run_context import get_current_run_context
+from src.utils.panel_paging import describe_page, page_range, resolve_panel_count
+from src.visual_comic_crew.tools.story_parser_tool import extract_panel_texts
 
 
 # Panel registry inspection should be done after image_paths and dialogue are available in _run
@@ -25,6 +28,8 @@ class ComicLayoutInput(BaseModel):
         description="Optional list of image file paths corresponding 1:1 with panels."
     )
     story_text: Optional[str] = Field(None, description="The full story text to extract panels and dialogue from if not provided directly")
+    page: Optional[int] = Field(None, description="1-based page of panels to lay out; all panels when omitted")
+    page_size: Optional[int] = Field(None, description="Panels per page (default: COMIC_PANEL_PAGE_SIZE)")
 
 class ComicLayoutTool(BaseTool):
     name: str = "ComicLayoutTool"
@@ -45,8 +50,11 @@ class ComicLayoutTool(BaseTool):
                 print(f"[ComicLayoutTool] Directory not found: {comic_panels_dir}")
                 return None
 
-            # Get all PNG files sorted by modification time (newest first)
-            pattern = os.path.join(comic_panels_dir, "*.png")
+            # Get all PNG files sorted by modification time (newest first),
+            # restricted to the active run's panel namespace
+            run_context = get_current_run_context()
+            name_prefix = run_context.panel_prefix if run_context else ""
+            pattern = os.path.join(comic_panels_dir, f"{glob.escape(name_prefix)}*.png")
             image_files = glob.glob(pattern)
 
             if not image_files:
@@ -84,7 +92,13 @@ class ComicLayoutTool(BaseTool):
             return None
 
 
-    def _run(self, panels: List[str] = None, dialogue: List[str] = None, image_paths: Optional[List[str]] = None, story_text: Optional[str] = None) -> str:
+    def _discover_page_images(self, total: int, numbers: range) -> Optional[List[str]]:
+        """Auto-discovered images of the panels on one page (images are matched to panels by recency)."""
+        images = self._discover_recent_images(total)
+        return [images[i - 1] for i in numbers] if images else images
+
+    def _run(self, panels: List[str] = None, dialogue: List[str] = None, image_paths: Optional[List[str]] = None, story_text: Optional[str] = None,
+             page: Optional[int] = None, page_size: Optional[int] = None) -> str:
         print("DEBUG: ComicLayoutTool._run called")
         print(f"DEBUG: panels: {panels}")
         print(f"DEBUG: dialogue: {dialogue}")
@@ -94,30 +108,10 @@ class ComicLayoutTool(BaseTool):
         # If panels and dialogue are not provided but story_text is, extract them
         if (not panels or not dialogue) and story_text:
             print("DEBUG: Extracting panels and dialogue from story_text")
-            # Use a simple extraction method for now
-            # In a real implementation, you might want to use a more sophisticated NLP approach
-            sentences = story_text.split('. ')
-            # Create 6 panels by distributing sentences
-            panels = []
-            dialogue = []
-            sentences_per_panel = max(1, len(sentences) // 6)
-            for i in range(6):
-                start = i * sentences_per_panel
-                end = min((i + 1) * sentences_per_panel, len(sentences))
-                panel_text = '. '.join(sentences[start:end])
-                if panel_text:
-                    panel_text += '.'
-                panels.append(panel_text)
-                dialogue.append("")  # Empty dialogue as default
-            
-            # Ensure we have exactly 6 panels and dialogues
-            while len(panels) < 6:
-                panels.append("")
-                dialogue.append("")
-            panels = panels[:6]
-            dialogue = dialogue[:6]
-            print(f"DEBUG: Extracted panels: {panels}")
-            print(f"DEBUG: Extracted dialogue: {dialogue}")
+            # One panel per "Panel N:" marker; unmarked stories are split into the comic's panel count
+            panels = extract_panel_texts(story_text, split_count=resolve_panel_count())
+            dialogue = [""] * len(panels)  # Empty dialogue as default
+            print(f"DEBUG: Extracted {len(panels)} panels")
         
         # Validate inputs
         if not panels or not dialogue:
@@ -133,14 +127,23 @@ class ComicLayoutTool(BaseTool):
                 f"Error: image_paths ({len(image_paths)}) length must match panels ({len(panels)})."
             )
         
+        # Only the requested page of panels is looked up, inspected and laid out
+        try:
+            numbers = page_range(len(panels), page, page_size)
+        except ValueError as e:
+            return f"Error: {e}"
+        page_label = describe_page(numbers, len(panels), page, page_size)
+        if image_paths:
+            image_paths = [image_paths[i - 1] for i in numbers]
+
         # PREFERRED METHOD: Get image paths from panel registry
         try:
-            registry = read_registry()
+            registry = registry_snapshot()
             if registry:
                 image_paths = []
                 # Get the backend output path for constructing full paths
                 backend_output_path = get_backend_output_path("comic_panels")
-                for i in range(1, len(panels) + 1):
+                for i in numbers:
                     panel_id = f"panel_{i}"
                     if panel_id in registry and 'filename' in registry[panel_id] and registry[panel_id].get('verified', False):
                         # Use the verified filename from registry and construct full path
@@ -156,16 +159,18 @@ class ComicLayoutTool(BaseTool):
                 # If no image paths provided and no registry data, try to discover recent images automatically
                 if not image_paths:
                     print("[ComicLayoutTool] No image paths provided, attempting auto-discovery...")
-                    image_paths = self._discover_recent_images(len(panels))
+                    image_paths = self._discover_page_images(len(panels), numbers)
         except Exception as e:
             print(f"[ComicLayoutTool] Error reading registry: {e}")
             # If registry reading fails, fall back to auto-discovery
             if not image_paths:
                 print("[ComicLayoutTool] Registry read failed, attempting auto-discovery...")
-                image_paths = self._discover_recent_images(len(panels))
+                image_paths = self._discover_page_images(len(panels), numbers)
+
+        page_dialogue = [dialogue[i - 1] for i in numbers]
 
         # Inspect panel registry before proceeding
-        is_valid, report = inspect_panel_registry(image_paths, dialogue)
+        is_valid, report = inspect_panel_registry(image_paths, page_dialogue, first_panel=numbers.start)
         for line in report:
             print(line)
         if not is_valid:
@@ -173,10 +178,12 @@ class ComicLayoutTool(BaseTool):
         
         
         layout_lines = ["# Comic Strip Layout", ""]
-        for i, dial in enumerate(dialogue, start=1):
-            if image_paths and i <= len(image_paths) and image_paths[i-1]:
+        if page_label:
+            layout_lines += [f"_{page_label}_", ""]
+        for offset, (i, dial) in enumerate(zip(numbers, page_dialogue)):
+            if image_paths and offset < len(image_paths) and image_paths[offset]:
                 # Extract just the filename for the frontend path
-                filename = os.path.basename(image_paths[i-1])
+                filename = os.path.basename(image_paths[offset])
                 img_path = f"/comic_panels/{filename}"
                 layout_lines.append(f"![Panel {i}]({img_path})")
 
@@ -1,6 +1,7 @@
 from crewai.tools import BaseTool
+import asyncio
 import requests
-from typing import Type, Optional, List
+from typing import Type, Optional, List, Union
 from pydantic import BaseModel, Field
 import os
 import time
@@ -9,11 +10,16 @@ import re
 from pathlib import Path
 from src.utils.path_utils import get_backend_output_path,get_frontend_public_path
 from src.utils.registry_utils import update_registry_entry
+from src.utils.run_context import namespaced_panel_filename
+from src.utils.cancellation import cancelled_tool_message
+from src.utils.image_client import get_image_client
+from src.utils.resilience import describe_failure
 from src.utils.image_utils import (
     resolve_image_path,
     retry_file_check,
     verify_image_readable,
     copy_image_to_output,
+    write_image_to_output,
     extract_panel_id,
     update_registry_for_image
 )
@@ -36,11 +42,33 @@ class GeminiImageTool(BaseTool):
         "Does not maintain character consistency - use Character tools for character-specific panels."
     )
     args_schema: Type[BaseModel] = GeminiImageToolSchema
-    # Allow override via environment variable GEMINI_IMAGE_SERVER_URL
-    server_url: str = os.getenv("GEMINI_IMAGE_SERVER_URL", "http://127.0.0.1:8000/generate-image/")
 
     def _run(self, prompt: str, base_image_paths: Optional[List[str]] = None) -> str:
         """Generate an image and return the saved path or an error string."""
+        payload = self._build_payload(prompt, base_image_paths)
+        if isinstance(payload, str):
+            return payload
+        start = time.time()
+        try:
+            response_data = get_image_client().generate(payload, tool="GeminiImageTool")
+        except Exception as e:
+            return self._request_error(e)
+        return self._save_response(payload["prompt"], response_data, start)
+
+    async def _arun(self, prompt: str, base_image_paths: Optional[List[str]] = None) -> str:
+        """Async _run(): the image request holds no thread; file work runs in a worker thread."""
+        payload = self._build_payload(prompt, base_image_paths)
+        if isinstance(payload, str):
+            return payload
+        start = time.time()
+        try:
+            response_data = await get_image_client().agenerate(payload, tool="GeminiImageTool")
+        except Exception as e:
+            return self._request_error(e)
+        return await asyncio.to_thread(self._save_response, payload["prompt"], response_data, start)
+
+    def _build_payload(self, prompt: str, base_image_paths: Optional[List[str]] = None) -> Union[dict, str]:
+        """Validate the arguments; returns the request payload or an error string."""
         # Defensive handling: tool callers may sometimes pass a stringified JSON blob
         # (e.g. '"{\"prompt\": ...}"') — try to normalize it into structured args.
         try:
@@ -72,6 +100,11 @@ class GeminiImageTool(BaseTool):
                     # If parsing fails, continue with original prompt value
                     pass
 
+        # Stop before calling the image server if the run has been cancelled
+        cancelled = cancelled_tool_message(self.name)
+        if cancelled:
+            return cancelled
+
         # Explicit validation to catch common errors
         if not isinstance(prompt, str):
             return f"Error: Prompt must be a string, got {type(prompt).__name__}: {prompt}"
@@ -79,30 +112,31 @@ class GeminiImageTool(BaseTool):
         if len(prompt.strip()) == 0:
             return "Error: Prompt cannot be empty."
             
-        start = time.time()
         payload = {"prompt": prompt}
         if base_image_paths:
             # Convert any relative paths to absolute paths so Gemini server can find the files
             abs_paths = [str(Path(p).resolve()) for p in base_image_paths]
             payload["base_image_paths"] = abs_paths
 
-        _dbg(f"Request -> {self.server_url}")
+        _dbg(f"Request -> {get_image_client().server_url}")
         _dbg(f"Prompt length: {len(prompt)} characters")
-        try:
-            response = requests.post(self.server_url, json=payload, timeout=45)
-        except requests.Timeout:
-            return "Error: Image server timeout after 45s."
-        except requests.ConnectionError as ce:
-            return f"Error: Cannot connect to image server ({ce}). Ensure server.py running on port 8000." 
-        except Exception as e:
-            return f"Error: Unexpected exception before response ({e})."
-
-        try:
-            response.raise_for_status()
-            response_data = response.json()
-        except Exception as e:
-            return f"Error: Bad response from image server ({e}) status={response.status_code} text={response.text[:200]}"
-
+        return payload
+
+    @staticmethod
+    def _request_error(error: Exception) -> str:
+        """Error string for an exception raised by the image client."""
+        if isinstance(error, requests.Timeout):
+            return f"Error: Image server timeout after {get_image_client().read_timeout}s{describe_failure(error)}."
+        if isinstance(error, requests.ConnectionError):
+            return f"Error: Cannot connect to image server ({error}){describe_failure(error)}. Ensure server.py running on port 8000."
+        if isinstance(error, requests.HTTPError):
+            return f"Error: Bad response from image server ({error}) status={error.response.status_code} text={error.response.text[:200]}{describe_failure(error)}"
+        if isinstance(error, ValueError):
+            return f"Error: Bad response from image server ({error})"
+        return f"Error: Unexpected exception before response ({error})."
+
+    def _save_response(self, prompt: str, response_data: dict, start: float) -> str:
+        """Copy (or write) the generated image into the panel folders and update the registry."""
         if response_data.get("status") == "success" and response_data.get("image_path"):
             source_image_path = response_data["image_path"]
             elapsed = round(time.time() - start, 2)
@@ -130,6 +164,8 @@ class GeminiImageTool(BaseTool):
                 panel_filename = f"panel_{panel_number:0>3}_{name_part}{ext}"
             else:
                 panel_filename = source_filename
+            # Keep concurrent runs from overwriting each other's panels
+            panel_filename = namespaced_panel_filename(panel_filename)
             # Define destination directory (comic_panels folder)
             # Use absolute path to avoid working directory issues
             output_dir = get_backend_output_path("comic_panels")
@@ -141,19 +177,20 @@ class GeminiImageTool(BaseTool):
             destination_path = os.path.join(output_dir, panel_filename)
             
             try:
-                # Wait a moment for file system to settle (sometimes needed after generation)
-                time.sleep(0.5)
-                
-                # Check if source file exists with retries
-                if not retry_file_check(source_path):
-                    return f"Image generated but source file not found: {source_path}"
-                               
-                # Verify file is readable
-                if not verify_image_readable(source_path):
-                    return f"Image generated but source file not readable: {source_path}"
-
-                # Copy the file from Gemini Image Tutorial to our comic project
-                backend_path, frontend_path = copy_image_to_output(source_path, panel_filename)
+                if response_data.get("image_bytes") is not None:
+                    # Byte transfer: no shared disk, write straight into the panel folders
+                    backend_path, frontend_path = write_image_to_output(response_data["image_bytes"], panel_filename)
+                else:
+                    # Check if source file exists with retries
+                    if not retry_file_check(source_path):
+                        return f"Image generated but source file not found: {source_path}"
+
+                    # Verify file is readable
+                    if not verify_image_readable(source_path):
+                        return f"Image generated but source file not readable: {source_path}"
+
+                    # Copy the file from Gemini Image Tutorial to our comic project
+                    backend_path, frontend_path = copy_image_to_output(source_path, panel_filename)
 
                 _dbg(f"Copied to backend: {backend_path}")
                 _dbg(f"Copied to frontend: {frontend_path}") 
@@ -1,16 +1,23 @@
+import asyncio
 import os
 from pathlib import Path
-from typing import Optional, Type
+from typing import Optional, Type, Union
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-import requests
 import time
+import requests
 from src.utils.registry_utils import update_registry_entry
+from src.utils.run_context import namespaced_panel_filename
+from src.utils.cancellation import cancelled_tool_message
+from src.utils.image_client import get_image_client
+from src.utils.resilience import describe_failure
+from src.utils.reference_staging import release_staged_references
 from src.utils.image_utils import (
     resolve_image_path,
     retry_file_check,
     verify_image_readable,
     copy_image_to_output,
+    write_image_to_output,
     update_registry_for_image,
     prepare_temp_images_for_gemini
 )
@@ -30,7 +37,6 @@ class ImageRefinementTool(BaseTool):
         "modify an existing image rather than generate a new one from scratch."
     )
     args_schema: Type[BaseModel] = ImageRefinementToolSchema
-    server_url: str = os.getenv("GEMINI_IMAGE_SERVER_URL", "http://127.0.0.1:8000/generate-image/")
 
     def __init__(self):
         super().__init__()
@@ -42,64 +48,114 @@ class ImageRefinementTool(BaseTool):
         panel_number: int = 1
     ) -> str:
         print(f"🔧 DEBUG: ImageRefinementTool called with base_image='{base_image_path}', panel={panel_number}")
+        # Stop before calling the image server if the run has been cancelled
+        cancelled = cancelled_tool_message(self.name)
+        if cancelled:
+            return cancelled
         try:
-            base_path = Path(base_image_path)
-            if not base_path.exists():
-                return f"❌ Base image not found: {base_image_path}"
+            payload = self._build_payload(base_image_path, refinement_prompt, panel_number)
+            if isinstance(payload, str):
+                return payload
 
-            full_prompt = (
-                f"Panel {panel_number}: Refine and modify the existing comic panel image with these changes: "
-                f"{refinement_prompt}. Maintain the comic art style and character consistency."
-            )
-            # Prepare base image for Gemini access
-            gemini_paths = prepare_temp_images_for_gemini([str(base_path.resolve())], "temp_refinement_images")
+            print(f"🔄 Refining image for panel {panel_number}: {base_image_path}")
+            try:
+                result = get_image_client().generate(payload, tool="ImageRefinementTool")
+            except requests.HTTPError as e:
+                return f"❌ Failed to refine image: HTTP {e.response.status_code} - {e.response.text}{describe_failure(e)}"
+            finally:
+                release_staged_references(payload["base_image_paths"])
 
-            if not gemini_paths:
-                    return f"❌ Failed to prepare base image for Gemini access: {base_image_path}"
+            return self._save_result(result, base_image_path, panel_number)
 
-            payload = {
-                "prompt": full_prompt,
-                "base_image_paths": gemini_paths
-                }
+        except Exception as e:
+            error_msg = f"❌ Error in image refinement: {str(e)}"
+            print(error_msg)
+            return error_msg
+
+    async def _arun(
+        self,
+        base_image_path: str,
+        refinement_prompt: str,
+        panel_number: int = 1
+    ) -> str:
+        """Async _run(): the image request holds no thread; file work runs in a worker thread."""
+        print(f"🔧 DEBUG: ImageRefinementTool called with base_image='{base_image_path}', panel={panel_number}")
+        cancelled = cancelled_tool_message(self.name)
+        if cancelled:
+            return cancelled
+        try:
+            payload = await asyncio.to_thread(self._build_payload, base_image_path, refinement_prompt, panel_number)
+            if isinstance(payload, str):
+                return payload
 
             print(f"🔄 Refining image for panel {panel_number}: {base_image_path}")
-            response = requests.post(self.server_url, json=payload, timeout=120)
-
-            if response.status_code != 200:
-                return f"❌ Failed to refine image: HTTP {response.status_code} - {response.text}"
-
-            result = response.json()
-            if result.get("status") != "success" or "image_path" not in result:
-                error_message = (
-                    result.get("message")
-                    or result.get("detail")
-                    or result.get("error")
-                    or "Unknown error from image refinement server."
-                )
-                return f"❌ Refinement failed: {error_message}"
-
-            source_path = resolve_image_path(result["image_path"])
+            try:
+                result = await get_image_client().agenerate(payload, tool="ImageRefinementTool")
+            except requests.HTTPError as e:
+                return f"❌ Failed to refine image: HTTP {e.response.status_code} - {e.response.text}{describe_failure(e)}"
+            finally:
+                await asyncio.to_thread(release_staged_references, payload["base_image_paths"])
+
+            return await asyncio.to_thread(self._save_result, result, base_image_path, panel_number)
+
+        except Exception as e:
+            error_msg = f"❌ Error in image refinement: {str(e)}"
+            print(error_msg)
+            return error_msg
+
+    def _build_payload(self, base_image_path: str, refinement_prompt: str, panel_number: int) -> Union[dict, str]:
+        """Stage the base image for the server; returns the request payload or an error string."""
+        base_path = Path(base_image_path)
+        if not base_path.exists():
+            return f"❌ Base image not found: {base_image_path}"
+
+        full_prompt = (
+            f"Panel {panel_number}: Refine and modify the existing comic panel image with these changes: "
+            f"{refinement_prompt}. Maintain the comic art style and character consistency."
+        )
+        # Prepare base image for Gemini access
+        gemini_paths = prepare_temp_images_for_gemini([str(base_path.resolve())], "temp_refinement_images")
+
+        if not gemini_paths:
+            return f"❌ Failed to prepare base image for Gemini access: {base_image_path}"
+
+        return {
+            "prompt": full_prompt,
+            "base_image_paths": gemini_paths
+        }
+
+    def _save_result(self, result: dict, base_image_path: str, panel_number: int) -> str:
+        """Copy (or write) the refined image into the panel folders and update the registry."""
+        if result.get("status") != "success" or "image_path" not in result:
+            error_message = (
+                result.get("message")
+                or result.get("detail")
+                or result.get("error")
+                or "Unknown error from image refinement server."
+            )
+            return f"❌ Refinement failed: {error_message}"
+
+        source_path = resolve_image_path(result["image_path"])
+        if result.get("image_bytes") is None:
             if not retry_file_check(source_path):
                 return f"❌ Refined image not found after retries: {source_path}"
 
             if not verify_image_readable(source_path):
                 return f"❌ Refined image unreadable: {source_path}"
 
-            timestamp = int(time.time() * 1000)
-            base_name = base_path.stem
-            panel_filename = f"refined_panel_{panel_number:03d}_{base_name}_{timestamp}.png"
+        timestamp = int(time.time() * 1000)
+        base_name = Path(base_image_path).stem
+        panel_filename = namespaced_panel_filename(f"refined_panel_{panel_number:03d}_{base_name}_{timestamp}.png")
 
-            panel_id = f"panel_{panel_number}"
-            try:
+        panel_id = f"panel_{panel_number}"
+        try:
+            if result.get("image_bytes") is not None:
+                backend_path, frontend_path = write_image_to_output(result["image_bytes"], panel_filename)
+            else:
                 backend_path, frontend_path = copy_image_to_output(source_path, panel_filename)
-                update_registry_for_image(panel_id, panel_filename, True, True)
-                return f"✅ Image refined: {panel_filename} (copied to backend and frontend)"
-            except Exception as frontend_error:
-                print(f"⚠️ Frontend copy failed: {frontend_error}")
-                update_registry_for_image(panel_id, panel_filename, True, False)
-                return f"✅ Image refined: {panel_filename} (frontend copy skipped)"
-
-        except Exception as e:
-            error_msg = f"❌ Error in image refinement: {str(e)}"
-            print(error_msg)
-            return error_msg
+            update_registry_for_image(panel_id, panel_filename, True, True)
+            return f"✅ Image refined: {panel_filename} (copied to backend and frontend)"
+        except Exception as frontend_error:
+            print(f"⚠️ Frontend copy failed: {frontend_error}")
+            update_registry_for_image(panel_id, panel_filename, True, False)
+            return f"✅ Image refined: {panel_filename} (frontend copy skipped)"
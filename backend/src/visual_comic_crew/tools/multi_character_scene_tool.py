@@ -1,19 +1,26 @@
+import asyncio
 import os
 from pathlib import Path
-from typing import List, Optional, Type
+from typing import List, Optional, Type, Union
 from crewai.tools import BaseTool
 from pydantic import BaseModel, Field
-import requests
 import time
+import requests
 from src.utils.image_utils import (
     resolve_image_path,
     retry_file_check,
     verify_image_readable,
     copy_image_to_output,
+    write_image_to_output,
     update_registry_for_image,
     prepare_temp_images_for_gemini
     )
-from src.utils.path_utils import get_backend_output_path, get_frontend_public_path
+from src.utils.path_utils import get_backend_output_path, get_frontend_public_path, get_character_references_path
+from src.utils.run_context import namespaced_panel_filename
+from src.utils.cancellation import cancelled_tool_message
+from src.utils.image_client import get_image_client
+from src.utils.resilience import describe_failure
+from src.utils.reference_staging import release_staged_references
 from src.utils.registry_utils import update_registry_entry
 
 
@@ -31,7 +38,6 @@ class MultiCharacterSceneTool(BaseTool):
         "Use when a panel contains multiple named characters interacting together."
     )
     args_schema: Type[BaseModel] = MultiCharacterSceneToolSchema
-    server_url: str = os.getenv("GEMINI_IMAGE_SERVER_URL", "http://127.0.0.1:8000/generate-image/")
 
     def __init__(self):
         super().__init__()
@@ -43,6 +49,7 @@ class MultiCharacterSceneTool(BaseTool):
         # src-based and backend-based parents to cover multiple execution contexts
         p = Path(__file__).resolve()
         candidates_dirs = [
+        get_character_references_path(),
         Path.cwd() / "output" / "character_references",
         get_backend_output_path("character_references"),
         get_frontend_public_path("character_references"),
@@ -100,81 +107,128 @@ class MultiCharacterSceneTool(BaseTool):
         panel_number: int = 1
     ) -> str:
         print(f"🎭 DEBUG: MultiCharacterSceneTool called with characters={character_names}, panel={panel_number}")
+        # Stop before calling the image server if the run has been cancelled
+        cancelled = cancelled_tool_message(self.name)
+        if cancelled:
+            return cancelled
+        try:
+            payload = self._build_payload(character_names, scene_description, panel_number)
+            if isinstance(payload, str):
+                return payload
+            try:
+                result = get_image_client().generate(payload, tool="MultiCharacterSceneTool")
+            except requests.HTTPError as e:
+                return f"❌ Failed to compose multi-character scene: HTTP {e.response.status_code} - {e.response.text}{describe_failure(e)}"
+            finally:
+                # The staged files stay for other panels; only this request's reference is dropped
+                release_staged_references(payload["base_image_paths"])
+
+            return self._save_result(result, character_names, panel_number)
+
+        except Exception as e:
+            error_msg = f"❌ Error in multi-character scene generation: {str(e)}"
+            print(error_msg)
+            return error_msg
+
+    async def _arun(
+        self,
+        character_names: List[str],
+        scene_description: str,
+        panel_number: int = 1
+    ) -> str:
+        """Async _run(): the image request holds no thread; file work runs in a worker thread."""
+        print(f"🎭 DEBUG: MultiCharacterSceneTool called with characters={character_names}, panel={panel_number}")
+        cancelled = cancelled_tool_message(self.name)
+        if cancelled:
+            return cancelled
         try:
-            base_paths = []
-            missing_characters = []
+            payload = await asyncio.to_thread(self._build_payload, character_names, scene_description, panel_number)
+            if isinstance(payload, str):
+                return payload
+            try:
+                result = await get_image_client().agenerate(payload, tool="MultiCharacterSceneTool")
+            except requests.HTTPError as e:
+                return f"❌ Failed to compose multi-character scene: HTTP {e.response.status_code} - {e.response.text}{describe_failure(e)}"
+            finally:
+                await asyncio.to_thread(release_staged_references, payload["base_image_paths"])
+
+            return await asyncio.to_thread(self._save_result, result, character_names, panel_number)
 
-            for char_name in character_names:
-                char_path = self._get_character_reference_path(char_name)
-                if char_path:
-                    base_paths.append(str(char_path.resolve()))
-                else:
-                    missing_characters.append(char_name)
+        except Exception as e:
+            error_msg = f"❌ Error in multi-character scene generation: {str(e)}"
+            print(error_msg)
+            return error_msg
 
-            if missing_characters:
-                return f"❌ Missing character references for: {', '.join(missing_characters)}. Create character references first."
+    def _build_payload(self, character_names: List[str], scene_description: str, panel_number: int) -> Union[dict, str]:
+        """Find and stage the character references; returns the request payload or an error string."""
+        base_paths = []
+        missing_characters = []
 
-            if len(base_paths) < 2:
-                return "❌ Need at least 2 character images for multi-character scene composition."
+        for char_name in character_names:
+            char_path = self._get_character_reference_path(char_name)
+            if char_path:
+                base_paths.append(str(char_path.resolve()))
+            else:
+                missing_characters.append(char_name)
 
-            full_prompt = f"Panel {panel_number}: Create a comic scene with multiple characters: {scene_description}. Include all characters consistently in the same scene."
+        if missing_characters:
+            return f"❌ Missing character references for: {', '.join(missing_characters)}. Create character references first."
 
-            gemini_paths = prepare_temp_images_for_gemini(base_paths, "temp_multi_character")
+        if len(base_paths) < 2:
+            return "❌ Need at least 2 character images for multi-character scene composition."
 
-            if not gemini_paths:
-                print(f"❌ DEBUG: prepare_temp_images_for_gemini returned empty list for base_paths: {base_paths}")
-                return f"❌ Failed to prepare character reference images for Gemini access"
+        full_prompt = f"Panel {panel_number}: Create a comic scene with multiple characters: {scene_description}. Include all characters consistently in the same scene."
 
-            print(f"✅ DEBUG: Prepared {len(gemini_paths)} temp paths for Gemini: {gemini_paths}")
+        gemini_paths = prepare_temp_images_for_gemini(base_paths, "temp_multi_character")
 
-            payload = {
-                "prompt": full_prompt,
-                "base_image_paths": gemini_paths
-            }
+        if not gemini_paths:
+            print(f"❌ DEBUG: prepare_temp_images_for_gemini returned empty list for base_paths: {base_paths}")
+            return f"❌ Failed to prepare character reference images for Gemini access"
 
-            print(f"🔄 Composing multi-character scene for panel {panel_number} with characters: {character_names}")
-            print(f"🔄 DEBUG: Sending payload to {self.server_url}")
-            print(f"🔄 DEBUG: Payload prompt: {full_prompt}")
-            print(f"🔄 DEBUG: Payload base_image_paths: {gemini_paths}")
-            response = requests.post(self.server_url, json=payload, timeout=120)
+        print(f"✅ DEBUG: Prepared {len(gemini_paths)} temp paths for Gemini: {gemini_paths}")
 
-            print(f"🔄 DEBUG: Response status: {response.status_code}")
-            print(f"🔄 DEBUG: Response text: {response.text[:500]}")  # First 500 chars
+        payload = {
+            "prompt": full_prompt,
+            "base_image_paths": gemini_paths
+        }
 
-            if response.status_code != 200:
-                return f"❌ Failed to compose multi-character scene: HTTP {response.status_code} - {response.text}"
+        print(f"🔄 Composing multi-character scene for panel {panel_number} with characters: {character_names}")
+        print(f"🔄 DEBUG: Sending payload to {get_image_client().server_url}")
+        print(f"🔄 DEBUG: Payload prompt: {full_prompt}")
+        print(f"🔄 DEBUG: Payload base_image_paths: {gemini_paths}")
+        return payload
 
-            result = response.json()
-            print(f"🔄 DEBUG: Parsed JSON result: {result}")
+    def _save_result(self, result: dict, character_names: List[str], panel_number: int) -> str:
+        """Copy (or write) the composed image into the panel folders and update the registry."""
+        print(f"🔄 DEBUG: Parsed JSON result: {result}")
 
-            if "error" in result:
-                return f"❌ Gemini compose error: {result['error']}"
+        if "error" in result:
+            return f"❌ Gemini compose error: {result['error']}"
 
-            if "image_path" not in result:
-                return "❌ No image path returned from Gemini compose operation"
+        if "image_path" not in result:
+            return "❌ No image path returned from Gemini compose operation"
 
-            source_path = resolve_image_path(result["image_path"])
+        source_path = resolve_image_path(result["image_path"])
+        if result.get("image_bytes") is None:
             if not retry_file_check(source_path):
                 return f"❌ Generated image not found after retries: {source_path}"
             if not verify_image_readable(source_path):
                 return f"❌ Generated image unreadable: {source_path}"
 
-            timestamp = int(time.time() * 1000)
-            char_names_joined = "_".join(char_name.lower().replace(" ", "_") for char_name in character_names[:2])
-            panel_filename = f"multi_char_panel_{panel_number:03d}_{char_names_joined}_{timestamp}.png"
+        timestamp = int(time.time() * 1000)
+        char_names_joined = "_".join(char_name.lower().replace(" ", "_") for char_name in character_names[:2])
+        panel_filename = namespaced_panel_filename(f"multi_char_panel_{panel_number:03d}_{char_names_joined}_{timestamp}.png")
 
+        if result.get("image_bytes") is not None:
+            backend_path, frontend_path = write_image_to_output(result["image_bytes"], panel_filename)
+        else:
             backend_path, frontend_path = copy_image_to_output(source_path, panel_filename)
 
-            panel_id = f"panel_{panel_number}"
-            try:
-                update_registry_for_image(panel_id, panel_filename, True, True)
-                return f"✅ Multi-character scene generated: {panel_filename} (characters: {', '.join(character_names)})"
-            except Exception as frontend_error:
-                print(f"⚠️ Failed to copy to frontend (non-critical): {frontend_error}")
-                update_registry_for_image(panel_id, panel_filename, True, False)
-                return f"✅ Multi-character scene generated (backend only): {panel_filename} (characters: {', '.join(character_names)})"
-
-        except Exception as e:
-            error_msg = f"❌ Error in multi-character scene generation: {str(e)}"
-            print(error_msg)
-            return error_msg
+        panel_id = f"panel_{panel_number}"
+        try:
+            update_registry_for_image(panel_id, panel_filename, True, True)
+            return f"✅ Multi-character scene generated: {panel_filename} (characters: {', '.join(character_names)})"
+        except Exception as frontend_error:
+            print(f"⚠️ Failed to copy to frontend (non-critical): {frontend_error}")
+            update_registry_for_image(panel_id, panel_filename, True, False)
+            return f"✅ Multi-character scene generated (backend only): {panel_filename} (characters: {', '.join(character_names)})"
@@ -1,5 +1,5 @@
 from crewai.tools import BaseTool
-from typing import Type, Dict, List, Any
+from typing import Type, Dict, List, Any, Optional
 from pydantic import BaseModel, Field
 import time
 import json
@@ -8,6 +8,7 @@ import shutil
 from pathlib import Path
 from src.utils.registry_utils import update_registry_entry
 from src.utils.image_utils import clean_temp_folder
+from src.utils.panel_paging import resolve_panel_count
 
 
 def _dbg(msg: str):
@@ -20,12 +21,12 @@ class WorkflowControlSchema(BaseModel):
     panel_numbers: List[int] = Field(default=[], description="Specific panel numbers to regenerate (for retry action)")
     story_context: str = Field(default="", description="Story context for generation")
     max_attempts: int = Field(default=2, description="Maximum retry attempts per panel")
-    expected_panels: int = Field(default=6, description="Expected number of panels for status checking")
+    expected_panels: Optional[int] = Field(default=None, description="Expected number of panels for status checking (default: the story's panel count)")
 
 class RetryManagerSchema(BaseModel):
     """Input for RetryManagerTool."""
     failed_panels: List[int] = Field(..., description="List of panel numbers that failed generation")
-    total_panels: int = Field(default=6, description="Total number of panels expected")
+    total_panels: Optional[int] = Field(default=None, description="Total number of panels expected (default: the story's panel count)")
     current_attempt: int = Field(default=1, description="Current retry attempt number")
     max_retries: int = Field(default=3, description="Maximum number of retry attempts")
 
@@ -38,7 +39,7 @@ class WorkflowControlTool(BaseTool):
     args_schema: Type[BaseModel] = WorkflowControlSchema
 
     def _run(self, action: str, target_agent: str = "visual_director", panel_numbers: List[int] = [], 
-             story_context: str = "", max_attempts: int = 2, expected_panels: int = 6) -> str:
+             story_context: str = "", max_attempts: int = 2, expected_panels: Optional[int] = None) -> str:
         """Execute workflow control actions."""
         
         _dbg(f"Executing action: {action}")
@@ -86,7 +87,7 @@ class WorkflowControlTool(BaseTool):
         {story_context}
 
         Requirements:
-        1. Generate ALL panels described in the story (typically 1-6)
+        1. Generate ALL panels described in the story
         2. Use proper tool calls for each panel. For each panel, construct the prompt as: "Panel <panel_number>: <scene description>"
         3. Record actual returned image paths (no fabrication)
         4. Provide complete generation summary with success/failure status
@@ -96,14 +97,15 @@ class WorkflowControlTool(BaseTool):
         """
         return delegation_instruction
 
-    def _check_generation_status(self, expected_panels: int = 6) -> str:
+    def _check_generation_status(self, expected_panels: Optional[int] = None) -> str:
         """Check status of current generation process by querying registry."""
         _dbg("Checking generation status via registry")
 
-        from src.utils.registry_utils import read_registry
+        from src.utils.registry_utils import registry_snapshot
 
         try:
-            registry = read_registry()
+            registry = registry_snapshot()
+            expected_panels = resolve_panel_count(expected_panels)
             _dbg(f"Registry data: {registry}")
 
             # Count verified panels
@@ -193,21 +195,22 @@ class RetryManagerTool(BaseTool):
     )
     args_schema: Type[BaseModel] = RetryManagerSchema
 
-    def _run(self, failed_panels: List[int], total_panels: int = 6, 
+    def _run(self, failed_panels: List[int], total_panels: Optional[int] = None, 
              current_attempt: int = 1, max_retries: int = 3) -> str:
         """Manage retry logic with registry-aware filtering."""
         
         _dbg(f"Managing retry for panels {failed_panels}, attempt {current_attempt}/{max_retries}")
+        total_panels = resolve_panel_count(total_panels, failed_panels)
         
         # Patch 2: Registry-Aware Retry Filtering
-        from src.utils.registry_utils import read_registry
+        from src.utils.registry_utils import registry_snapshot
         
         # Filter failed_panels to exclude verified ones
         filtered_failed_panels = []
         registry_verified_panels = []
         
         try:
-            registry = read_registry()
+            registry = registry_snapshot()
             _dbg(f"Registry data for retry filtering: {registry}")
             
             for panel_num in failed_panels:
@@ -293,11 +296,12 @@ class StatusTrackerTool(BaseTool):
     )
     args_schema: Type[BaseModel] = RetryManagerSchema  # Reuse schema
 
-    def _run(self, failed_panels: List[int], total_panels: int = 6, 
+    def _run(self, failed_panels: List[int], total_panels: Optional[int] = None, 
              current_attempt: int = 1, max_retries: int = 3) -> str:
         """Track and report generation status."""
         
         _dbg("Generating status report")
+        total_panels = resolve_panel_count(total_panels, failed_panels)
         
         timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
         success_count = total_panels - len(failed_panels)
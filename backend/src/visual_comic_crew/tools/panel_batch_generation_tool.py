@@ -0,0 +1,169 @@
+"""
+Panel Batch Generation Tool
+Generates the images of all story panels concurrently instead of one tool call per panel,
+so the image phase takes about as long as the slowest panel rather than the sum of all panels.
+The panels run as coroutines on one event loop through the image tools' _arun() paths, so a
+waiting image request holds no thread.
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+from typing import Any, Dict, List, Optional, Type
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+from src.utils.story_metadata_manager import get_current_story_metadata
+from src.utils.cancellation import cancelled_tool_message
+from src.utils.image_client import get_image_client
+from .gemini_image_tool import GeminiImageTool
+from .character_consistency_tool import CharacterConsistencyTool
+from .multi_character_scene_tool import MultiCharacterSceneTool
+
+
+# Panels sent to the image server at the same time
+PANEL_GENERATION_PARALLELISM = int(os.getenv("PANEL_GENERATION_PARALLELISM", "4"))
+
+_FILENAME_PATTERN = re.compile(r"([A-Za-z0-9_.-]+\.(?:png|jpe?g|webp))", re.IGNORECASE)
+
+
+def _dbg(msg: str):
+    print(f"[PanelBatchGenerationTool] {msg}")
+
+
+class PanelBatchGenerationToolSchema(BaseModel):
+    """Input schema for Panel Batch Generation Tool."""
+    style: Optional[str] = Field(None, description="Art style appended to every panel prompt (e.g. 'vibrant comic book style')")
+    panel_prompts_json: Optional[str] = Field(
+        None, description="Optional JSON object mapping panel number to a custom image prompt, e.g. {\"1\": \"...\"}. "
+                          "Panels without an entry use their description from the story metadata."
+    )
+    panel_characters_json: Optional[str] = Field(
+        None, description="Optional JSON object mapping panel number to the list of character names in that panel, "
+                          "e.g. {\"1\": [\"Luna\"], \"2\": [\"Luna\", \"Max\"]}. Character references must exist already."
+    )
+    panel_numbers: Optional[List[int]] = Field(None, description="Only generate these panels (e.g. to retry failed ones)")
+
+
+class PanelBatchGenerationTool(BaseTool):
+    name: str = "Panel Batch Generator"
+    description: str = (
+        "Generates images for ALL story panels at once, in parallel. Reads the panels from the story metadata, "
+        "picks the right generator per panel (Character Consistency Tool for one character, Multi-Character Scene Tool "
+        "for several, Gemini Image Generator for none), saves each filename to the story metadata and the panel registry. "
+        "Create character references BEFORE calling this tool."
+    )
+    args_schema: Type[BaseModel] = PanelBatchGenerationToolSchema
+
+    def _run(self, style: Optional[str] = None, panel_prompts_json: Optional[str] = None,
+             panel_characters_json: Optional[str] = None, panel_numbers: Optional[List[int]] = None) -> str:
+        # crewai calls _run from a crew worker thread; the panels get an event loop of their own
+        return asyncio.run(self._arun_on_own_loop(style, panel_prompts_json, panel_characters_json, panel_numbers))
+
+    async def _arun_on_own_loop(self, *args) -> str:
+        try:
+            return await self._arun(*args)
+        finally:
+            # The image client keeps one async HTTP client per event loop
+            await get_image_client().aclose()
+
+    async def _arun(self, style: Optional[str] = None, panel_prompts_json: Optional[str] = None,
+                    panel_characters_json: Optional[str] = None, panel_numbers: Optional[List[int]] = None) -> str:
+        cancelled = cancelled_tool_message(self.name)
+        if cancelled:
+            return cancelled
+
+        metadata = get_current_story_metadata()
+        if metadata is None:
+            return "❌ No active story metadata found. Panels must be written before generating images."
+        panels = metadata.get_panels()
+        if panel_numbers:
+            panels = [panel for panel in panels if panel.get('number') in set(panel_numbers)]
+        if not panels:
+            return "❌ No panels found in the story metadata."
+
+        try:
+            prompts = self._parse_mapping(panel_prompts_json)
+            characters = self._parse_mapping(panel_characters_json)
+        except ValueError as e:
+            return f"❌ {e}"
+
+        parallelism = max(1, min(PANEL_GENERATION_PARALLELISM, len(panels)))
+        _dbg(f"Generating {len(panels)} panels with parallelism {parallelism}")
+        start = time.time()
+        results: Dict[int, str] = {}
+        # Tasks copy this context, so every panel writes to the current run's workspace
+        limit = asyncio.Semaphore(parallelism)
+
+        async def generate(panel: Dict[str, Any]):
+            number = panel.get('number')
+            async with limit:
+                try:
+                    result = await self._generate_panel(panel, prompts.get(str(number)),
+                                                        characters.get(str(number), panel.get('characters') or []), style)
+                except Exception as e:
+                    result = f"❌ Panel {number} failed: {e}"
+            results[number] = result
+            filename = self._extract_filename(result)
+            if filename:
+                # Metadata writes stay on the loop's thread, one at a time; the registry was updated by the panel's tool
+                metadata.set_image_filename(number, filename, agent_name='visual_director')
+                _dbg(f"Panel {number} ready: {filename}")
+            else:
+                _dbg(f"Panel {number} failed: {result[:200]}")
+
+        await asyncio.gather(*(generate(panel) for panel in panels))
+
+        elapsed = round(time.time() - start, 1)
+        succeeded = [n for n, r in results.items() if self._extract_filename(r)]
+        lines = [f"Generated {len(succeeded)}/{len(panels)} panels in {elapsed}s (parallelism {parallelism})"]
+        for number in sorted(results, key=lambda n: (n is None, n)):
+            filename = self._extract_filename(results[number])
+            lines.append(f"Panel {number}: {'✅ ' + filename if filename else results[number]}")
+        failed = [n for n in results if n not in succeeded]
+        if failed:
+            lines.append(f"Retry failed panels with panel_numbers={sorted(failed)}")
+        return "\n".join(lines)
+
+    async def _generate_panel(self, panel: Dict[str, Any], custom_prompt: Optional[str],
+                              character_names: List[str], style: Optional[str]) -> str:
+        """Generate one panel with the async path of the tool that matches its character count."""
+        cancelled = cancelled_tool_message(self.name)
+        if cancelled:
+            return cancelled
+        number = panel.get('number')
+        scene = custom_prompt or panel.get('description', '')
+        if panel.get('dialogue') and not custom_prompt:
+            scene = f"{scene} Dialogue: {panel['dialogue']}"
+        if style:
+            scene = f"{scene} Style: {style}"
+
+        if len(character_names) > 1:
+            return await MultiCharacterSceneTool()._arun(character_names=list(character_names),
+                                                         scene_description=scene, panel_number=number)
+        if len(character_names) == 1:
+            return await CharacterConsistencyTool()._arun(action="generate_scene", character_name=character_names[0],
+                                                          scene_description=scene, panel_number=number)
+        # GeminiImageTool reads the panel number from the prompt
+        return await GeminiImageTool()._arun(prompt=f"Panel {number}: {scene}")
+
+    @staticmethod
+    def _parse_mapping(raw: Optional[str]) -> Dict[str, Any]:
+        if not raw:
+            return {}
+        try:
+            data = json.loads(raw)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON mapping: {e}")
+        if not isinstance(data, dict):
+            raise ValueError("Panel mappings must be JSON objects keyed by panel number")
+        return {str(key): value for key, value in data.items()}
+
+    @staticmethod
+    def _extract_filename(result: str) -> Optional[str]:
+        """Pull the saved image filename out of a panel tool's result string."""
+        if not result or result.lstrip().startswith(("❌", "Error", "Image generated but")):
+            return None
+        matches = _FILENAME_PATTERN.findall(result)
+        return os.path.basename(matches[-1]) if matches else None
@@ -5,7 +5,8 @@ from pydantic import BaseModel
 from crewai.tools import BaseTool
 
 from src.utils.panel_registry_inspector_utils import inspect_panel_registry
-from src.utils.registry_utils import read_registry
+from src.utils.registry_utils import registry_snapshot
+from src.utils.panel_paging import resolve_panel_count
 
 def _dbg(msg: str):
     print(f"[PanelRegistryInspectorTool] {msg}")
@@ -33,15 +34,15 @@ class PanelRegistryInspectorTool(BaseTool):
     def _run(self, image_paths: List[str], dialogue: List[str]) -> str:
         # First, try to get panel information from registry
         try:
-            registry = read_registry()
+            registry = registry_snapshot()
             _dbg(f"Registry data: {registry}")
             
             # Always build image_paths from registry to ensure we're using verified data
             image_paths = []
             panel_count = 0
             
-            # Check all 6 panels
-            for i in range(1, 7):
+            # Check every panel of the comic
+            for i in range(1, resolve_panel_count(len(dialogue) or None) + 1):
                 panel_id = f"panel_{i}"
                 if panel_id in registry:
                     panel_data = registry[panel_id]
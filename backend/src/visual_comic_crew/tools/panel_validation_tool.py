@@ -1,11 +1,18 @@
 from crewai.tools import BaseTool
-from typing import Type, Dict, List, Union
+from typing import Callable, Optional, Type, Dict, List, Tuple, Union
 from pydantic import BaseModel, Field
+import asyncio
 import os
 import re
+import time
 from pathlib import Path
 from src.utils.path_utils import get_repo_root, get_backend_output_path, get_frontend_public_path
-from src.utils.registry_utils import update_registry_entry
+from src.utils.registry_utils import update_many
+from src.utils.file_waiter import wait_for_file
+from src.utils.panel_paging import describe_page, page_range, resolve_panel_count
+
+# Total time a validation run waits for panel files that are still being written
+VALIDATION_WAIT_SECONDS = float(os.getenv("PANEL_VALIDATION_WAIT_SECONDS", "2"))
 
 def _dbg(msg: str):
     print(f"[PanelValidationTool] {msg}")
@@ -15,7 +22,9 @@ class PanelValidationToolSchema(BaseModel):
     # Allow either a single filename string or a list of filename strings per panel
     panel_map: Dict[str, Union[str, List[str]]] = Field(None, description="Optional dictionary mapping panel numbers (e.g., '1') to their generated image filenames. Each value can be a single filename string or a list of filename strings. If not provided, will attempt to extract from context.")
     context_text: str = Field(None, description="Optional context text from image generation task to extract panel mappings from.")
-    expected_panel_count: int = Field(6, description="Expected number of panels in the comic (default: 6).")
+    expected_panel_count: Optional[int] = Field(None, description="Expected number of panels in the comic (default: the story's panel count).")
+    page: Optional[int] = Field(None, description="1-based page of panels to validate; all panels when omitted.")
+    page_size: Optional[int] = Field(None, description="Panels per page (default: COMIC_PANEL_PAGE_SIZE).")
 
 class PanelValidationTool(BaseTool):
     name: str = "Panel Validation Tool"
@@ -44,19 +53,24 @@ class PanelValidationTool(BaseTool):
         _dbg(f"_normalize_filename result: {filename}")
         return filename
 
-    def _check_file_existence(self, filename: str) -> dict:
+    @staticmethod
+    def _remaining(deadline: float = None) -> float:
+        return max(0.0, deadline - time.monotonic()) if deadline is not None else 0.0
+
+    def _check_file_existence(self, filename: str, deadline: float = None) -> dict:
+        """Check both panel folders, waiting until the deadline (time.monotonic()) for files still being written."""
         normalized_filename = self._normalize_filename(filename)
         backend_output_path, frontend_panels_path = self._get_paths()
         backend_file = backend_output_path / normalized_filename
         frontend_file = frontend_panels_path / normalized_filename
         _dbg(f"_check_file_existence: normalized={normalized_filename}, backend_path={backend_file}, frontend_path={frontend_file}")
         try:
-            backend_exists = backend_file.exists() and backend_file.is_file()
+            backend_exists = wait_for_file(backend_file, timeout=self._remaining(deadline)) and backend_file.is_file()
         except Exception as e:
             backend_exists = False
             _dbg(f"_check_file_existence backend.exists() error: {e}")
         try:
-            frontend_exists = frontend_file.exists() and frontend_file.is_file()
+            frontend_exists = wait_for_file(frontend_file, timeout=self._remaining(deadline)) and frontend_file.is_file()
         except Exception as e:
             frontend_exists = False
             _dbg(f"_check_file_existence frontend.exists() error: {e}")
@@ -98,14 +112,62 @@ class PanelValidationTool(BaseTool):
         _dbg(f"Extracted panel mapping: {mapping}")
         return mapping
 
-    def _run(self, panel_map: dict = None, context_text: str = None, expected_panel_count: int = 6) -> str:
+    def _run(self, panel_map: dict = None, context_text: str = None, expected_panel_count: int = None,
+             page: int = None, page_size: int = None) -> str:
+        # crewai calls _run from a crew worker thread; the file checks get an event loop of their own
+        return asyncio.run(self._arun(panel_map, context_text, expected_panel_count, page, page_size))
+
+    async def _arun(self, panel_map: dict = None, context_text: str = None, expected_panel_count: int = None,
+                    page: int = None, page_size: int = None) -> str:
+        """Async _run(): every candidate file is checked at the same time instead of one after another."""
+        panel_map = await asyncio.to_thread(self._resolve_panel_map, panel_map, context_text)
+        if isinstance(panel_map, str):
+            return panel_map
+        selection = await asyncio.to_thread(self._select_panels, panel_map, expected_panel_count, page, page_size)
+        if isinstance(selection, str):
+            return selection
+        deadline = time.monotonic() + VALIDATION_WAIT_SECONDS
+        candidates = list(dict.fromkeys(
+            candidate
+            for panel_num in selection[0]
+            for candidate in self._panel_candidates(panel_map.get(str(panel_num)))
+        ))
+        results = await asyncio.gather(*(
+            asyncio.to_thread(self._check_file_existence, candidate, deadline) for candidate in candidates
+        ))
+        checks = dict(zip(candidates, results))
+        return await asyncio.to_thread(self._build_report, panel_map, *selection, checks.__getitem__)
+
+    @staticmethod
+    def _select_panels(panel_map: dict, expected_panel_count: int = None, page: int = None,
+                       page_size: int = None) -> Union[Tuple[range, str], str]:
+        """(panel numbers to check, page label), or an error string for a page that does not exist."""
+        total = resolve_panel_count(expected_panel_count, panel_map.keys())
+        try:
+            numbers = page_range(total, page, page_size)
+        except ValueError as e:
+            return f"❌ ERROR: {e}"
+        return numbers, describe_page(numbers, total, page, page_size)
+
+    @staticmethod
+    def _panel_candidates(raw_value) -> List[str]:
+        """Candidate filenames of one panel_map entry (a filename or a list of filenames)."""
+        if isinstance(raw_value, list):
+            # flatten and keep string-like entries
+            return [str(v) for v in raw_value if v is not None]
+        if isinstance(raw_value, str):
+            return [raw_value]
+        return []
+
+    def _resolve_panel_map(self, panel_map: dict = None, context_text: str = None) -> Union[dict, str]:
+        """Panel map from the registry, the argument or the context text; an error string if there is none."""
         _dbg(f"Starting panel validation with panel_map: {panel_map}")
         print(f"PANEL_VALIDATION_TOOL_RECEIVED_MAP: {panel_map}")
         
         # First, try to get panel information from registry
         try:
-            from src.utils.registry_utils import read_registry
-            registry = read_registry()
+            from src.utils.registry_utils import registry_snapshot
+            registry = registry_snapshot()
             _dbg(f"Registry data: {registry}")
             
             # If we have registry data, use it to build panel_map
@@ -136,44 +198,37 @@ class PanelValidationTool(BaseTool):
                     import re
                     if re.search(pattern, filename):
                         return f"❌ ERROR: Detected guessed filename '{filename}' for panel {panel_num}. This indicates the image generation task did not produce proper JSON output. Please check the visual director task output and ensure it contains actual generated filenames, not guessed ones."
+        return panel_map
+
+    def _build_report(self, panel_map: dict, panel_numbers: range, page_label: str, check: Callable[[str], dict]) -> str:
+        """Check the given panels with check(candidate), update the registry and build the validation report."""
+        expected_panel_count = len(panel_numbers)
         validation_results = []
         missing_panels = []
         backend_files_found = 0
         frontend_files_found = 0
-        try:
-            from src.utils.registry_utils import update_registry_entry
-        except ImportError:
-            def update_registry_entry(**kwargs): pass
-        for panel_num in range(1, expected_panel_count + 1):
+        # Registry changes of all panels, written in one go at the end
+        registry_updates = {}
+        for panel_num in panel_numbers:
             panel_key = str(panel_num)
             panel_id = f"panel_{panel_key}"
             raw_value = panel_map.get(panel_key)
             _dbg(f"_run: checking panel {panel_num}, raw filename: {raw_value}")
 
             # Normalize allowed types: str or list[str]
-            candidates: List[str] = []
-            if isinstance(raw_value, list):
-                # flatten and keep string-like entries
-                for v in raw_value:
-                    if v is None:
-                        continue
-                    candidates.append(str(v))
-            elif isinstance(raw_value, str):
-                candidates = [raw_value]
-            else:
-                candidates = []
+            candidates = self._panel_candidates(raw_value)
 
             if not candidates or any(("FAILED" in str(c).upper() for c in candidates)):
                 validation_results.append(f"- Panel {panel_num}: ❌ MISSING: Generation failed or no path provided. Reason: {raw_value or 'N/A'}")
                 missing_panels.append(panel_num)
-                update_registry_entry(panel_id=panel_id, verified=False, filename=None)
+                registry_updates[panel_id] = dict(verified=False, filename=None)
                 continue
 
             # Check each candidate and consider panel valid if any candidate exists in both locations
             chosen_filename = None
             chosen_check = None
             for candidate in candidates:
-                file_check = self._check_file_existence(candidate)
+                file_check = check(candidate)
                 _dbg(f"_run: file_check for panel {panel_num}, candidate {candidate}: {file_check}")
                 # prefer a candidate that exists in both backend and frontend
                 if file_check['backend'] and file_check['frontend']:
@@ -189,12 +244,11 @@ class PanelValidationTool(BaseTool):
             if chosen_check is None:
                 validation_results.append(f"- Panel {panel_num}: ❌ MISSING: {candidates} (not found in either location)")
                 missing_panels.append(panel_num)
-                update_registry_entry(panel_id=panel_id, verified=False, filename=None)
+                registry_updates[panel_id] = dict(verified=False, filename=None)
                 continue
 
             normalized_filename = chosen_check['normalized_filename']
-            update_registry_entry(
-                panel_id=panel_id,
+            registry_updates[panel_id] = dict(
                 filename=normalized_filename,
                 backend=chosen_check['backend'],
                 frontend=chosen_check['frontend'],
@@ -215,10 +269,11 @@ class PanelValidationTool(BaseTool):
             else:
                 validation_results.append(f"- Panel {panel_num}: ❌ MISSING: {normalized_filename} (not found in either location)")
                 missing_panels.append(panel_num)
+        update_many(registry_updates)
         total_valid_panels = expected_panel_count - len(missing_panels)
         validation_status = "PASS" if len(missing_panels) == 0 else "FAIL"
         report = f"""
-Panel Validation Results:
+Panel Validation Results:{f" {page_label}" if page_label else ""}
 {chr(10).join(validation_results)}
 
 File System Check:
@@ -12,7 +12,7 @@ from src.utils.story_metadata_manager import StoryMetadataManager, get_current_s
 
 class StoryMetadataReadInput(BaseModel):
     action: str = Field(description="Action to perform: 'get_topic', 'get_story_text', 'get_panels', 'get_panel', 'get_images', 'get_summary', 'get_status'")
-    panel_number: Optional[int] = Field(None, description="Panel number (1-6) when action is 'get_panel'")
+    panel_number: Optional[int] = Field(None, description="Panel number when action is 'get_panel'")
 
 
 class StoryMetadataWriteInput(BaseModel):
@@ -105,8 +105,8 @@ class StoryMetadataReaderTool(BaseTool):
                 result += f"Status: {summary['status']}\n"
                 result += f"Topic: {summary['topic']}\n"
                 result += f"Has Story Text: {summary['has_full_story']}\n"
-                result += f"Panels: {summary['panel_count']}/6\n"
-                result += f"Images: {summary['images_generated']}/6\n"
+                result += f"Panels: {summary['panel_count']}\n"
+                result += f"Images: {summary['images_generated']}/{summary['panel_count']}\n"
                 result += f"Completed Agents: {', '.join(summary['completed_agents'])}\n"
                 result += f"Last Updated: {summary['last_updated']}"
                 return result
@@ -205,22 +205,28 @@ class StoryMetadataWriterTool(BaseTool):
             return f"Error writing story metadata: {str(e)}"
 
 
+class StoryMetadataLayoutInput(BaseModel):
+    page: Optional[int] = Field(None, description="1-based page of panels to export; all panels when omitted")
+    page_size: Optional[int] = Field(None, description="Panels per page (default: COMIC_PANEL_PAGE_SIZE)")
+
+
 class StoryMetadataLayoutTool(BaseTool):
     name: str = "StoryMetadataForLayout"
     description: str = (
         "Export story data from metadata file in format suitable for comic layout generation. "
         "Returns structured data with panels, dialogue, and image paths for ComicLayoutTool. "
-        "Use this when you need to prepare data for final comic assembly."
+        "Use this when you need to prepare data for final comic assembly. "
+        "Long comics can be exported a page of panels at a time."
     )
-    args_schema: Type[BaseModel] = BaseModel
+    args_schema: Type[BaseModel] = StoryMetadataLayoutInput
 
-    def _run(self) -> str:
+    def _run(self, page: Optional[int] = None, page_size: Optional[int] = None) -> str:
         try:
             metadata_manager = get_current_story_metadata()
             if not metadata_manager:
                 return "No active story metadata found. Cannot export layout data."
             
-            layout_data = metadata_manager.export_for_layout()
+            layout_data = metadata_manager.export_for_layout(page, page_size)
             
             # Return as JSON string for easy parsing by other tools
             return json.dumps(layout_data, indent=2)
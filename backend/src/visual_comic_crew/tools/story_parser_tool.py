@@ -1,12 +1,64 @@
 from crewai.tools import BaseTool
-from typing import Type, List
+from typing import Type, List, Optional
 from pydantic import BaseModel, Field
 import re
+from src.utils.panel_paging import DEFAULT_PANEL_COUNT
+
+
+def _fit(items: List[str], count: Optional[int]) -> List[str]:
+    """Pad with empty strings / truncate to count; unchanged when count is None."""
+    if count is None:
+        return items
+    return (items + [""] * count)[:count]
+
+
+def extract_panel_texts(story_text: str, split_count: Optional[int] = None) -> List[str]:
+    """
+    Panel descriptions of a story: one per "Panel N:" marker, however many there are.
+    A story without markers is split evenly into split_count panels (default: DEFAULT_PANEL_COUNT).
+    """
+    panels = []
+    
+    # Look for patterns like "Panel 1:", "Panel 1)", "1.", etc.
+    # This pattern looks for "Panel X:" or "Panel X." or "Panel X)" followed by content until the next panel or end
+    panel_pattern = r'Panel\s+\d+[:\.].*?(?=\n\s*Panel\s+\d+[:\.]|\Z)'
+    matches = re.findall(panel_pattern, story_text, re.DOTALL | re.IGNORECASE)
+    
+    if matches:
+        for match in matches:
+            # Clean up the panel text
+            panel_text = re.sub(r'Panel\s+\d+[:\.]\s*', '', match, flags=re.IGNORECASE).strip()
+            # Remove extra whitespace and newlines
+            panel_text = re.sub(r'\s+', ' ', panel_text)
+            panels.append(panel_text)
+        return panels
+
+    # If no clear panel markers, split the story into split_count parts
+    # This is a fallback approach
+    split_count = split_count or DEFAULT_PANEL_COUNT
+    sentences = re.split(r'[.!?]+', story_text)
+    sentences = [s.strip() for s in sentences if s.strip()]
+    if len(sentences) < split_count:
+        # If we can't split properly, return the whole story as one panel
+        return _fit([story_text], split_count)
+    # Distribute sentences evenly; the first len % split_count panels get one extra
+    per_panel, extra = divmod(len(sentences), split_count)
+    start = 0
+    for i in range(split_count):
+        end = start + per_panel + (1 if i < extra else 0)
+        panel_text = '. '.join(sentences[start:end])
+        if panel_text:
+            panel_text += '.'
+        panels.append(panel_text)
+        start = end
+    return panels
+
 
 class StoryParserToolSchema(BaseModel):
     """Input for StoryParserTool."""
     story_text: str = Field(..., description="The story text to parse for panel descriptions and dialogue")
     action: str = Field(..., description="Action to perform: 'extract_panels' or 'extract_dialogue'")
+    panel_count: Optional[int] = Field(None, description="Number of panels to return; defaults to the panels found in the story")
 
 class StoryParserTool(BaseTool):
     name: str = "StoryParserTool"
@@ -16,71 +68,29 @@ class StoryParserTool(BaseTool):
     )
     args_schema: Type[BaseModel] = StoryParserToolSchema
 
-    def _extract_panels(self, story_text: str) -> List[str]:
-        """Extract panel descriptions from the story text."""
-        panels = []
-        
-        # Look for patterns like "Panel 1:", "Panel 1)", "1.", etc.
-        # This pattern looks for "Panel X:" or "Panel X." or "Panel X)" followed by content until the next panel or end
-        panel_pattern = r'Panel\s+\d+[:\.].*?(?=\n\s*Panel\s+\d+[:\.]|\Z)'
-        matches = re.findall(panel_pattern, story_text, re.DOTALL | re.IGNORECASE)
-        
-        if matches:
-            for match in matches:
-                # Clean up the panel text
-                panel_text = re.sub(r'Panel\s+\d+[:\.]\s*', '', match, flags=re.IGNORECASE).strip()
-                # Remove extra whitespace and newlines
-                panel_text = re.sub(r'\s+', ' ', panel_text)
-                panels.append(panel_text)
-        else:
-            # If no clear panel markers, try to split the story into 6 parts
-            # This is a fallback approach
-            sentences = re.split(r'[.!?]+', story_text)
-            sentences = [s.strip() for s in sentences if s.strip()]
-            if len(sentences) >= 6:
-                # Distribute sentences across 6 panels
-                sentences_per_panel = max(1, len(sentences) // 6)
-                for i in range(6):
-                    start = i * sentences_per_panel
-                    end = min((i + 1) * sentences_per_panel, len(sentences))
-                    panel_text = '. '.join(sentences[start:end])
-                    if panel_text:
-                        panel_text += '.'
-                    panels.append(panel_text)
-            else:
-                # If we can't split properly, return the whole story as one panel
-                panels = [story_text]
-                
-        # Ensure we have exactly 6 panels
-        while len(panels) < 6:
-            panels.append("")
-        return panels[:6]
+    def _extract_panels(self, story_text: str, panel_count: Optional[int] = None) -> List[str]:
+        """Extract panel descriptions from the story text (exactly panel_count of them if given)."""
+        return _fit(extract_panel_texts(story_text, split_count=panel_count), panel_count)
 
-    def _extract_dialogue(self, story_text: str) -> List[str]:
-        """Extract dialogue from the story text."""
+    def _extract_dialogue(self, story_text: str, panel_count: Optional[int] = None) -> List[str]:
+        """Extract dialogue from the story text, one entry per panel."""
         # Look for dialogue patterns in quotes
         dialogue_pattern = r'["\u201c\u201d](.*?)["\u201d\u201c]'
         dialogues = re.findall(dialogue_pattern, story_text, re.DOTALL)
         
-        # If no dialogue found, create empty dialogue for each panel
-        if not dialogues:
-            dialogues = [""] * 6
-        else:
-            # Ensure we have exactly 6 dialogue entries
-            while len(dialogues) < 6:
-                dialogues.append("")
-            dialogues = dialogues[:6]
-            
-        return dialogues
+        # As many entries as the story has panels; missing dialogue is empty
+        if panel_count is None:
+            panel_count = len(self._extract_panels(story_text))
+        return _fit(dialogues, panel_count)
 
-    def _run(self, story_text: str, action: str) -> str:
+    def _run(self, story_text: str, action: str, panel_count: Optional[int] = None) -> str:
         """Parse the story text and extract panel descriptions or dialogue."""
         try:
             if action == "extract_panels":
-                panels = self._extract_panels(story_text)
+                panels = self._extract_panels(story_text, panel_count)
                 return panels
             elif action == "extract_dialogue":
-                dialogues = self._extract_dialogue(story_text)
+                dialogues = self._extract_dialogue(story_text, panel_count)
                 return dialogues
             else:
                 return f"Unknown action: {action}. Use 'extract_panels' or 'extract_dialogue'."
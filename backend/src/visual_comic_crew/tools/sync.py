@@ -1,13 +1,13 @@
 """
 Sync handling utilities for comic panel generation
-Provides polling logic to wait for file synchronization between backend and frontend
+Waits for file synchronization between backend and frontend
 """
-import time
 import os
 from pathlib import Path
 from typing import Dict, List, Tuple
 from src.utils.path_utils import get_repo_root, get_backend_output_path, get_frontend_public_path
-from src.utils.registry_utils import update_registry_entry,read_registry
+from src.utils.registry_utils import update_registry_entry,read_registry,registry_transaction
+from src.utils.file_waiter import wait_for_files
 
 
 def _dbg(msg: str):
@@ -17,65 +17,55 @@ def poll_for_image_sync(panel_paths: Dict[str, str],
                        backend_dir: str = None,
                        frontend_dir: str = None, 
                        retries: int = 3, 
-                       delay: float = 2.5) -> Dict[str, Dict[str, bool]]:
+                       delay: float = 2.5,
+                       timeout: float = None) -> Dict[str, Dict[str, bool]]:
     """
-    Poll for image synchronization between backend and frontend directories.
+    Wait for image synchronization between backend and frontend directories.
+    Returns as soon as every file is fully written instead of sleeping between polls.
     
     Args:
         panel_paths: Dict mapping panel_id to filename
         backend_dir: Backend directory path
         frontend_dir: Frontend directory path  
-        retries: Number of polling attempts
-        delay: Delay between polling attempts in seconds
+        retries: Number of polling attempts (only used to derive the default timeout)
+        delay: Delay between polling attempts in seconds (only used to derive the default timeout)
+        timeout: Seconds to wait for all panels at most (default: retries * delay)
         
     Returns:
         Dict mapping panel_id to sync status {'backend': bool, 'frontend': bool, 'verified': bool}
     """
-    _dbg(f"Starting sync polling for {len(panel_paths)} panels")
+    _dbg(f"Starting sync wait for {len(panel_paths)} panels")
     
     # Use repo-relative paths for backend and frontend comic panels
     
     backend_path = get_backend_output_path("comic_panels")
     frontend_path = get_frontend_public_path("comic_panels")
     
-    sync_status = {}
+    # One deadline for all panels; panels that are already on disk return immediately
+    files = {}
+    for panel_id, filename in panel_paths.items():
+        files[panel_id] = (backend_path / filename, frontend_path / filename)
+    ready = wait_for_files([path for pair in files.values() for path in pair],
+                           timeout=retries * delay if timeout is None else timeout)
     
-    for attempt in range(retries):
-        _dbg(f"Polling attempt {attempt + 1}/{retries}")
+    sync_status = {}
+    for panel_id, (backend_file, frontend_file) in files.items():
+        backend_exists = ready[str(backend_file)] and backend_file.is_file()
+        frontend_exists = ready[str(frontend_file)] and frontend_file.is_file()
+        verified = backend_exists and frontend_exists
         
-        for panel_id, filename in panel_paths.items():
-            if panel_id in sync_status and sync_status[panel_id]['verified']:
-                continue  # Skip already verified panels
-                
-            backend_file = backend_path / filename
-            frontend_file = frontend_path / filename
-            
-            backend_exists = backend_file.exists() and backend_file.is_file()
-            frontend_exists = frontend_file.exists() and frontend_file.is_file()
-            verified = backend_exists and frontend_exists
-            
-            sync_status[panel_id] = {
-                'filename': filename,
-                'backend': backend_exists,
-                'frontend': frontend_exists, 
-                'verified': verified
-            }
-            
-            _dbg(f"  {panel_id}: backend={backend_exists}, frontend={frontend_exists}, verified={verified}")
+        sync_status[panel_id] = {
+            'filename': panel_paths[panel_id],
+            'backend': backend_exists,
+            'frontend': frontend_exists, 
+            'verified': verified
+        }
         
-        # Check if all panels are synced
-        all_verified = all(status['verified'] for status in sync_status.values())
-        if all_verified:
-            _dbg("All panels verified - sync complete!")
-            break
-            
-        if attempt < retries - 1:  # Don't sleep on last attempt
-            _dbg(f"Waiting {delay}s before next poll...")
-            time.sleep(delay)
+        _dbg(f"  {panel_id}: backend={backend_exists}, frontend={frontend_exists}, verified={verified}")
     
     # Final status
     verified_count = sum(1 for status in sync_status.values() if status['verified'])
-    _dbg(f"Sync polling complete: {verified_count}/{len(panel_paths)} panels verified")
+    _dbg(f"Sync wait complete: {verified_count}/{len(panel_paths)} panels verified")
     
     return sync_status
 
@@ -87,27 +77,26 @@ def update_panel_registry(sync_status: Dict[str, Dict[str, str | bool]]) -> None
     Args:
         sync_status: Output from poll_for_image_sync
     """
-    from .registry import get_panel_status
-    
     _dbg(f"Updating registry with sync status for {len(sync_status)} panels")
     
-    for panel_id, status in sync_status.items():
-        # Check existing registry status
-        existing_status = get_panel_status(panel_id)
-        
-        # If panel was already verified, don't downgrade unless we have better info
-        if existing_status.get('verified') and not status['verified']:
-            _dbg(f"Preserving verified status for {panel_id} (was already verified)")
-            continue
+    # One locked read-check-write for all panels instead of a full rewrite per panel
+    with registry_transaction() as transaction:
+        for panel_id, status in sync_status.items():
+            # Check existing registry status
+            existing_status = transaction.get(panel_id)
+            
+            # If panel was already verified, don't downgrade unless we have better info
+            if existing_status.get('verified') and not status['verified']:
+                _dbg(f"Preserving verified status for {panel_id} (was already verified)")
+                continue
 
-      
-        update_registry_entry(
-        panel_id=panel_id,
-            filename=status['filename'],
-            backend=status['backend'],
-            frontend=status['frontend'],
-            verified=status['verified']
-        )
+            transaction.update(
+                panel_id=panel_id,
+                filename=status['filename'],
+                backend=status['backend'],
+                frontend=status['frontend'],
+                verified=status['verified']
+            )
     
     _dbg("Registry update complete")
 
@@ -2,7 +2,7 @@ from crewai.tools import BaseTool
 from typing import Type, Dict, List, Union
 from pydantic import BaseModel, Field
 import json
-from src.utils.registry_utils import read_registry
+from src.utils.registry_utils import registry_snapshot
 
 class VisualDirectorOutputFormatterSchema(BaseModel):
     """Input for VisualDirectorOutputFormatter."""
@@ -21,7 +21,7 @@ class VisualDirectorOutputFormatter(BaseTool):
         if action == "format_output":
             # Get panel information from registry
             try:
-                registry = read_registry()
+                registry = registry_snapshot()
                 panel_map = {}
                 for panel_id, panel_data in registry.items():
                     if panel_id.startswith("panel_"):
@@ -36,7 +36,7 @@ class VisualDirectorOutputFormatter(BaseTool):
         elif action == "get_panel_map":
             # Get panel information from registry
             try:
-                registry = read_registry()
+                registry = registry_snapshot()
                 panel_map = {}
                 for panel_id, panel_data in registry.items():
                     if panel_id.startswith("panel_"):
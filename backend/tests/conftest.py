@@ -0,0 +1,117 @@
+"""
+Shared test helpers.
+
+FakeImageServer stands in for the Gemini image server in the image client tests. The test
+scripts import it with `from conftest import FakeImageServer`, which works under pytest and
+when a test file is run on its own.
+"""
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Tuple, Union
+
+Reply = Union[Dict[str, Any], bytes]
+
+
+def _success(body: Dict[str, Any], index: int) -> Tuple[int, Reply]:
+    return 200, {"status": "success", "image_path": f"output/{body['prompt']}.png"}
+
+
+class FakeImageServer:
+    """
+    Image server stub on a free local port; usable as a context manager.
+
+    respond(body, index) returns (status, reply) for the index-th request (0-based): a dict
+    is sent as JSON, bytes as an image/png body. delay, a number or a function of the index,
+    is slept before answering. GET requests (health checks) get health_status.
+    """
+
+    def __init__(self, respond: Callable[[Dict[str, Any], int], Tuple[int, Reply]] = _success,
+                 delay: Union[float, Callable[[int], float]] = 0.0, health_status: int = 200):
+        self.respond = respond
+        self.delay = delay
+        self.health_status = health_status
+        # Request bodies in arrival order, and the client port of each connection used
+        self.requests: List[Dict[str, Any]] = []
+        self.client_ports = set()
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self._closed = False
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    @property
+    def port(self) -> int:
+        return self._server.server_port
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}/generate-image/"
+
+    @property
+    def prompts(self) -> List[str]:
+        with self._lock:
+            return [body.get("prompt") for body in self.requests]
+
+    @property
+    def calls(self) -> int:
+        with self._lock:
+            return len(self.requests)
+
+    def close(self):
+        """Stop serving and release the port; later requests are refused."""
+        if not self._closed:
+            self._closed = True
+            self._server.shutdown()
+            self._server.server_close()
+
+    def __enter__(self) -> "FakeImageServer":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _record(self, body: Dict[str, Any], client_port: int) -> int:
+        with self._lock:
+            self.requests.append(body)
+            self.client_ports.add(client_port)
+            return len(self.requests) - 1
+
+    def _handler(self):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                self._reply(fake.health_status, {"status": "ok"}, 0)
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])) or b"{}")
+                index = fake._record(body, self.client_address[1])
+                time.sleep(fake.delay(index) if callable(fake.delay) else fake.delay)
+                status, reply = fake.respond(body, index)
+                self._reply(status, reply, index)
+
+            def _reply(self, status: int, reply: Reply, index: int):
+                if isinstance(reply, bytes):
+                    content_type, data = "image/png", reply
+                else:
+                    content_type, data = "application/json", json.dumps(reply).encode()
+                try:
+                    self.send_response(status)
+                    self.send_header("Content-Type", content_type)
+                    self.send_header("Content-Length", str(len(data)))
+                    if isinstance(reply, bytes):
+                        self.send_header("X-Image-Filename", f"image_{index}.png")
+                    self.end_headers()
+                    self.wfile.write(data)
+                except (BrokenPipeError, ConnectionResetError):
+                    # The client gave up (timeout or hedged request); nothing to answer
+                    pass
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
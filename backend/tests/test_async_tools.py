@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Test the async image request path: concurrent agenerate() calls share one event loop,
+errors map to the same exceptions as the sync path, and the tools' _arun() uses it.
+"""
+import asyncio
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import requests
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import src.utils.image_client as image_client
+import src.utils.reference_staging as reference_staging
+from src.utils.image_client import ImageServerClient
+from src.utils.resilience import RetryPolicy
+from src.utils.singleflight import AsyncSingleFlight
+from src.utils.reference_staging import ReferenceStager
+from src.visual_comic_crew.tools.gemini_image_tool import GeminiImageTool
+from src.visual_comic_crew.tools.image_refinement_tool import ImageRefinementTool
+from conftest import FakeImageServer
+
+# Seconds the fake image server takes per request
+SERVER_DELAY = 0.3
+
+
+def _respond(body, index):
+    """Rejects prompts starting with "bad", refuses ones mentioning "refuse", draws the rest."""
+    if body["prompt"].startswith("bad"):
+        return 400, {"detail": "prompt rejected"}
+    if "refuse" in body["prompt"]:
+        return 200, {"status": "error", "message": "no image for you"}
+    return 200, {"status": "success", "image_path": f"output/{body['prompt']}.png"}
+
+
+def _start_server() -> FakeImageServer:
+    return FakeImageServer(_respond, delay=SERVER_DELAY)
+
+
+def _client(server, **kwargs) -> ImageServerClient:
+    kwargs.setdefault("retry_policy", RetryPolicy(1, 0.0, 0.0))
+    return ImageServerClient(server_url=server.url, hedging=False, **kwargs)
+
+
+def test_concurrent_requests_overlap():
+    """Twenty slow requests on one event loop finish in about one server delay."""
+    server = _start_server()
+    try:
+        client = _client(server, pool_size=20)
+
+        async def main():
+            start = time.monotonic()
+            results = await asyncio.gather(*(
+                client.agenerate({"prompt": f"panel{i}"}, tool="TestTool", use_cache=False) for i in range(20)
+            ))
+            elapsed = time.monotonic() - start
+            await client.aclose()
+            return results, elapsed
+
+        results, elapsed = asyncio.run(main())
+        assert [r["image_path"] for r in results] == [f"output/panel{i}.png" for i in range(20)]
+        assert all(r["outcome"]["attempts"] == 1 for r in results)
+        assert elapsed < 20 * SERVER_DELAY / 3, elapsed
+        client.close()
+    finally:
+        server.close()
+
+
+def test_errors_match_sync_path():
+    server = _start_server()
+    try:
+        client = _client(server)
+
+        async def main():
+            try:
+                await client.agenerate({"prompt": "bad prompt"}, tool="TestTool", use_cache=False)
+            except requests.HTTPError as e:
+                assert e.response.status_code == 400
+                assert "prompt rejected" in e.response.text
+            else:
+                raise AssertionError("expected HTTPError")
+            await client.aclose()
+
+        asyncio.run(main())
+        client.close()
+    finally:
+        server.close()
+
+    # Nothing listens on the port any more
+    client = _client(server)
+
+    async def refused():
+        try:
+            await client.agenerate({"prompt": "panel"}, tool="TestTool", use_cache=False)
+        except requests.ConnectionError:
+            pass
+        else:
+            raise AssertionError("expected ConnectionError")
+        await client.aclose()
+
+    asyncio.run(refused())
+    client.close()
+
+
+def test_async_singleflight_coalesces():
+    flights = AsyncSingleFlight("test")
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await asyncio.sleep(0.1)
+        return "image"
+
+    async def main():
+        return await asyncio.gather(*(flights.do("key", fetch) for _ in range(5)))
+
+    results = asyncio.run(main())
+    assert len(calls) == 1
+    assert [result for result, _ in results] == ["image"] * 5
+    assert sorted(shared for _, shared in results) == [False, True, True, True, True]
+
+
+class _SlowGovernor:
+    """Rate governor whose turn arrives after a delay; counts slots taken and given back."""
+    enabled = True
+
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.taken = 0
+        self.released = 0
+        # Keep the slots alive, so garbage collection cannot release a leaked one
+        self.slots = []
+
+    def slot(self, cancel_token=None):
+        slot = self._slot()
+        self.slots.append(slot)
+        return slot
+
+    @contextmanager
+    def _slot(self):
+        time.sleep(self.delay)
+        self.taken += 1
+        try:
+            yield self.delay
+        finally:
+            self.released += 1
+
+
+def test_cancelled_wait_gives_the_slot_back():
+    """A request cancelled while waiting for its governor turn does not keep the slot."""
+    server = _start_server()
+    client = _client(server)
+    governor = _SlowGovernor(0.2)
+    endpoint = client.pool.endpoints[0]
+    endpoint.governor = governor
+
+    async def main():
+        task = asyncio.ensure_future(client.apost({"prompt": "never sent"}, endpoint=endpoint))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        try:
+            await task
+            assert False, "expected CancelledError"
+        except asyncio.CancelledError:
+            pass
+        await asyncio.sleep(0.3)
+
+    try:
+        asyncio.run(main())
+        assert governor.taken == 1 and governor.released == 1
+        assert server.prompts == []
+    finally:
+        client.close()
+        server.close()
+
+
+def test_gemini_tool_arun():
+    """The tool's async path reports server errors the same way _run() does."""
+    server = _start_server()
+    original = image_client._client, image_client._client_pid
+    try:
+        image_client._client, image_client._client_pid = _client(server), image_client.os.getpid()
+        tool = GeminiImageTool()
+
+        async def main():
+            return await asyncio.gather(tool._arun("refuse this panel"), tool._arun("bad panel"), tool._arun("  "))
+
+        refused, rejected, empty = asyncio.run(main())
+        assert refused == "Error: no image for you"
+        assert rejected.startswith("Error: Bad response from image server") and "status=400" in rejected
+        assert empty == "Error: Prompt cannot be empty."
+        assert sorted(server.prompts) == ["bad panel", "refuse this panel"]
+        image_client._client.close()
+    finally:
+        image_client._client, image_client._client_pid = original
+        server.close()
+
+
+def test_refinement_tool_arun():
+    """The refinement tool's async path stages the base image, reports refusals and releases it."""
+    server = _start_server()
+    original = image_client._client, image_client._client_pid
+    original_stager = reference_staging._stager
+    with tempfile.TemporaryDirectory() as tmp:
+        try:
+            image_client._client, image_client._client_pid = _client(server), image_client.os.getpid()
+            reference_staging._stager = ReferenceStager(staging_dir=Path(tmp) / "staged")
+            base_image = Path(tmp) / "panel_1.png"
+            base_image.write_bytes(b"panel")
+            tool = ImageRefinementTool()
+
+            async def main():
+                return await asyncio.gather(tool._arun(str(base_image), "refuse the new colours"),
+                                            tool._arun(str(Path(tmp) / "missing.png"), "brighter"))
+
+            refused, missing = asyncio.run(main())
+            assert refused == "❌ Refinement failed: no image for you"
+            assert missing.startswith("❌ Base image not found")
+            assert len(server.prompts) == 1 and "refuse the new colours" in server.prompts[0]
+            staged = [p for p in (Path(tmp) / "staged").iterdir() if not p.name.startswith(".")]
+            assert len(staged) == 1 and reference_staging._stager.refcount(str(staged[0])) == 0
+            image_client._client.close()
+        finally:
+            image_client._client, image_client._client_pid = original
+            reference_staging._stager = original_stager
+            server.close()
+
+
+if __name__ == "__main__":
+    test_concurrent_requests_overlap()
+    test_errors_match_sync_path()
+    test_async_singleflight_coalesces()
+    test_cancelled_wait_gives_the_slot_back()
+    test_gemini_tool_arun()
+    test_refinement_tool_arun()
+    print("✅ All async tool tests passed")
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Test the batch scheduler: concurrency limit, aggregate progress, queue-full retries and
+launching the next topic as soon as a run settles.
+"""
+import sys
+import threading
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils import batch_scheduler as batch_module
+from src.utils.batch_scheduler import BatchScheduler
+from src.utils.job_manager import JobQueueFullError
+from src.utils.run_events import RunEventBuffer
+
+
+class FakeLauncher:
+    """Launches runs as open buffers that the test closes by hand."""
+
+    def __init__(self, full_times: int = 0, cached: bool = False):
+        self.buffers = []
+        self.full_times = full_times
+        self.cached = cached
+        self.lock = threading.Lock()
+
+    def __call__(self, topic, options):
+        with self.lock:
+            if self.full_times > 0:
+                self.full_times -= 1
+                raise JobQueueFullError("full")
+            buffer = RunEventBuffer(f"run{len(self.buffers)}")
+            self.buffers.append(buffer)
+        if self.cached:
+            # A cached topic is answered before the launcher returns
+            buffer.publish('complete', status='complete')
+            buffer.close()
+        return buffer
+
+    def finish(self, index, event_type='complete'):
+        buffer = self.buffers[index]
+        buffer.publish(event_type, status=event_type)
+        buffer.close()
+
+
+def test_concurrency_limit_and_progress():
+    """Only max_concurrency runs are in flight; closing one launches the next."""
+    launcher = FakeLauncher()
+    scheduler = BatchScheduler(launcher)
+    batch = scheduler.create(["a", "b", "c", " "], max_concurrency=2)
+
+    assert len(batch.items) == 3
+    assert len(launcher.buffers) == 2
+    assert batch.progress()['running'] == 2
+
+    launcher.finish(0)
+    assert len(launcher.buffers) == 3
+    launcher.finish(1, 'error')
+    launcher.finish(2)
+
+    progress = scheduler.get(batch.batch_id).progress()
+    assert progress['completed'] == 2
+    assert progress['failed'] == 1
+    assert progress['percent'] == 100.0
+    assert progress['comics_per_hour'] > 0
+    assert batch.to_dict()['status'] == 'finished'
+
+
+def test_queue_full_retried():
+    """A full job queue leaves the topic pending and retries it later."""
+    batch_module.QUEUE_FULL_RETRY_SECONDS = 0.05
+    launcher = FakeLauncher(full_times=1)
+    scheduler = BatchScheduler(launcher)
+    batch = scheduler.create(["only topic"], max_concurrency=1)
+    assert batch.items[0].status == 'pending'
+
+    for _ in range(100):
+        if launcher.buffers:
+            break
+        threading.Event().wait(0.02)
+    assert batch.items[0].status == 'running'
+    launcher.finish(0)
+    assert batch.items[0].status == 'completed'
+
+
+def test_settled_run_frees_its_slot():
+    """The next topic starts once a run's crew result is in, not when its PDF is done."""
+    launcher = FakeLauncher()
+    scheduler = BatchScheduler(launcher)
+    batch = scheduler.create(["a", "b"], max_concurrency=1)
+    assert len(launcher.buffers) == 1
+
+    first = launcher.buffers[0]
+    first.publish('complete', status='complete')
+    first.settle()
+    assert not first.closed
+    assert batch.items[0].status == 'completed'
+    assert len(launcher.buffers) == 2
+
+    first.close()  # the export finishing later does not count the run twice
+    assert len(launcher.buffers) == 2
+
+
+def test_cached_topics_do_not_recurse():
+    """A large batch of cached topics is launched in a loop rather than by recursion."""
+    topics = [f"topic {i}" for i in range(3000)]
+    original_size, original_limit = batch_module.MAX_BATCH_SIZE, sys.getrecursionlimit()
+    batch_module.MAX_BATCH_SIZE = len(topics)
+    sys.setrecursionlimit(1000)
+    try:
+        launcher = FakeLauncher(cached=True)
+        scheduler = BatchScheduler(launcher)
+        batch = scheduler.create(topics, max_concurrency=1)
+    finally:
+        batch_module.MAX_BATCH_SIZE = original_size
+        sys.setrecursionlimit(original_limit)
+    assert batch.done
+    assert batch.progress()['completed'] == len(batch.items)
+
+
+def test_empty_batch_rejected():
+    scheduler = BatchScheduler(FakeLauncher())
+    try:
+        scheduler.create(["", "  "])
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_concurrency_limit_and_progress()
+    test_queue_full_retried()
+    test_settled_run_frees_its_slot()
+    test_cached_topics_do_not_recurse()
+    test_empty_batch_rejected()
+    print("All batch scheduler tests passed")
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Test cooperative cancellation: tokens, queued job cancellation and tool short-circuiting.
+"""
+import sys
+import threading
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.cancellation import CancellationToken, RunCancelledError, cancelled_tool_message, check_cancelled
+from src.utils.job_manager import JobManager
+from src.utils.run_context import RunContext, run_context_scope
+
+
+def test_token_raises_once_cancelled():
+    """A cancelled token raises RunCancelledError, which CrewAI treats like a timeout."""
+    token = CancellationToken()
+    token.raise_if_cancelled()
+    token.cancel("client disconnected")
+    token.cancel("second reason is ignored")
+    assert token.is_cancelled
+    assert token.reason == "client disconnected"
+    try:
+        token.raise_if_cancelled()
+        assert False, "expected RunCancelledError"
+    except RunCancelledError as e:
+        assert isinstance(e, TimeoutError)
+
+
+def test_queued_job_cancelled_before_start():
+    """Cancelling a job that is still waiting removes it from the queue without running it."""
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    ran = []
+
+    blocker = manager.submit(release.wait, 5, topic="blocker")
+    queued = manager.submit(lambda: ran.append(True), topic="queued")
+    assert manager.cancel(queued.job_id, "test") is True
+    assert queued.status == "cancelled"
+    assert manager.queue_position(queued.job_id) == 0
+
+    release.set()
+    blocker.future.result(timeout=5)
+    manager.shutdown(wait=True)
+    assert ran == []
+
+
+def test_running_job_marked_cancelled():
+    """A running job gets its token set and finishes with status 'cancelled'."""
+    manager = JobManager(max_workers=1)
+    token = CancellationToken()
+    started = threading.Event()
+
+    def job_body():
+        started.set()
+        token.wait(5)
+
+    job = manager.submit(job_body, topic="running", cancel_token=token)
+    assert started.wait(5)
+    assert manager.cancel(job.job_id, "test") is False
+    job.future.result(timeout=5)
+    assert job.status == "cancelled"
+    manager.shutdown(wait=True)
+
+
+def test_tools_skip_work_in_cancelled_run():
+    """Image tools see the cancellation through the active run context."""
+    context = RunContext(run_id="cancel_test")
+    assert cancelled_tool_message("GeminiImageTool") is None
+    with run_context_scope(context):
+        assert cancelled_tool_message("GeminiImageTool") is None
+        context.cancel_token.cancel("client disconnected")
+        message = cancelled_tool_message("GeminiImageTool")
+        assert message is not None and "client disconnected" in message
+        try:
+            check_cancelled()
+            assert False, "expected RunCancelledError"
+        except RunCancelledError:
+            pass
+
+
+if __name__ == "__main__":
+    test_token_raises_once_cancelled()
+    test_queued_job_cancelled_before_start()
+    test_running_job_marked_cancelled()
+    test_tools_skip_work_in_cancelled_run()
+    print("All cancellation tests passed")
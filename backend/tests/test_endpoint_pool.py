@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test load balancing over several image servers: endpoint selection, failover to another
+endpoint on retry, and ejection of endpoints that fail their health checks.
+"""
+import sys
+import threading
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.endpoint_pool import EndpointPool, parse_endpoints
+from src.utils.image_client import ImageServerClient
+from src.utils.resilience import RetryPolicy
+from conftest import FakeImageServer
+
+
+def _server(delay=0.0, status=200) -> FakeImageServer:
+    """Image server stub that answers every request, health checks included, after delay with status."""
+    def respond(body, index):
+        return status, {"status": "success", "image_path": f"output/call_{index}.png"}
+
+    return FakeImageServer(respond, delay=delay, health_status=status)
+
+
+def _client(urls, **kwargs):
+    kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=2, base_delay=0.01, max_delay=0.01))
+    return ImageServerClient(server_url=",".join(urls), hedging=False, **kwargs)
+
+
+def test_parse_endpoints():
+    assert parse_endpoints("http://a/, http://b/ http://a/") == ["http://a/", "http://b/"]
+    assert parse_endpoints("http://a/") == ["http://a/"]
+
+
+def test_least_outstanding_spreads_concurrent_requests():
+    servers = [_server(delay=0.2) for _ in range(3)]
+    try:
+        client = _client([server.url for server in servers])
+        threads = [threading.Thread(target=client.generate, args=({"prompt": f"Panel {i}"},),
+                                    kwargs={"tool": "TestTool", "use_cache": False}) for i in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert [server.calls for server in servers] == [2, 2, 2]
+        client.close()
+    finally:
+        for server in servers:
+            server.close()
+
+
+def test_latency_strategy_prefers_fast_endpoint():
+    pool = EndpointPool(["http://slow/", "http://fast/"], strategy="latency", health_interval=0)
+    slow, fast = pool.endpoints
+    slow.observe(2.0)
+    fast.observe(0.5)
+    assert pool.pick().url == "http://fast/"
+    # Four requests in flight on the fast node make the idle slow node the better choice
+    fast.outstanding = 4
+    assert pool.pick().url == "http://slow/"
+
+
+def test_retry_fails_over_to_another_endpoint():
+    with _server() as good, _server(status=503) as bad:
+        client = _client([bad.url, good.url])
+        for i in range(4):
+            result = client.generate({"prompt": f"Panel {i}"}, tool="TestTool", use_cache=False)
+            assert result["outcome"]["status"] == "success"
+            assert result["outcome"]["endpoint"] == good.url
+        assert good.calls == 4
+        # The failing node is not hammered: at most one try per call, none once its circuit opens
+        assert bad.calls <= 4
+        client.close()
+
+
+def test_health_checks_eject_and_readmit():
+    live = _server()
+    live_url = live.url
+    pool = EndpointPool([live_url, "http://127.0.0.1:9/generate-image/"], health_interval=0)
+    pool.check_health()
+    pool.check_health()
+    status = {entry["url"]: entry["healthy"] for entry in pool.status()}
+    assert status == {live_url: True, "http://127.0.0.1:9/generate-image/": False}
+    # Ejected endpoints only get traffic when nothing else is left
+    assert all(pool.pick().url == live_url for _ in range(5))
+    live.close()
+    pool.check_health()
+    pool.check_health()
+    assert not any(entry["healthy"] for entry in pool.status())
+    assert pool.pick() is not None
+
+
+if __name__ == "__main__":
+    test_parse_endpoints()
+    test_least_outstanding_spreads_concurrent_requests()
+    test_latency_strategy_prefers_fast_endpoint()
+    test_retry_fails_over_to_another_endpoint()
+    test_health_checks_eject_and_readmit()
+    print("All endpoint pool tests passed")
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test the background export pipeline: exports run in a separate process and report back.
+"""
+import os
+import sys
+import threading
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.export_pipeline import ExportPipeline
+
+
+def fake_export(topic, markdown_content, timestamp):
+    """Stand-in for export_pdf; returns the pid so the test can see it ran in another process."""
+    if "fail" in topic:
+        raise RuntimeError("renderer crashed")
+    return f"{topic}_{timestamp}_{os.getpid()}.pdf"
+
+
+def test_export_runs_in_worker_process():
+    """The export result comes from a pool process and triggers the done callback."""
+    pipeline = ExportPipeline(max_workers=1, export_func=fake_export)
+    done = threading.Event()
+    finished = []
+
+    def on_done(job):
+        finished.append(job)
+        done.set()
+
+    job = pipeline.submit("run1", "cat_comic", "# Cat", "20250101_000000", markdown_path="cat.md", on_done=on_done)
+    assert pipeline.get("run1") is job
+    assert done.wait(60)
+    assert job.status == "ready"
+    assert job.pdf_path.startswith("cat_comic_20250101_000000_")
+    assert not job.pdf_path.endswith(f"_{os.getpid()}.pdf")
+    assert finished == [job]
+    pipeline.shutdown(wait=True)
+
+
+def test_export_failure_reported():
+    """A failing renderer marks the job failed instead of raising into the caller."""
+    pipeline = ExportPipeline(max_workers=1, export_func=fake_export)
+    done = threading.Event()
+    job = pipeline.submit("run2", "fail_comic", "# Fail", "20250101_000000", on_done=lambda _job: done.set())
+    assert done.wait(60)
+    assert job.status == "failed"
+    assert "renderer crashed" in job.error
+    pipeline.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    test_export_runs_in_worker_process()
+    test_export_failure_reported()
+    print("All export pipeline tests passed")
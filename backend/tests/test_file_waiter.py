@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Test the file readiness waiter: immediate return for written files, early wake-up when a
+file lands, the polling fallback and timeouts.
+"""
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import src.utils.file_waiter as file_waiter
+from src.utils.file_waiter import wait_for_file, wait_for_files
+
+
+def _write_later(path: Path, delay: float, data: bytes = b"image-bytes"):
+    def write():
+        time.sleep(delay)
+        with open(path, "wb") as f:
+            f.write(data)
+    thread = threading.Thread(target=write)
+    thread.start()
+    return thread
+
+
+def test_existing_file_returns_immediately():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "panel.png"
+        path.write_bytes(b"done")
+        time.sleep(file_waiter.SETTLE_SECONDS)
+        start = time.monotonic()
+        assert wait_for_file(path, timeout=2)
+        assert time.monotonic() - start < 0.2
+
+
+def test_wakes_up_when_file_lands():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "panel.png"
+        writer = _write_later(path, 0.2)
+        start = time.monotonic()
+        assert wait_for_file(path, timeout=5)
+        elapsed = time.monotonic() - start
+        writer.join()
+        # Far below the old 1s polling step
+        assert 0.15 < elapsed < 0.8
+        assert path.read_bytes() == b"image-bytes"
+
+
+def test_polling_fallback():
+    original = file_waiter._libc
+    file_waiter._libc = None
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "panel.png"
+            writer = _write_later(path, 0.1)
+            assert wait_for_file(path, timeout=5)
+            writer.join()
+    finally:
+        file_waiter._libc = original
+
+
+def test_timeout_for_missing_files():
+    with tempfile.TemporaryDirectory() as tmp:
+        start = time.monotonic()
+        assert not wait_for_file(Path(tmp) / "never.png", timeout=0.2)
+        assert not wait_for_file(Path(tmp) / "missing_dir" / "never.png", timeout=0.1)
+        assert time.monotonic() - start < 1.0
+
+
+def test_wait_for_files_shares_one_deadline():
+    with tempfile.TemporaryDirectory() as tmp:
+        present = Path(tmp) / "a.png"
+        present.write_bytes(b"a")
+        missing = [Path(tmp) / f"missing_{i}.png" for i in range(3)]
+        start = time.monotonic()
+        result = wait_for_files([present] + missing, timeout=0.3)
+        assert time.monotonic() - start < 0.8
+        assert result[str(present)] is True
+        assert not any(result[str(path)] for path in missing)
+
+
+if __name__ == "__main__":
+    test_existing_file_returns_immediately()
+    test_wakes_up_when_file_lands()
+    test_polling_fallback()
+    test_timeout_for_missing_files()
+    test_wait_for_files_shares_one_deadline()
+    print(f"All file waiter tests passed (inotify: {file_waiter.inotify_available()})")
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Test the content-addressed image cache: keys, LRU eviction under a byte budget and the
+cache in front of the image server.
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import src.utils.image_client as image_client
+from src.utils.image_cache import ImageCache, make_image_key
+from conftest import FakeImageServer
+
+
+def _write(path: Path, data: bytes) -> Path:
+    path.write_bytes(data)
+    return path
+
+
+def test_key_uses_base_image_contents():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        first = _write(tmp / "luna.png", b"luna-reference")
+        (tmp / "staged").mkdir()
+        staged_copy = _write(tmp / "staged" / "luna.png", b"luna-reference")
+        other = _write(tmp / "max.png", b"max-reference")
+
+        assert make_image_key("Panel 1: park", [str(first)]) == make_image_key("Panel 1: park", [str(staged_copy)])
+        assert make_image_key("Panel 1: park", [str(first)]) != make_image_key("Panel 1: park", [str(other)])
+        assert make_image_key("Panel 1: park") != make_image_key("Panel 2: park")
+        assert make_image_key("Panel 1: park", model="a") != make_image_key("Panel 1: park", model="b")
+
+
+def test_put_and_get():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = ImageCache(cache_dir=tmp / "cache", max_bytes=1000)
+        source = _write(tmp / "generated.png", b"x" * 100)
+        key = make_image_key("Panel 1: park")
+
+        assert cache.get(key) is None
+        cached = cache.put(key, source, prompt="Panel 1: park")
+        assert cached.read_bytes() == b"x" * 100
+        assert cache.get(key) == cached
+        assert len(cache) == 1 and cache.total_bytes == 100
+
+        # A second instance sees the same index
+        assert ImageCache(cache_dir=tmp / "cache", max_bytes=1000).get(key) == cached
+        assert cache.invalidate(key)
+        assert cache.get(key) is None and not cached.exists()
+
+
+def test_lru_eviction_by_bytes():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        cache = ImageCache(cache_dir=tmp / "cache", max_bytes=250)
+        keys = [make_image_key(f"prompt {i}") for i in range(3)]
+        for i, key in enumerate(keys[:2]):
+            cache.put(key, _write(tmp / f"{i}.png", b"x" * 100))
+            time.sleep(0.01)
+        time.sleep(0.01)
+        cache.get(keys[0])  # keys[1] is now the least recently used
+        cache.put(keys[2], _write(tmp / "2.png", b"x" * 100))
+
+        assert cache.get(keys[1]) is None
+        assert cache.get(keys[0]) is not None and cache.get(keys[2]) is not None
+        assert cache.total_bytes <= 250
+        # Images larger than the whole budget are not cached
+        assert cache.put(make_image_key("huge"), _write(tmp / "huge.png", b"x" * 300)) is None
+
+
+def test_generate_serves_repeats_from_cache():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+
+        def respond(body, index):
+            image_path = _write(tmp / f"gen_{index + 1}.png", body["prompt"].encode())
+            return 200, {"status": "success", "image_path": str(image_path)}
+
+        cache = ImageCache(cache_dir=tmp / "cache", max_bytes=10_000)
+        original = image_client.get_image_cache
+        image_client.get_image_cache = lambda: cache
+        server = FakeImageServer(respond)
+        try:
+            client = image_client.ImageServerClient(server_url=server.url)
+            first = client.generate({"prompt": "Panel 1: park"}, tool="TestTool")
+            second = client.generate({"prompt": "Panel 1: park"}, tool="TestTool")
+            third = client.generate({"prompt": "Panel 1: park"}, tool="TestTool", use_cache=False)
+
+            assert server.calls == 2
+            assert "cached" not in first and second["cached"] is True
+            assert Path(second["image_path"]).read_bytes() == b"Panel 1: park"
+            assert "cached" not in third
+            client.close()
+        finally:
+            server.close()
+            image_client.get_image_cache = original
+
+
+if __name__ == "__main__":
+    test_key_uses_base_image_contents()
+    test_put_and_get()
+    test_lru_eviction_by_bytes()
+    test_generate_serves_repeats_from_cache()
+    print("All image cache tests passed")
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Test the shared image server client: keep-alive reuse, timeouts, the per-process singleton
+and the byte transfer modes.
+"""
+import base64
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import src.utils.image_client as image_client
+from src.utils.image_cache import ImageCache
+from src.utils.image_client import ImageServerClient, get_image_client
+from conftest import FakeImageServer
+
+
+def test_connections_are_reused():
+    """Sequential requests through one client share a single keep-alive connection."""
+    with FakeImageServer() as server:
+        client = ImageServerClient(server_url=server.url, pool_size=2)
+        for i in range(5):
+            response = client.post({"prompt": f"panel{i}"}, tool="TestTool")
+            assert response.json()["image_path"] == f"output/panel{i}.png"
+        assert len(server.client_ports) == 1
+        client.close()
+
+
+def test_consistent_timeouts():
+    client = ImageServerClient(server_url="http://127.0.0.1:9/", connect_timeout=3, read_timeout=90)
+    assert client.timeout == (3, 90)
+    client.close()
+
+
+def test_singleton_per_process():
+    assert get_image_client() is get_image_client()
+
+
+def _image_reply(body, index):
+    """The image as raw bytes or as base64 JSON, whichever response_format asks for."""
+    image = f"image:{body['prompt']}".encode()
+    if body.get("response_format") == "bytes":
+        return 200, image
+    return 200, {"status": "success", "filename": "gen.png", "image_base64": base64.b64encode(image).decode()}
+
+
+def test_byte_transfer_modes():
+    """
+    base64 and raw-bytes responses come back as image_bytes with a local copy on disk, and the
+    reference images are sent inline instead of as paths on this machine's disk.
+    """
+    original = image_client.get_image_cache
+    with tempfile.TemporaryDirectory() as tmp, FakeImageServer(_image_reply) as server:
+        cache = ImageCache(cache_dir=Path(tmp), max_bytes=10_000)
+        image_client.get_image_cache = lambda: cache
+        try:
+            url = server.url
+            reference = Path(tmp) / "luna.png"
+            reference.write_bytes(b"luna reference")
+            for mode in ("base64", "bytes"):
+                client = ImageServerClient(server_url=url, transfer_mode=mode)
+                result = client.generate({"prompt": f"panel {mode}", "base_image_paths": [str(reference)]},
+                                         tool="TestTool")
+                assert result["image_bytes"] == f"image:panel {mode}".encode()
+                assert Path(result["image_path"]).read_bytes() == result["image_bytes"]
+                client.close()
+            assert [body.get("response_format") for body in server.requests] == ["base64", "bytes"]
+            for body in server.requests:
+                assert "base_image_paths" not in body
+                assert body["base_images"] == [{"filename": "luna.png",
+                                                "image_base64": base64.b64encode(b"luna reference").decode()}]
+        finally:
+            image_client.get_image_cache = original
+
+
+if __name__ == "__main__":
+    test_connections_are_reused()
+    test_consistent_timeouts()
+    test_singleton_per_process()
+    test_byte_transfer_modes()
+    print("All image client tests passed")
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Test the JobManager worker pool: parallel execution, queue positions, failures and the
+finished job history.
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import src.utils.job_manager as job_manager
+from src.utils.job_manager import JobManager, JobQueueFullError
+
+
+def test_jobs_run_in_parallel():
+    """Two workers should run two blocking jobs at the same time."""
+    manager = JobManager(max_workers=2)
+    barrier = threading.Barrier(2, timeout=5)
+
+    def blocking_job():
+        # Both jobs must be running concurrently for the barrier to release
+        barrier.wait()
+        return "done"
+
+    jobs = [manager.submit(blocking_job, topic=f"topic {i}") for i in range(2)]
+    for job in jobs:
+        assert job.future.result(timeout=5) == "done"
+        assert job.status == "completed"
+    manager.shutdown(wait=True)
+
+
+def test_queue_position_reported():
+    """Jobs waiting for a worker report their 1-based queue position."""
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+
+    first = manager.submit(release.wait, 5, topic="first")
+    second = manager.submit(lambda: "second", topic="second")
+    third = manager.submit(lambda: "third", topic="third")
+
+    time.sleep(0.1)
+    assert manager.queue_position(first.job_id) == 0
+    assert manager.queue_position(second.job_id) == 1
+    assert manager.queue_position(third.job_id) == 2
+    assert manager.queue_depth == 2
+
+    release.set()
+    assert third.future.result(timeout=5) == "third"
+    assert manager.queue_position(third.job_id) == 0
+    manager.shutdown(wait=True)
+
+
+def test_failed_job_and_full_queue():
+    """Failures are recorded on the job and a full queue rejects new work."""
+    manager = JobManager(max_workers=1, max_queued=1)
+    release = threading.Event()
+
+    def failing_job():
+        raise RuntimeError("boom")
+
+    blocker = manager.submit(release.wait, 5)
+    time.sleep(0.1)
+    failing = manager.submit(failing_job)
+    try:
+        manager.submit(lambda: None)
+        assert False, "Expected JobQueueFullError"
+    except JobQueueFullError:
+        pass
+
+    release.set()
+    blocker.future.result(timeout=5)
+    try:
+        failing.future.result(timeout=5)
+    except RuntimeError:
+        pass
+    assert failing.status == "failed"
+    assert failing.error == "boom"
+    assert manager.get(failing.job_id) is failing
+    manager.shutdown(wait=True)
+
+
+def test_submit_after_shutdown_leaves_no_pending_job():
+    """A job the pool refuses is not left behind as pending."""
+    manager = JobManager(max_workers=1)
+    manager.shutdown(wait=True)
+    try:
+        manager.submit(lambda: None, job_id="refused")
+        assert False, "Expected RuntimeError"
+    except RuntimeError:
+        pass
+    assert manager.get("refused") is None
+    assert manager.list_jobs() == []
+
+
+def test_list_jobs_reports_queue_positions():
+    manager = JobManager(max_workers=1)
+    release = threading.Event()
+    running = manager.submit(release.wait, 5, topic="running")
+    queued = [manager.submit(lambda: None, topic=f"queued {i}") for i in range(3)]
+    time.sleep(0.1)
+    positions = {info['job_id']: info['queue_position'] for info in manager.list_jobs()}
+    assert positions[running.job_id] == 0
+    assert [positions[job.job_id] for job in queued] == [1, 2, 3]
+    release.set()
+    manager.shutdown(wait=True)
+
+
+def test_cancelled_jobs_respect_the_history_limit():
+    original = job_manager.FINISHED_JOB_HISTORY
+    job_manager.FINISHED_JOB_HISTORY = 3
+    manager = JobManager(max_workers=1, max_queued=10)
+    release = threading.Event()
+    try:
+        manager.submit(release.wait, 5, topic="blocker")
+        queued = [manager.submit(lambda: None, topic=f"queued {i}") for i in range(6)]
+        for job in queued:
+            assert manager.cancel(job.job_id)
+        assert len(manager._finished) == 3
+        assert [job_id for job_id in manager._finished] == [job.job_id for job in queued[-3:]]
+    finally:
+        job_manager.FINISHED_JOB_HISTORY = original
+        release.set()
+        manager.shutdown(wait=True)
+
+
+if __name__ == "__main__":
+    test_jobs_run_in_parallel()
+    test_queue_position_reported()
+    test_failed_job_and_full_queue()
+    test_submit_after_shutdown_leaves_no_pending_job()
+    test_list_jobs_reports_queue_positions()
+    test_cancelled_jobs_respect_the_history_limit()
+    print("✅ JobManager tests passed")
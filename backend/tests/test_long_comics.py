@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Test variable-length comics: panel counts come from the story and the registry, lookups are
+indexed, and layout, validation and layout export can page through hundreds of panels.
+"""
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+from PIL import Image
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.panel_paging import DEFAULT_PANEL_COUNT, describe_page, page_range, resolve_panel_count
+from src.utils.registry_utils import read_registry, update_many
+from src.utils.result_cache import ComicResultCache
+from src.utils.run_context import RunContext, run_context_scope
+from src.utils.story_metadata_manager import StoryMetadataManager
+from src.visual_comic_crew.tools.comic_layout_tool import ComicLayoutTool
+from src.visual_comic_crew.tools.panel_validation_tool import PanelValidationTool
+from src.visual_comic_crew.tools.registry import get_unverified_panels
+from src.visual_comic_crew.tools.story_parser_tool import StoryParserTool
+
+
+def test_page_range():
+    assert page_range(120) == range(1, 121)
+    assert page_range(120, page=3, page_size=50) == range(101, 121)
+    assert describe_page(page_range(120, 3, 50), 120, 3, 50) == "Page 3/3 (panels 101-120 of 120)"
+    try:
+        page_range(120, page=4, page_size=50)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("page 4 of 3 should not exist")
+
+
+def test_parser_keeps_every_panel():
+    story = "\n".join(f'Panel {i}: Scene {i}. "Line {i}"' for i in range(1, 81))
+    parser = StoryParserTool()
+    panels = parser._extract_panels(story)
+    assert len(panels) == 80
+    assert panels[79].startswith("Scene 80")
+    assert len(parser._extract_dialogue(story)) == 80
+    # An explicit count still pads or truncates
+    assert len(parser._extract_panels(story, panel_count=100)) == 100
+    # Unmarked stories are split into the requested number of panels without losing sentences
+    unmarked = " ".join(f"Sentence {i}." for i in range(1, 26))
+    split = parser._extract_panels(unmarked, panel_count=10)
+    assert len(split) == 10
+    assert "Sentence 25" in split[-1]
+
+
+def test_story_index_and_paged_export():
+    run = RunContext.create()
+    try:
+        with run_context_scope(run):
+            story = StoryMetadataManager()
+            story.set_panels([{"number": i, "description": f"Scene {i}", "dialogue": f"Line {i}"}
+                              for i in range(1, 301)])
+            story.set_image_filename(120, "p120.png")
+            reads = []
+            original = story._read_metadata
+            story._read_metadata = lambda: reads.append(1) or original()
+            for i in range(1, 301):
+                assert story.get_panel_by_number(i)["description"] == f"Scene {i}"
+            # One parse for 300 lookups
+            assert len(reads) == 1
+            story._read_metadata = original
+
+            assert resolve_panel_count() == 300
+            page = story.export_for_layout(page=3, page_size=50)
+            assert page["panel_numbers"] == list(range(101, 151))
+            assert page["panels"][0] == "Scene 101"
+            assert page["image_paths"][19].endswith("p120.png")
+            assert page["page_count"] == 6
+            assert len(story.export_for_layout()["panels"]) == 300
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_counts_come_from_the_registry():
+    run = RunContext.create()
+    try:
+        with run_context_scope(run):
+            assert resolve_panel_count() == DEFAULT_PANEL_COUNT
+            update_many({str(i): {"filename": f"p{i}.png", "verified": i % 2 == 0} for i in range(1, 121)})
+            assert resolve_panel_count() == 120
+            unverified = get_unverified_panels()
+            assert len(unverified) == 60 and unverified[-1] == 119
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_validation_pages():
+    run = RunContext.create()
+    try:
+        with run_context_scope(run):
+            update_many({str(i): {"filename": f"missing_{i}.png"} for i in range(1, 121)})
+            report = PanelValidationTool()._run(page=2, page_size=50)
+            assert "Page 2/3 (panels 51-100 of 120)" in report
+            assert "- Panel 51:" in report and "- Panel 100:" in report
+            assert "- Panel 50:" not in report and "- Panel 101:" not in report
+            # Only the page's panels were touched in the registry
+            registry = read_registry()
+            assert registry["panel_51"]["verified"] is False
+            assert "verified" not in registry["panel_101"]
+            assert "does not exist" in PanelValidationTool()._run(page=9, page_size=50)
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_layout_pages():
+    run = RunContext.create()
+    try:
+        with tempfile.TemporaryDirectory() as tmp, run_context_scope(run):
+            image_paths = []
+            for i in range(1, 61):
+                path = Path(tmp) / f"p{i}.png"
+                Image.new("RGB", (4, 4)).save(path)
+                image_paths.append(str(path))
+            markdown = ComicLayoutTool()._run(
+                panels=[f"Scene {i}" for i in range(1, 61)],
+                dialogue=[f"Line {i}" for i in range(1, 61)],
+                image_paths=image_paths, page=2, page_size=25,
+            )
+            assert "Page 2/3 (panels 26-50 of 60)" in markdown
+            assert "![Panel 26](/comic_panels/p26.png)" in markdown
+            assert "Dialogue: Line 50" in markdown
+            assert "Line 51" not in markdown and "Line 25\n" not in markdown
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_result_cache_keys_panel_count():
+    with tempfile.TemporaryDirectory() as tmp:
+        config = Path(tmp) / "agents.yaml"
+        config.write_text("story_writer:\n  role: writer\n")
+        cache = ComicResultCache(cache_dir=Path(tmp) / "cache", config_files=[config])
+        cache.put("dragons", "# Short")
+        cache.put("dragons", "# Long", panel_count=200)
+        assert cache.get("dragons")["markdown"] == "# Short"
+        assert cache.get("dragons", DEFAULT_PANEL_COUNT)["markdown"] == "# Short"
+        assert cache.get("dragons", 200)["markdown"] == "# Long"
+        assert cache.get("dragons", 50) is None
+
+
+if __name__ == "__main__":
+    test_page_range()
+    test_parser_keeps_every_panel()
+    test_story_index_and_paged_export()
+    test_counts_come_from_the_registry()
+    test_validation_pages()
+    test_layout_pages()
+    test_result_cache_keys_panel_count()
+    print("✅ All long comic tests passed")
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Test the metrics registry and its Prometheus text rendering.
+"""
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.metrics import _Metric, MetricsRegistry, track_image_request, IMAGE_SERVER_LATENCY
+
+
+def test_counter_and_gauge_rendering():
+    registry = MetricsRegistry()
+    calls = registry.counter("test_calls_total", "Calls.")
+    depth = registry.gauge("test_depth", "Depth.")
+    calls.inc(tool="GeminiImageTool", outcome="ok")
+    calls.inc(2, tool="GeminiImageTool", outcome="ok")
+    depth.set_function(lambda: 4)
+
+    text = registry.render()
+    assert "# TYPE test_calls_total counter" in text
+    assert 'test_calls_total{outcome="ok",tool="GeminiImageTool"} 3' in text
+    assert "test_depth 4" in text
+    # Registering the same name twice returns the existing metric
+    assert registry.counter("test_calls_total", "Calls.") is calls
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    latency = registry.histogram("test_latency_seconds", "Latency.", buckets=(1, 5))
+    latency.observe(0.5, status="200")
+    latency.observe(3, status="200")
+    latency.observe(10, status="200")
+
+    text = registry.render()
+    assert 'test_latency_seconds_bucket{status="200",le="1"} 1' in text
+    assert 'test_latency_seconds_bucket{status="200",le="5"} 2' in text
+    assert 'test_latency_seconds_bucket{status="200",le="+Inf"} 3' in text
+    assert 'test_latency_seconds_count{status="200"} 3' in text
+    assert 'test_latency_seconds_sum{status="200"} 13.5' in text
+
+
+def test_image_request_timeouts_recorded():
+    """Requests that raise are labelled as timeouts or errors instead of being lost."""
+    before = IMAGE_SERVER_LATENCY.count(tool="TestTool", status="timeout")
+    try:
+        with track_image_request("TestTool"):
+            raise TimeoutError("slow server")
+    except TimeoutError:
+        pass
+    with track_image_request("TestTool") as request_metrics:
+        request_metrics['status'] = 200
+    assert IMAGE_SERVER_LATENCY.count(tool="TestTool", status="timeout") == before + 1
+    assert IMAGE_SERVER_LATENCY.count(tool="TestTool", status="200") >= 1
+
+
+def test_metric_without_samples_cannot_be_created():
+    """A metric type must implement _samples; the base class alone is abstract."""
+    class Incomplete(_Metric):
+        pass
+
+    for cls in (_Metric, Incomplete):
+        try:
+            cls("comic_incomplete", "Missing samples")
+            assert False, "expected TypeError"
+        except TypeError:
+            pass
+
+
+if __name__ == "__main__":
+    test_counter_and_gauge_rendering()
+    test_histogram_buckets_are_cumulative()
+    test_image_request_timeouts_recorded()
+    test_metric_without_samples_cannot_be_created()
+    print("All metrics tests passed")
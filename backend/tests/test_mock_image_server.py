@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Test the mock image server: the /generate-image/ contract, deterministic images, injected
+failures and the concurrency limit.
+"""
+import asyncio
+import base64
+import io
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+from fastapi.testclient import TestClient
+from PIL import Image
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from mock_image_server import LatencyDistribution, MockServerConfig, create_app, render_image
+
+
+def test_path_responses_and_determinism():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = TestClient(create_app(MockServerConfig(output_root=Path(tmp), seed=1)))
+        first = client.post("/generate-image/", json={"prompt": "Panel 1: Luna in the park"}).json()
+        second = client.post("/generate-image/", json={"prompt": "Panel 1: Luna in the park"}).json()
+        assert first["status"] == "success" and first["image_path"].startswith("output/")
+        assert first["image_path"] != second["image_path"]
+        assert (Path(tmp) / first["image_path"]).read_bytes() == (Path(tmp) / second["image_path"]).read_bytes()
+        with Image.open(Path(tmp) / first["image_path"]) as image:
+            assert image.size == (512, 512)
+
+        local = TestClient(create_app(MockServerConfig(output_root=Path(tmp), response_shape="local_path")))
+        body = local.post("/generate-image/", json={"prompt": "Panel 2"}).json()
+        assert body["success"] is True and (Path(tmp) / body["local_path"]).exists()
+
+
+def test_base_images_and_byte_formats():
+    with tempfile.TemporaryDirectory() as tmp:
+        reference = Path(tmp) / "luna_reference.png"
+        reference.write_bytes(render_image("Luna reference", [], 64))
+        client = TestClient(create_app(MockServerConfig(output_root=Path(tmp))))
+
+        with_ref = client.post("/generate-image/", json={"prompt": "Panel 1", "base_image_paths": [str(reference)],
+                                                         "response_format": "base64"}).json()
+        without_ref = client.post("/generate-image/", json={"prompt": "Panel 1", "response_format": "base64"}).json()
+        assert with_ref["image_base64"] != without_ref["image_base64"]
+        Image.open(io.BytesIO(base64.b64decode(with_ref["image_base64"]))).verify()
+
+        raw = client.post("/generate-image/", json={"prompt": "Panel 1", "response_format": "bytes"})
+        assert raw.headers["content-type"] == "image/png" and raw.headers["x-image-filename"].endswith(".png")
+        assert raw.content == base64.b64decode(without_ref["image_base64"])
+
+        missing = client.post("/generate-image/", json={"prompt": "Panel 1", "base_image_paths": [str(Path(tmp) / "nope.png")]})
+        assert missing.status_code == 400
+
+        # Inline references (no shared disk) render the same image as references by path
+        inline = {"filename": reference.name, "image_base64": base64.b64encode(reference.read_bytes()).decode()}
+        with_inline = client.post("/generate-image/", json={"prompt": "Panel 1", "base_images": [inline],
+                                                            "response_format": "base64"}).json()
+        assert with_inline["image_base64"] == with_ref["image_base64"]
+
+        broken = client.post("/generate-image/", json={"prompt": "Panel 1", "base_images": [{"image_base64": "not base64!"}]})
+        assert broken.status_code == 400
+
+
+def test_failure_rate():
+    with tempfile.TemporaryDirectory() as tmp:
+        client = TestClient(create_app(MockServerConfig(output_root=Path(tmp), failure_rate=1.0, failure_status=503)))
+        assert client.post("/generate-image/", json={"prompt": "Panel 1"}).status_code == 503
+        assert client.get("/stats").json()["failed"] == 1
+
+
+def test_concurrency_limit():
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(MockServerConfig(output_root=Path(tmp), latency="fixed:0.2", max_concurrency=2))
+
+        async def burst():
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://mock") as client:
+                start = time.monotonic()
+                responses = await asyncio.gather(*[
+                    client.post("/generate-image/", json={"prompt": f"Panel {i}", "response_format": "base64"})
+                    for i in range(4)
+                ])
+                return responses, time.monotonic() - start
+
+        responses, elapsed = asyncio.run(burst())
+        assert all(response.status_code == 200 for response in responses)
+        # Four requests of 0.2s, two at a time
+        assert elapsed >= 0.38
+        assert app.state.stats.to_dict()["max_in_flight"] == 2
+
+
+def test_latency_distributions():
+    import random
+    rng = random.Random(0)
+    assert LatencyDistribution("fixed:1.5").sample(rng) == 1.5
+    assert all(1 <= LatencyDistribution("uniform:1,2").sample(rng) <= 2 for _ in range(50))
+    assert all(LatencyDistribution("normal:0,1").sample(rng) >= 0 for _ in range(50))
+    try:
+        LatencyDistribution("pareto:1")
+        assert False, "expected ValueError"
+    except ValueError:
+        pass
+
+
+if __name__ == "__main__":
+    test_path_responses_and_determinism()
+    test_base_images_and_byte_formats()
+    test_failure_rate()
+    test_concurrency_limit()
+    test_latency_distributions()
+    print("All mock image server tests passed")
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Test parallel panel generation: panels run concurrently through the tools' async paths, route
+to the right tool and land in the metadata.
+"""
+import asyncio
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.run_context import RunContext, run_context_scope, get_current_run_context
+from src.utils.story_metadata_manager import StoryMetadataManager
+from src.visual_comic_crew.tools import panel_batch_generation_tool as batch_module
+from src.visual_comic_crew.tools.panel_batch_generation_tool import PanelBatchGenerationTool
+
+PANEL_DELAY = 0.3
+calls = []
+calls_lock = threading.Lock()
+
+
+class FakeGeminiImageTool:
+    async def _arun(self, prompt, base_image_paths=None):
+        await asyncio.sleep(PANEL_DELAY)
+        number = prompt.split(":")[0].split()[-1]
+        with calls_lock:
+            calls.append(("gemini", number, get_current_run_context().run_id))
+        if number == "3":
+            return "Error: image server exploded"
+        return f"Image generated successfully. Filename: panel_{int(number):03d}_fake.png"
+
+
+class FakeCharacterConsistencyTool:
+    async def _arun(self, action, character_name=None, scene_description=None, panel_number=1, **kwargs):
+        await asyncio.sleep(PANEL_DELAY)
+        with calls_lock:
+            calls.append(("character", str(panel_number), get_current_run_context().run_id))
+        return f"output/comic_panels/consistent_panel_{panel_number:03d}_{character_name.lower()}.png"
+
+
+class FakeMultiCharacterSceneTool:
+    async def _arun(self, character_names, scene_description, panel_number=1):
+        await asyncio.sleep(PANEL_DELAY)
+        with calls_lock:
+            calls.append(("multi", str(panel_number), get_current_run_context().run_id))
+        return f"✅ Multi-character scene generated: multi_panel_{panel_number:03d}.png (characters: {', '.join(character_names)})"
+
+
+def test_panels_generated_in_parallel():
+    originals = (batch_module.GeminiImageTool, batch_module.CharacterConsistencyTool, batch_module.MultiCharacterSceneTool)
+    batch_module.GeminiImageTool = FakeGeminiImageTool
+    batch_module.CharacterConsistencyTool = FakeCharacterConsistencyTool
+    batch_module.MultiCharacterSceneTool = FakeMultiCharacterSceneTool
+    batch_module.PANEL_GENERATION_PARALLELISM = 6
+    context = RunContext.create(run_id="test_panel_batch")
+    try:
+        with run_context_scope(context):
+            metadata = StoryMetadataManager()
+            metadata.set_panels([{'number': n, 'description': f'Scene {n}', 'dialogue': ''} for n in range(1, 7)])
+
+            start = time.time()
+            result = PanelBatchGenerationTool()._run(
+                style="comic",
+                panel_characters_json='{"1": ["Luna"], "2": ["Luna", "Max"]}',
+            )
+            elapsed = time.time() - start
+
+            # Six panels of PANEL_DELAY each finish in about one PANEL_DELAY, not six
+            assert elapsed < PANEL_DELAY * 3, f"took {elapsed:.2f}s"
+            assert "Generated 5/6 panels" in result
+            assert "panel_numbers=[3]" in result
+            assert {kind for kind, _, _ in calls} == {"gemini", "character", "multi"}
+            assert all(run_id == "test_panel_batch" for _, _, run_id in calls)
+
+            filenames = metadata.get_all_image_filenames()
+            assert filenames["1"] == "consistent_panel_001_luna.png"
+            assert filenames["2"] == "multi_panel_002.png"
+            assert filenames["4"] == "panel_004_fake.png"
+            assert "3" not in filenames
+    finally:
+        (batch_module.GeminiImageTool, batch_module.CharacterConsistencyTool, batch_module.MultiCharacterSceneTool) = originals
+        shutil.rmtree(context.workspace, ignore_errors=True)
+
+
+def test_parallelism_limit():
+    """No more than PANEL_GENERATION_PARALLELISM panels wait on the image server at once."""
+    state = {'active': 0, 'peak': 0}
+
+    class CountingGeminiImageTool:
+        async def _arun(self, prompt, base_image_paths=None):
+            state['active'] += 1
+            state['peak'] = max(state['peak'], state['active'])
+            await asyncio.sleep(0.05)
+            state['active'] -= 1
+            number = prompt.split(":")[0].split()[-1]
+            return f"Image generated successfully. Filename: panel_{int(number):03d}_fake.png"
+
+    original_tool, original_parallelism = batch_module.GeminiImageTool, batch_module.PANEL_GENERATION_PARALLELISM
+    batch_module.GeminiImageTool = CountingGeminiImageTool
+    batch_module.PANEL_GENERATION_PARALLELISM = 3
+    context = RunContext.create(run_id="test_panel_batch_limit")
+    try:
+        with run_context_scope(context):
+            StoryMetadataManager().set_panels([{'number': n, 'description': f'Scene {n}'} for n in range(1, 11)])
+            result = PanelBatchGenerationTool()._run()
+        assert "Generated 10/10 panels" in result
+        assert state['peak'] == 3
+    finally:
+        batch_module.GeminiImageTool, batch_module.PANEL_GENERATION_PARALLELISM = original_tool, original_parallelism
+        shutil.rmtree(context.workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_panels_generated_in_parallel()
+    test_parallelism_limit()
+    print("All panel batch generation tests passed")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Test the image backend rate governor: token bucket, concurrency limit, coordination across
+processes and reclaiming slots of dead processes.
+"""
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.cancellation import CancellationToken, RunCancelledError
+from src.utils.rate_governor import GovernorTimeoutError, RateGovernor, limits_for
+
+
+def test_disabled_governor_is_a_no_op():
+    with tempfile.TemporaryDirectory() as tmp:
+        governor = RateGovernor("http://backend", state_path=Path(tmp) / "state.db")
+        assert not governor.enabled
+        with governor.slot() as waited:
+            assert waited == 0.0
+        assert not (Path(tmp) / "state.db").exists()
+
+
+def test_token_bucket_paces_requests():
+    with tempfile.TemporaryDirectory() as tmp:
+        governor = RateGovernor("http://backend", rate=20, burst=2, state_path=Path(tmp) / "state.db")
+        start = time.monotonic()
+        for _ in range(8):
+            with governor.slot():
+                pass
+        # Two requests ride the burst, the other six wait for tokens at 20/s
+        elapsed = time.monotonic() - start
+        assert 0.25 <= elapsed < 1.5, elapsed
+
+
+def test_concurrency_limit_across_threads():
+    with tempfile.TemporaryDirectory() as tmp:
+        governor = RateGovernor("http://backend", max_concurrency=2, state_path=Path(tmp) / "state.db")
+        lock, active, peak = threading.Lock(), [0], [0]
+
+        def work():
+            with governor.slot():
+                with lock:
+                    active[0] += 1
+                    peak[0] = max(peak[0], active[0])
+                time.sleep(0.1)
+                with lock:
+                    active[0] -= 1
+
+        threads = [threading.Thread(target=work) for _ in range(6)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert peak[0] == 2
+        assert governor.in_flight() == 0
+
+
+def _hold_slot(state_path, log_path):
+    governor = RateGovernor("http://backend", max_concurrency=1, state_path=Path(state_path))
+    for _ in range(3):
+        with governor.slot():
+            with open(log_path, "a") as log:
+                log.write(f"{time.time()} start\n")
+            time.sleep(0.05)
+            with open(log_path, "a") as log:
+                log.write(f"{time.time()} end\n")
+
+
+def test_concurrency_limit_across_processes():
+    with tempfile.TemporaryDirectory() as tmp:
+        state_path, log_path = str(Path(tmp) / "state.db"), str(Path(tmp) / "log.txt")
+        context = multiprocessing.get_context("spawn")
+        processes = [context.Process(target=_hold_slot, args=(state_path, log_path)) for _ in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(30)
+        events = [line.split()[1] for line in sorted(Path(log_path).read_text().splitlines(),
+                                                     key=lambda line: float(line.split()[0]))]
+        assert len(events) == 18
+        # With one slot for all processes, starts and ends strictly alternate
+        assert events == ["start", "end"] * 9
+
+
+def test_reclaims_slots_of_dead_processes_and_times_out():
+    with tempfile.TemporaryDirectory() as tmp:
+        governor = RateGovernor("http://backend", max_concurrency=1, state_path=Path(tmp) / "state.db",
+                                queue_timeout=0.2)
+        process = multiprocessing.get_context("spawn").Process(target=time.sleep, args=(0,))
+        process.start()
+        process.join()
+        with governor._transaction() as conn:
+            conn.execute("INSERT INTO slots (holder, name, pid, acquired) VALUES (?, ?, ?, ?)",
+                         ("dead", "http://backend", process.pid, time.time()))
+        with governor.slot():
+            assert governor.in_flight() == 1
+            # The only slot is ours now: a second caller times out
+            try:
+                with governor.slot():
+                    pass
+                assert False, "expected GovernorTimeoutError"
+            except GovernorTimeoutError:
+                pass
+
+
+def test_waiting_honours_cancellation():
+    with tempfile.TemporaryDirectory() as tmp:
+        governor = RateGovernor("http://backend", rate=0.5, burst=1, state_path=Path(tmp) / "state.db")
+        with governor.slot():
+            pass
+        token = CancellationToken()
+        threading.Timer(0.1, token.cancel, args=("stopped",)).start()
+        start = time.monotonic()
+        try:
+            with governor.slot(token):
+                pass
+            assert False, "expected RunCancelledError"
+        except RunCancelledError:
+            pass
+        assert time.monotonic() - start < 1.0
+
+
+def test_per_backend_limits():
+    os.environ["IMAGE_SERVER_LIMITS"] = json.dumps({"http://a/": {"rate": 2, "max_concurrency": 3}})
+    try:
+        assert limits_for("http://a/").rate == 2 and limits_for("http://a/").max_concurrency == 3
+        assert limits_for("http://b/").max_concurrency == 0
+    finally:
+        del os.environ["IMAGE_SERVER_LIMITS"]
+
+
+if __name__ == "__main__":
+    test_disabled_governor_is_a_no_op()
+    test_token_bucket_paces_requests()
+    test_concurrency_limit_across_threads()
+    test_concurrency_limit_across_processes()
+    test_reclaims_slots_of_dead_processes_and_times_out()
+    test_waiting_honours_cancellation()
+    test_per_backend_limits()
+    print("All rate governor tests passed")
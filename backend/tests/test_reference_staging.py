@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+"""
+Test reference staging: one staged file per content hash, hardlinks instead of copies,
+reference counting, pruning by last use and the bounded hash memo.
+"""
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import src.utils.reference_staging as reference_staging
+from src.utils.reference_staging import ReferenceStager
+
+
+def test_same_content_is_staged_once():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        (tmp / "run_a").mkdir()
+        (tmp / "run_b").mkdir()
+        first = tmp / "run_a" / "luna_reference.png"
+        second = tmp / "run_b" / "luna_reference.png"
+        first.write_bytes(b"luna")
+        second.write_bytes(b"luna")
+        stager = ReferenceStager(staging_dir=tmp / "staged")
+
+        staged_a = stager.stage(str(first))
+        staged_b = stager.stage(str(second))
+        assert staged_a == staged_b
+        assert stager.refcount(staged_a) == 2
+        # Hardlinked, not copied
+        assert os.stat(staged_a).st_ino in (first.stat().st_ino, second.stat().st_ino)
+        assert len([p for p in (tmp / "staged").iterdir() if not p.name.startswith(".")]) == 1
+
+        assert stager.stage(str(tmp / "missing.png")) is None
+
+
+def test_release_and_prune():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / "max_reference.png"
+        source.write_bytes(b"max")
+        stager = ReferenceStager(staging_dir=tmp / "staged", ttl_seconds=0)
+
+        staged = stager.stage(str(source))
+        stager.stage(str(source))
+        stager.release([staged])
+        assert stager.refcount(staged) == 1
+        assert stager.prune() == 0 and Path(staged).exists()
+
+        stager.release([staged])
+        assert stager.refcount(staged) == 0
+        assert stager.prune() == 1
+        assert not Path(staged).exists() and source.exists()
+
+
+def test_old_source_is_not_pruned_early():
+    """A hardlink carries its source's old mtime; the TTL counts from the last use, in every process."""
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / "old_reference.png"
+        source.write_bytes(b"drawn last year")
+        year_ago = time.time() - 365 * 24 * 3600
+        os.utime(source, (year_ago, year_ago))
+
+        staged = ReferenceStager(staging_dir=tmp / "staged", ttl_seconds=3600).stage(str(source))
+        assert os.stat(staged).st_mtime < year_ago + 1
+        # Another process sharing the folder knows nothing about this reference
+        other = ReferenceStager(staging_dir=tmp / "staged", ttl_seconds=3600)
+        assert other.prune() == 0 and Path(staged).exists()
+        assert ReferenceStager(staging_dir=tmp / "staged", ttl_seconds=0).prune() == 1
+        assert not Path(staged).exists()
+
+
+def test_remembered_hashes_are_bounded():
+    original = reference_staging.MAX_REMEMBERED_HASHES
+    reference_staging.MAX_REMEMBERED_HASHES = 3
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            stager = ReferenceStager(staging_dir=tmp / "staged")
+            for i in range(5):
+                source = tmp / f"ref{i}.png"
+                source.write_bytes(f"ref{i}".encode())
+                stager.release([stager.stage(str(source))])
+            assert len(stager._hashes) == 3
+    finally:
+        reference_staging.MAX_REMEMBERED_HASHES = original
+
+
+def test_source_rewritten_in_place_is_restaged():
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        source = tmp / "luna_reference.png"
+        source.write_bytes(b"version-1")
+        stager = ReferenceStager(staging_dir=tmp / "staged")
+        old_staged = stager.stage(str(source))
+        stager.release([old_staged])
+
+        # Writing through the hardlink changes the staged file too
+        with open(source, "r+b") as f:
+            f.write(b"VERSION-2")
+        new_staged = stager.stage(str(source))
+        assert new_staged != old_staged
+        assert Path(new_staged).read_bytes() == b"VERSION-2"
+        # The stale name is dropped the next time it is asked for
+        stale = tmp / "stale.png"
+        stale.write_bytes(b"version-1")
+        assert Path(stager.stage(str(stale))).read_bytes() == b"version-1"
+
+
+def test_symlink_fallback():
+    original_link = reference_staging.os.link
+
+    def no_hardlinks(*args, **kwargs):
+        raise OSError("cross-device link")
+
+    reference_staging.os.link = no_hardlinks
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            source = tmp / "ref.png"
+            source.write_bytes(b"ref")
+            staged = ReferenceStager(staging_dir=tmp / "staged").stage(str(source))
+            assert Path(staged).is_symlink()
+            assert Path(staged).read_bytes() == b"ref"
+    finally:
+        reference_staging.os.link = original_link
+
+
+if __name__ == "__main__":
+    test_same_content_is_staged_once()
+    test_release_and_prune()
+    test_old_source_is_not_pruned_early()
+    test_remembered_hashes_are_bounded()
+    test_source_rewritten_in_place_is_restaged()
+    test_symlink_fallback()
+    print("All reference staging tests passed")
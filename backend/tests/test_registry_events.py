@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Test registry change notifications: in-process subscribers, the cross-process change log on
+both registry backends, and the panel_ready events the API derives from them.
+"""
+import multiprocessing
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import src.utils.registry_utils as registry_utils
+from src.utils.image_utils import update_registry_for_image
+from src.utils.registry_events import subscribe
+from src.utils.registry_utils import read_changes, update_many, update_registry_entry
+from src.utils.run_context import RunContext, run_context_scope
+from src.utils.run_events import get_event_hub
+
+
+def test_subscribers_see_committed_changes():
+    run = RunContext.create()
+    received = []
+    unsubscribe = subscribe(received.append)
+    try:
+        with run_context_scope(run):
+            update_registry_for_image("1", "p1.png", True, False)
+            update_registry_for_image("1", "p1.png", True, True)
+            # Writing the same values again is not a change
+            update_registry_for_image("1", "p1.png", True, True)
+        mine = [change for change in received if change.run_id == run.run_id]
+        assert [change.became_verified for change in mine] == [False, True]
+        assert mine[1].before == {"filename": "p1.png", "backend_synced": True,
+                                  "frontend_synced": False, "verified": False}
+        assert mine[1].after["verified"] is True
+    finally:
+        unsubscribe()
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_failing_subscriber_does_not_break_writes():
+    run = RunContext.create()
+
+    def broken(change):
+        raise RuntimeError("subscriber bug")
+
+    unsubscribe = subscribe(broken)
+    try:
+        with run_context_scope(run):
+            update_registry_entry("panel_1", filename="a.png", verified=True)
+            assert registry_utils.read_registry()["panel_1"]["verified"] is True
+    finally:
+        unsubscribe()
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def _verify_panels(run_id: str):
+    with run_context_scope(RunContext(run_id=run_id)):
+        update_many({str(i): {"filename": f"p{i}.png", "backend": True, "frontend": True, "verified": True}
+                     for i in range(1, 4)})
+
+
+def test_change_log_reaches_other_processes():
+    run = RunContext.create()
+    try:
+        with run_context_scope(run):
+            changes, cursor = read_changes()
+            assert changes == [] and cursor == 0
+            worker = multiprocessing.get_context("fork").Process(target=_verify_panels, args=(run.run_id,))
+            worker.start()
+            worker.join()
+            assert worker.exitcode == 0
+            changes, cursor = read_changes(cursor)
+            assert [change.panel_id for change in changes] == ["panel_1", "panel_2", "panel_3"]
+            assert all(change.became_verified for change in changes)
+            # Nothing new since the cursor
+            assert read_changes(cursor) == ([], cursor)
+            registry_utils.clear_registry()
+            update_registry_entry("panel_9", filename="late.png")
+            changes, _ = read_changes(cursor)
+            assert [change.panel_id for change in changes] == ["panel_9"]
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_sqlite_change_log():
+    original_backend = registry_utils.REGISTRY_BACKEND
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PANEL_REGISTRY_DB_PATH"] = str(Path(tmp) / "registry.db")
+        registry_utils.REGISTRY_BACKEND = "sqlite"
+        try:
+            with run_context_scope(RunContext(run_id="events_test")):
+                update_registry_entry("panel_1", filename="a.png")
+                update_registry_entry("panel_1", backend=True, frontend=True, verified=True)
+                changes, cursor = read_changes()
+                assert [change.became_verified for change in changes] == [False, True]
+                assert read_changes(cursor) == ([], cursor)
+            with run_context_scope(RunContext(run_id="other_run")):
+                assert read_changes() == ([], 0)
+        finally:
+            registry_utils.REGISTRY_BACKEND = original_backend
+            del os.environ["PANEL_REGISTRY_DB_PATH"]
+
+
+def test_api_streams_panel_ready():
+    try:
+        import api
+    except ImportError as e:
+        print(f"API dependencies not available, skipping: {e}")
+        return
+    run = RunContext.create()
+    buffer = get_event_hub().create(run.run_id)
+    try:
+        with run_context_scope(run):
+            update_registry_for_image("panel_2", "run_x_panel_2.png", True, False)
+            update_registry_for_image("panel_2", "run_x_panel_2.png", True, True)
+        ready = [event for event in buffer.events_after(0) if event.type == "panel_ready"]
+        assert len(ready) == 1
+        assert ready[0].data["panel_id"] == "panel_2"
+        assert ready[0].data["url"] == "/comic_panels/run_x_panel_2.png"
+    finally:
+        buffer.close()
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_subscribers_see_committed_changes()
+    test_failing_subscriber_does_not_break_writes()
+    test_change_log_reaches_other_processes()
+    test_sqlite_change_log()
+    test_api_streams_panel_ready()
+    print("✅ All registry event tests passed")
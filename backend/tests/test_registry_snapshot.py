@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Test the cached registry snapshot: repeated reads skip parsing, snapshots are read-only, and
+writes from this process or another one invalidate the cache, and finished runs are forgotten.
+"""
+import operator
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import yaml
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import src.utils.registry_utils as registry_utils
+from src.utils.registry_utils import forget_run_snapshots, read_registry, registry_snapshot, update_registry_entry
+from src.utils.run_context import RunContext, run_context_scope
+from src.utils.sqlite_registry import SqliteRegistry
+
+
+def _count_loads():
+    calls = []
+    original = registry_utils._load_registry
+
+    def counting():
+        calls.append(1)
+        return original()
+
+    registry_utils._load_registry = counting
+    return calls, original
+
+
+def test_repeated_reads_are_cached():
+    run = RunContext.create()
+    calls, original = _count_loads()
+    try:
+        with run_context_scope(run):
+            update_registry_entry("panel_1", filename="a.png", verified=True)
+            calls.clear()
+            first = registry_snapshot()
+            start = time.perf_counter()
+            for _ in range(1000):
+                assert registry_snapshot() is first
+            per_read = (time.perf_counter() - start) / 1000
+            assert len(calls) == 1
+            assert per_read < 0.001, per_read
+            # read_registry() hands out a modifiable copy of the same data
+            copy = read_registry()
+            copy["panel_1"]["filename"] = "changed.png"
+            assert registry_snapshot()["panel_1"]["filename"] == "a.png"
+    finally:
+        registry_utils._load_registry = original
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_snapshot_is_read_only():
+    run = RunContext.create()
+    try:
+        with run_context_scope(run):
+            update_registry_entry("panel_1", filename="a.png")
+            snapshot = registry_snapshot()
+            for mutate in (lambda: operator.setitem(snapshot, "panel_2", {}),
+                           lambda: operator.setitem(snapshot["panel_1"], "verified", True)):
+                try:
+                    mutate()
+                except TypeError:
+                    pass
+                else:
+                    raise AssertionError("snapshot should be immutable")
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_writes_invalidate_the_snapshot():
+    run = RunContext.create()
+    try:
+        with run_context_scope(run):
+            update_registry_entry("panel_1", filename="a.png")
+            assert registry_snapshot()["panel_1"]["filename"] == "a.png"
+            update_registry_entry("panel_1", verified=True)
+            assert registry_snapshot()["panel_1"]["verified"] is True
+
+            # Another process rewriting the file is noticed through its mtime and size
+            with open(run.registry_path, "w") as f:
+                yaml.dump({"panel_1": {"filename": "other_process.png"}}, f)
+            later = time.time() + 5
+            os.utime(run.registry_path, (later, later))
+            assert registry_snapshot()["panel_1"] == {"filename": "other_process.png"}
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_sqlite_writes_from_other_connections_invalidate():
+    original_backend = registry_utils.REGISTRY_BACKEND
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = Path(tmp) / "registry.db"
+        os.environ["PANEL_REGISTRY_DB_PATH"] = str(db_path)
+        registry_utils.REGISTRY_BACKEND = "sqlite"
+        try:
+            with run_context_scope(RunContext(run_id="snapshot_test")):
+                update_registry_entry("panel_1", filename="a.png")
+                first = registry_snapshot()
+                assert registry_snapshot() is first
+                # A separate connection stands in for another worker process
+                other = SqliteRegistry(db_path)
+                other.update("snapshot_test", "panel_1", {"verified": True})
+                other.close()
+                assert registry_snapshot()["panel_1"]["verified"] is True
+        finally:
+            registry_utils.REGISTRY_BACKEND = original_backend
+            del os.environ["PANEL_REGISTRY_DB_PATH"]
+
+
+def test_other_runs_writes_keep_the_snapshot():
+    """Concurrent runs each have their own registry; a write to one does not invalidate the others."""
+    first, second = RunContext.create(), RunContext.create()
+    calls, original = _count_loads()
+    try:
+        with run_context_scope(first):
+            update_registry_entry("panel_1", filename="a.png")
+            snapshot = registry_snapshot()
+        calls.clear()
+        for i in range(10):
+            with run_context_scope(second):
+                update_registry_entry(f"panel_{i}", filename=f"b{i}.png")
+            with run_context_scope(first):
+                assert registry_snapshot() is snapshot
+        assert calls == []
+        with run_context_scope(first):
+            update_registry_entry("panel_1", verified=True)
+            assert registry_snapshot()["panel_1"]["verified"] is True
+    finally:
+        registry_utils._load_registry = original
+        for run in (first, second):
+            forget_run_snapshots(run)
+            shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_finished_runs_are_forgotten():
+    runs = [RunContext.create() for _ in range(3)]
+    try:
+        for run in runs:
+            with run_context_scope(run):
+                update_registry_entry("panel_1", filename="a.png")
+                registry_snapshot()
+        before = len(registry_utils._snapshots)
+        assert forget_run_snapshots(runs[0]) == 1
+        assert len(registry_utils._snapshots) == before - 1
+        assert forget_run_snapshots(runs[0]) == 0
+        # The other runs keep their snapshots
+        cached = {key[1] for key in registry_utils._snapshots}
+        assert str(runs[0].registry_path) not in cached
+        assert {str(run.registry_path) for run in runs[1:]} <= cached
+    finally:
+        for run in runs:
+            forget_run_snapshots(run)
+            shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_cached_snapshots_are_bounded():
+    original = registry_utils.MAX_CACHED_SNAPSHOTS
+    registry_utils.MAX_CACHED_SNAPSHOTS = 2
+    runs = [RunContext.create() for _ in range(4)]
+    try:
+        for run in runs:
+            with run_context_scope(run):
+                update_registry_entry("panel_1", filename="a.png")
+                registry_snapshot()
+        assert len(registry_utils._snapshots) == 2
+        # The most recently read runs are the ones kept
+        assert [key[1] for key in registry_utils._snapshots] == [str(run.registry_path) for run in runs[2:]]
+    finally:
+        registry_utils.MAX_CACHED_SNAPSHOTS = original
+        for run in runs:
+            forget_run_snapshots(run)
+            shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_repeated_reads_are_cached()
+    test_snapshot_is_read_only()
+    test_writes_invalidate_the_snapshot()
+    test_sqlite_writes_from_other_connections_invalidate()
+    test_other_runs_writes_keep_the_snapshot()
+    test_finished_runs_are_forgotten()
+    test_cached_snapshots_are_bounded()
+    print("✅ All registry snapshot tests passed")
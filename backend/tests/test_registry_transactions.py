@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Test batch registry updates: update_many() writes once, transactions are atomic, and
+concurrent writers (threads and processes) neither lose updates nor expose half-written files.
+Runs do not wait for each other's registry, and only batch writes are fsynced.
+"""
+import multiprocessing
+import shutil
+import sys
+import threading
+from pathlib import Path
+
+import yaml
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import src.utils.registry_utils as registry_utils
+from src.utils.registry_utils import read_registry, registry_transaction, update_many, update_registry_entry
+from src.utils.run_context import RunContext, run_context_scope
+from src.visual_comic_crew.tools.sync import update_panel_registry
+
+
+def test_update_many_writes_once():
+    run = RunContext.create()
+    writes = []
+    original = registry_utils._write_yaml
+
+    def counting(path, registry, **kwargs):
+        writes.append(path)
+        original(path, registry, **kwargs)
+
+    registry_utils._write_yaml = counting
+    try:
+        with run_context_scope(run):
+            read_registry()
+            writes.clear()
+            update_many({
+                str(i): {"filename": f"p{i}.png", "backend": True, "frontend": True, "verified": True}
+                for i in range(1, 51)
+            })
+            assert len(writes) == 1
+            registry = read_registry()
+            assert len(registry) == 50
+            assert registry["panel_50"] == {"filename": "p50.png", "backend_synced": True,
+                                            "frontend_synced": True, "verified": True}
+    finally:
+        registry_utils._write_yaml = original
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_failed_transaction_writes_nothing():
+    run = RunContext.create()
+    try:
+        with run_context_scope(run):
+            update_registry_entry("panel_1", filename="a.png")
+            try:
+                with registry_transaction() as transaction:
+                    transaction.update("panel_1", filename="b.png")
+                    raise RuntimeError("validation crashed")
+            except RuntimeError:
+                pass
+            assert read_registry()["panel_1"]["filename"] == "a.png"
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_sync_keeps_verified_panels():
+    run = RunContext.create()
+    try:
+        with run_context_scope(run):
+            update_registry_entry("panel_1", filename="good.png", backend=True, frontend=True, verified=True)
+            update_panel_registry({
+                "panel_1": {"filename": "worse.png", "backend": True, "frontend": False, "verified": False},
+                "panel_2": {"filename": "new.png", "backend": True, "frontend": True, "verified": True},
+            })
+            registry = read_registry()
+            assert registry["panel_1"]["filename"] == "good.png"
+            assert registry["panel_2"]["verified"] is True
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_readers_never_see_partial_files():
+    run = RunContext.create()
+    stop = threading.Event()
+    bad_reads = []
+
+    def reader():
+        while not stop.is_set():
+            try:
+                with open(run.registry_path) as f:
+                    data = yaml.safe_load(f)
+                if not isinstance(data, dict):
+                    bad_reads.append(data)
+            except FileNotFoundError:
+                pass
+            except yaml.YAMLError as e:
+                bad_reads.append(e)
+
+    try:
+        with run_context_scope(run):
+            update_registry_entry("panel_0", filename="start.png")
+            thread = threading.Thread(target=reader)
+            thread.start()
+            for i in range(100):
+                update_registry_entry(f"panel_{i}", filename=f"{'x' * 200}_{i}.png", verified=True)
+            stop.set()
+            thread.join()
+        assert not bad_reads, bad_reads[:3]
+    finally:
+        stop.set()
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def _write_panels(run_id: str, worker: int):
+    with run_context_scope(RunContext(run_id=run_id)):
+        for i in range(20):
+            update_registry_entry(f"panel_{worker * 20 + i}", filename=f"{worker}_{i}.png", verified=True)
+
+
+def test_concurrent_processes_lose_no_updates():
+    if registry_utils.fcntl is None:
+        print("fcntl not available, skipping")
+        return
+    run = RunContext.create()
+    try:
+        context = multiprocessing.get_context("fork")
+        workers = [context.Process(target=_write_panels, args=(run.run_id, w)) for w in range(4)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        assert all(worker.exitcode == 0 for worker in workers)
+        with run_context_scope(run):
+            assert len(read_registry()) == 80
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_runs_do_not_wait_for_each_other():
+    first, second = RunContext.create(), RunContext.create()
+    inside = threading.Event()
+    release = threading.Event()
+    done = threading.Event()
+
+    def hold_first():
+        with run_context_scope(first):
+            with registry_transaction() as transaction:
+                transaction.update("panel_1", filename="slow.png")
+                inside.set()
+                release.wait(5)
+
+    def write_second():
+        with run_context_scope(second):
+            update_registry_entry("panel_1", filename="fast.png")
+        done.set()
+
+    holder = threading.Thread(target=hold_first)
+    writer = threading.Thread(target=write_second)
+    try:
+        holder.start()
+        assert inside.wait(5)
+        writer.start()
+        # The second run's write goes through while the first run's transaction is open
+        assert done.wait(2)
+        release.set()
+        holder.join()
+        writer.join()
+        with run_context_scope(first):
+            assert read_registry()["panel_1"]["filename"] == "slow.png"
+    finally:
+        release.set()
+        shutil.rmtree(first.workspace, ignore_errors=True)
+        shutil.rmtree(second.workspace, ignore_errors=True)
+
+
+def test_nested_write_raises_instead_of_deadlocking():
+    run = RunContext.create()
+    try:
+        with run_context_scope(run):
+            update_registry_entry("panel_1", filename="a.png")
+            try:
+                with registry_transaction() as transaction:
+                    transaction.update("panel_1", verified=True)
+                    update_registry_entry("panel_2", filename="b.png")
+            except RuntimeError as e:
+                assert "already locked" in str(e)
+            else:
+                raise AssertionError("expected RuntimeError")
+            # Nothing was written, and the registry is usable again
+            assert read_registry() == {"panel_1": {"filename": "a.png"}}
+            update_registry_entry("panel_2", filename="b.png")
+            assert read_registry()["panel_2"] == {"filename": "b.png"}
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_only_batch_writes_are_fsynced():
+    run = RunContext.create()
+    synced = []
+    original = registry_utils.os.fsync
+
+    def counting(fd):
+        synced.append(fd)
+        original(fd)
+
+    registry_utils.os.fsync = counting
+    try:
+        with run_context_scope(run):
+            update_registry_entry("panel_1", filename="a.png", verified=True)
+            assert synced == []
+            update_many({"panel_2": {"filename": "b.png", "verified": True}})
+            # The registry file and its change log
+            assert len(synced) == 2
+    finally:
+        registry_utils.os.fsync = original
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    test_update_many_writes_once()
+    test_failed_transaction_writes_nothing()
+    test_sync_keeps_verified_panels()
+    test_readers_never_see_partial_files()
+    test_concurrent_processes_lose_no_updates()
+    test_runs_do_not_wait_for_each_other()
+    test_nested_write_raises_instead_of_deadlocking()
+    test_only_batch_writes_are_fsynced()
+    print("✅ All registry transaction tests passed")
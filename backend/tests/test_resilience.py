@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test the image client's resilience: retries with backoff on 5xx and timeouts, the circuit
+breaker, hedged requests and the structured outcome of each call.
+"""
+import sys
+import time
+from pathlib import Path
+
+import requests
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.cancellation import get_current_cancel_token
+from src.utils.image_client import ImageServerClient
+from src.utils.run_context import RunContext, run_context_scope
+from src.utils.resilience import CircuitBreaker, CircuitOpenError, LatencyTracker, RetryPolicy
+from conftest import FakeImageServer
+
+
+def _serve(script) -> FakeImageServer:
+    """Answers each request with the next (delay, status) of the script; the last entry repeats."""
+    def step(index):
+        return script[min(index, len(script) - 1)]
+
+    def respond(body, index):
+        status = step(index)[1]
+        return status, {"status": "success", "image_path": f"output/call_{index}.png"} if status == 200 else {"detail": "boom"}
+
+    return FakeImageServer(respond, delay=lambda index: step(index)[0])
+
+
+def _client(url, **kwargs):
+    kwargs.setdefault("retry_policy", RetryPolicy(max_attempts=3, base_delay=0.01, max_delay=0.02))
+    kwargs.setdefault("breaker", CircuitBreaker("test", failure_threshold=10, reset_timeout=0.2))
+    kwargs.setdefault("hedging", False)
+    return ImageServerClient(server_url=url, **kwargs)
+
+
+def test_retries_5xx_then_succeeds():
+    with _serve([(0, 503), (0, 502), (0, 200)]) as server:
+        result = _client(server.url).generate({"prompt": "Panel 1"}, tool="TestTool", use_cache=False)
+        assert result["image_path"] == "output/call_2.png"
+        assert result["outcome"]["status"] == "success"
+        assert result["outcome"]["attempts"] == 3
+        assert len(result["outcome"]["retry_delays"]) == 2
+
+
+def test_client_errors_are_not_retried():
+    with _serve([(0, 400)]) as server:
+        try:
+            _client(server.url).generate({"prompt": "Panel 1"}, tool="TestTool", use_cache=False)
+            assert False, "expected HTTPError"
+        except requests.HTTPError as e:
+            assert e.outcome.attempts == 1 and e.outcome.status == "http_error"
+        assert server.calls == 1
+
+
+def test_timeouts_are_retried():
+    with _serve([(0.5, 200), (0, 200)]) as server:
+        result = _client(server.url, read_timeout=0.2).generate({"prompt": "Panel 1"}, tool="TestTool", use_cache=False)
+        assert result["outcome"]["attempts"] == 2
+
+
+def test_circuit_breaker_fails_fast_and_recovers():
+    with _serve([(0, 500), (0, 500), (0, 200)]) as server:
+        client = _client(server.url, retry_policy=RetryPolicy(max_attempts=2, base_delay=0.01, max_delay=0.01),
+                          breaker=CircuitBreaker("test", failure_threshold=2, reset_timeout=0.3))
+        try:
+            client.generate({"prompt": "Panel 1"}, tool="TestTool", use_cache=False)
+            assert False, "expected HTTPError"
+        except requests.HTTPError as e:
+            assert e.outcome.attempts == 2
+        assert client.breaker.state == CircuitBreaker.OPEN
+
+        start = time.monotonic()
+        try:
+            client.generate({"prompt": "Panel 1"}, tool="TestTool", use_cache=False)
+            assert False, "expected CircuitOpenError"
+        except CircuitOpenError as e:
+            assert e.outcome.status == "circuit_open"
+        assert time.monotonic() - start < 0.1
+        assert server.calls == 2
+
+        time.sleep(0.35)
+        result = client.generate({"prompt": "Panel 1"}, tool="TestTool", use_cache=False)
+        assert result["outcome"]["status"] == "success"
+        assert client.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_hedged_request_beats_slow_primary():
+    with _serve([(1.5, 200), (0, 200)]) as server:
+        client = _client(server.url, hedging=True)
+        for _ in range(25):
+            client.latency.record(0.1)
+        start = time.monotonic()
+        result = client.generate({"prompt": "Panel 1"}, tool="TestTool", use_cache=False)
+        assert time.monotonic() - start < 1.0
+        assert result["outcome"]["hedged"] is True
+        assert result["image_path"] == "output/call_1.png"
+        client.close()
+
+
+def test_hedged_requests_keep_the_run_context():
+    """Both hedged requests run in the caller's run (so cancellation reaches them) and go to different servers."""
+    servers = [_serve([(1.0, 200), (0, 200)]) for _ in range(2)]
+    try:
+        client = _client(",".join(server.url for server in servers), hedging=True)
+        for _ in range(25):
+            client.latency.record(0.1)
+        seen = []
+        original_post = client.post
+
+        def recording_post(payload, tool="unknown", endpoint=None):
+            seen.append((get_current_cancel_token(), endpoint.url))
+            return original_post(payload, tool=tool, endpoint=endpoint)
+
+        client.post = recording_post
+        run = RunContext.create()
+        with run_context_scope(run):
+            result = client.generate({"prompt": "Panel 1"}, tool="TestTool", use_cache=False)
+        assert result["outcome"]["hedged"] is True
+        assert [token for token, _ in seen] == [run.cancel_token, run.cancel_token]
+        assert len({url for _, url in seen}) == 2
+        client.close()
+    finally:
+        for server in servers:
+            server.close()
+
+
+def test_backoff_and_percentile():
+    policy = RetryPolicy(max_attempts=5, base_delay=1.0, max_delay=3.0)
+    assert all(0 <= policy.backoff(attempt) <= min(3.0, 2 ** attempt) for attempt in range(5) for _ in range(20))
+    tracker = LatencyTracker(window=100)
+    for value in range(1, 101):
+        tracker.record(value / 100)
+    assert tracker.percentile(0.95) == 0.95
+
+
+if __name__ == "__main__":
+    test_retries_5xx_then_succeeds()
+    test_client_errors_are_not_retried()
+    test_timeouts_are_retried()
+    test_circuit_breaker_fails_fast_and_recovers()
+    test_hedged_request_beats_slow_primary()
+    test_hedged_requests_keep_the_run_context()
+    test_backoff_and_percentile()
+    print("All resilience tests passed")
@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Test the completed-comic result cache: topic normalization, config hashing, TTL and LRU eviction.
+"""
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.result_cache import ComicResultCache, normalize_topic
+
+
+def _make_cache(tmp: Path, **kwargs) -> ComicResultCache:
+    config = tmp / "agents.yaml"
+    if not config.exists():
+        config.write_text("story_writer:\n  role: writer\n")
+    return ComicResultCache(cache_dir=tmp / "cache", config_files=[config], **kwargs)
+
+
+def test_hit_for_equivalent_topic():
+    """Topics differing only in case, spacing or punctuation share an entry."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _make_cache(Path(tmp))
+        assert cache.get("A cat who wants to fly") is None
+        cache.put("A cat who wants to fly", "# Cat comic", file_path="cat.md", pdf_path="cat.pdf")
+
+        hit = cache.get("  a CAT who wants to fly! ")
+        assert hit is not None
+        assert hit['markdown'] == "# Cat comic"
+        assert hit['pdf_path'] == "cat.pdf"
+        assert normalize_topic("A  Cat!") == "a cat"
+
+
+def test_config_change_invalidates():
+    """Editing the crew configuration changes the key, so old comics are not served."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _make_cache(Path(tmp))
+        cache.put("storm on jupiter", "# Storm")
+        (Path(tmp) / "agents.yaml").write_text("story_writer:\n  role: poet\n")
+        assert cache.get("storm on jupiter") is None
+
+
+def test_ttl_expiry():
+    """Entries older than the TTL are dropped on lookup."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _make_cache(Path(tmp), ttl_seconds=0.05)
+        cache.put("magic book", "# Magic")
+        time.sleep(0.1)
+        assert cache.get("magic book") is None
+        assert len(cache) == 0
+
+
+def test_lru_eviction():
+    """The least recently used entry goes first when the cache is full."""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = _make_cache(Path(tmp), max_entries=2)
+        cache.put("first", "# 1")
+        time.sleep(0.01)
+        cache.put("second", "# 2")
+        time.sleep(0.01)
+        assert cache.get("first") is not None  # first is now more recent than second
+        time.sleep(0.01)
+        cache.put("third", "# 3")
+
+        assert cache.get("second") is None
+        assert cache.get("first") is not None
+        assert cache.get("third") is not None
+
+
+def test_concurrent_index_writers():
+    """Writers sharing a cache directory each save the index through their own temp file."""
+    with tempfile.TemporaryDirectory() as tmp:
+        caches = [_make_cache(Path(tmp)) for _ in range(4)]
+        errors = []
+
+        def writer(cache, worker):
+            try:
+                for i in range(20):
+                    cache.put(f"topic {worker} {i}", "# Comic")
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=writer, args=(cache, w)) for w, cache in enumerate(caches)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        assert not errors, errors
+        assert not list((Path(tmp) / "cache").glob("*.tmp"))
+
+
+def _run_stream_with(markdown: str, export_status: str) -> list:
+    """Run api.run_crew_stream with a fake crew and export; return what it stored in the cache."""
+    import api
+    stored = []
+    fake_crew = SimpleNamespace(crew=lambda: SimpleNamespace(kickoff=lambda inputs: markdown))
+    fake_job = SimpleNamespace(status=export_status, pdf_path="c.pdf" if export_status == "ready" else None, error="x")
+    fakes = {
+        'VisualComicCrew': lambda run_context=None: fake_crew,
+        'ComicExporter': lambda topic: SimpleNamespace(save_markdown=lambda content: "c.md", timestamp="t"),
+        'get_export_pipeline': lambda: SimpleNamespace(submit=lambda *args, on_done, **kwargs: on_done(fake_job)),
+        'get_result_cache': lambda: SimpleNamespace(put=lambda topic, content, **kwargs: stored.append(content)),
+        'CACHE_ENABLED': True,
+    }
+    originals = {name: getattr(api, name) for name in fakes}
+    try:
+        for name, fake in fakes.items():
+            setattr(api, name, fake)
+        api.run_crew_stream("a topic", lambda payload: None)
+    finally:
+        for name, original in originals.items():
+            setattr(api, name, original)
+    return stored
+
+
+def test_only_real_results_are_cached():
+    try:
+        import api  # noqa: F401
+    except ImportError as e:
+        print(f"API dependencies not available, skipping: {e}")
+        return
+    assert _run_stream_with("# A comic", "ready") == ["# A comic"]
+    assert _run_stream_with("# A comic", "failed") == []
+    assert _run_stream_with("", "ready") == []
+
+
+if __name__ == "__main__":
+    test_hit_for_equivalent_topic()
+    test_config_change_invalidates()
+    test_ttl_expiry()
+    test_lru_eviction()
+    test_concurrent_index_writers()
+    test_only_real_results_are_cached()
+    print("All result cache tests passed")
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+"""
+Test per-run workspace isolation: registries and story metadata of concurrent runs stay separate.
+"""
+import shutil
+import sys
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.run_context import RunContext, run_context_scope, get_current_run_context, namespaced_panel_filename
+from src.utils.registry_utils import read_registry, update_registry_entry, clear_registry
+from src.utils.story_metadata_manager import StoryMetadataManager, get_current_story_metadata
+
+
+def test_registries_are_isolated_per_run():
+    """Clearing one run's registry must not touch another run's panels."""
+    run_a = RunContext.create()
+    run_b = RunContext.create()
+    try:
+        with run_context_scope(run_a):
+            update_registry_entry("panel_1", filename="a.png", backend=True, frontend=True, verified=True)
+        with run_context_scope(run_b):
+            clear_registry()
+            update_registry_entry("panel_1", filename="b.png", backend=True, frontend=False, verified=False)
+
+        with run_context_scope(run_a):
+            registry = read_registry()
+            assert registry["panel_1"]["filename"] == "a.png"
+            assert registry["panel_1"]["verified"] is True
+        with run_context_scope(run_b):
+            assert read_registry()["panel_1"]["filename"] == "b.png"
+
+        assert run_a.registry_path != run_b.registry_path
+        assert get_current_run_context() is None
+    finally:
+        shutil.rmtree(run_a.workspace, ignore_errors=True)
+        shutil.rmtree(run_b.workspace, ignore_errors=True)
+
+
+def test_story_metadata_follows_run():
+    """Inside a run, the current story metadata is the run's own file."""
+    run = RunContext.create()
+    try:
+        with run_context_scope(run):
+            assert get_current_story_metadata() is None
+            manager = StoryMetadataManager()
+            manager.set_topic("Isolated topic")
+            assert manager.story_id == run.run_id
+            assert Path(manager.metadata_file) == run.metadata_file
+            assert get_current_story_metadata().get_topic() == "Isolated topic"
+    finally:
+        shutil.rmtree(run.workspace, ignore_errors=True)
+
+
+def test_panel_filenames_are_namespaced():
+    """Panel filenames get the run prefix exactly once, and none outside a run."""
+    run = RunContext(run_id="abc123")
+    assert namespaced_panel_filename("panel_001.png") == "panel_001.png"
+    with run_context_scope(run):
+        name = namespaced_panel_filename("panel_001.png")
+        assert name == "run_abc123_panel_001.png"
+        assert namespaced_panel_filename(name) == name
+
+
+if __name__ == "__main__":
+    test_registries_are_isolated_per_run()
+    test_story_metadata_follows_run()
+    test_panel_filenames_are_namespaced()
+    print("✅ Run context tests passed")
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Test the per-run event ring buffer used for resumable SSE streams.
+"""
+import asyncio
+import sys
+import threading
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.run_events import RunEventBuffer, RunEventHub, parse_last_event_id
+
+
+def test_event_ids_and_replay():
+    """Events are numbered and a reconnect replays only what was missed."""
+    buffer = RunEventBuffer("run1")
+    buffer.publish_status({'status': 'Starting', 'details': None})
+    buffer.publish_status({'status': 'error', 'details': 'boom'})
+    buffer.publish_status({'status': 'complete', 'markdown': '# Comic'})
+
+    events = buffer.events_after(0)
+    assert [e.seq for e in events] == [1, 2, 3]
+    assert [e.type for e in events] == ['status', 'error', 'complete']
+    assert events[2].event_id == "run1:3"
+    assert events[2].to_sse().startswith("id: run1:3\ndata: ")
+    assert [e.seq for e in buffer.events_after(2)] == [3]
+
+
+def test_ring_buffer_drops_oldest():
+    buffer = RunEventBuffer("run2", maxlen=3)
+    for i in range(5):
+        buffer.publish('status', status=f'step {i}')
+    assert [e.seq for e in buffer.events_after(0)] == [3, 4, 5]
+    assert buffer.last_seq == 5
+
+
+def test_stream_follows_live_events_until_closed():
+    """A subscriber receives events published from another thread and stops on close."""
+    buffer = RunEventBuffer("run3")
+    buffer.publish('status', status='before subscribe')
+
+    def producer():
+        for i in range(3):
+            buffer.publish('status', status=f'live {i}')
+        buffer.close()
+
+    async def consume():
+        received = []
+        threading.Timer(0.05, producer).start()
+        async for event in buffer.stream(0, heartbeat=1.0):
+            if event is not None:
+                received.append(event.data['status'])
+        return received
+
+    received = asyncio.run(asyncio.wait_for(consume(), timeout=5))
+    assert received == ['before subscribe', 'live 0', 'live 1', 'live 2']
+
+
+def test_parse_last_event_id_and_hub_eviction():
+    assert parse_last_event_id("abc123:7") == ("abc123", 7)
+    assert parse_last_event_id("7") == (None, 0)
+    assert parse_last_event_id(None) == (None, 0)
+
+    hub = RunEventHub(max_retained=1)
+    first = hub.create("first")
+    first.close()
+    hub.create("second")
+    assert hub.get("first") is None
+    assert hub.get("second") is not None
+
+
+if __name__ == "__main__":
+    test_event_ids_and_replay()
+    test_ring_buffer_drops_oldest()
+    test_stream_follows_live_events_until_closed()
+    test_parse_last_event_id_and_hub_eviction()
+    print("✅ Run event tests passed")
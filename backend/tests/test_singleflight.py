@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+"""
+Test request coalescing: concurrent identical image requests share one server call, and
+errors and cancellations are handled per caller.
+"""
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+from src.utils.cancellation import CancellationToken, RunCancelledError
+from src.utils.image_client import ImageServerClient
+from src.utils.resilience import CircuitBreaker, RetryPolicy
+from src.utils.singleflight import SingleFlight
+from conftest import FakeImageServer
+
+
+def _run_threads(count, target):
+    results, threads = [None] * count, []
+    for i in range(count):
+        thread = threading.Thread(target=lambda i=i: results.__setitem__(i, target(i)))
+        threads.append(thread)
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+def test_identical_requests_share_one_call():
+    def respond(body, index):
+        return 200, {"status": "success", "image_path": f"output/call_{index + 1}.png"}
+
+    with FakeImageServer(respond, delay=0.3) as server:
+        client = ImageServerClient(server_url=server.url,
+                                   retry_policy=RetryPolicy(max_attempts=1),
+                                   breaker=CircuitBreaker("test"), hedging=False)
+        prompts = ["Panel 1", "Panel 1", "Panel 1", "Panel 1", "Panel 2"]
+        results = _run_threads(len(prompts), lambda i: client.generate({"prompt": prompts[i]}, tool="TestTool",
+                                                                      use_cache=False))
+        assert sorted(server.prompts) == ["Panel 1", "Panel 2"]
+        panel_1 = results[:4]
+        assert len({result["image_path"] for result in panel_1}) == 1
+        assert sum(1 for result in panel_1 if result.get("coalesced")) == 3
+        assert results[4]["image_path"] != panel_1[0]["image_path"] and not results[4].get("coalesced")
+
+        # Once the call has finished, the next identical request goes to the server again
+        client.generate({"prompt": "Panel 1"}, tool="TestTool", use_cache=False)
+        assert server.prompts.count("Panel 1") == 2
+
+
+def test_errors_are_shared():
+    flights = SingleFlight("test")
+    calls = []
+
+    def failing():
+        calls.append(1)
+        time.sleep(0.2)
+        raise ValueError("server exploded")
+
+    def call(_):
+        try:
+            flights.do("key", failing)
+        except ValueError as e:
+            return str(e)
+
+    assert _run_threads(3, call) == ["server exploded"] * 3
+    assert len(calls) == 1 and flights.in_flight() == 0
+
+
+def test_leader_cancellation_is_not_inherited():
+    flights = SingleFlight("test")
+    leader_token, started, calls = CancellationToken(), threading.Event(), []
+
+    def work():
+        calls.append(threading.current_thread().name)
+        if len(calls) == 1:
+            started.set()
+            leader_token.wait(1)
+            leader_token.raise_if_cancelled()
+        return "image.png"
+
+    def leader():
+        try:
+            return flights.do("key", work, cancel_token=leader_token)
+        except RunCancelledError:
+            return "cancelled"
+
+    leader_thread_result = []
+    thread = threading.Thread(target=lambda: leader_thread_result.append(leader()))
+    thread.start()
+    started.wait(1)
+    follower = []
+    follower_thread = threading.Thread(target=lambda: follower.append(flights.do("key", work)))
+    follower_thread.start()
+    time.sleep(0.1)
+    leader_token.cancel("client went away")
+    thread.join()
+    follower_thread.join()
+    assert leader_thread_result == ["cancelled"]
+    # The follower ran the call itself instead of failing with the leader's cancellation
+    assert follower == [("image.png", False)] and len(calls) == 2
+
+
+def test_waiter_honours_own_cancellation():
+    flights = SingleFlight("test")
+    release = threading.Event()
+    thread = threading.Thread(target=lambda: flights.do("key", lambda: release.wait(2)))
+    thread.start()
+    time.sleep(0.05)
+    token = CancellationToken()
+    token.cancel("stopped")
+    start = time.monotonic()
+    try:
+        flights.do("key", lambda: None, cancel_token=token)
+        assert False, "expected RunCancelledError"
+    except RunCancelledError:
+        pass
+    assert time.monotonic() - start < 0.5
+    release.set()
+    thread.join()
+
+
+if __name__ == "__main__":
+    test_identical_requests_share_one_call()
+    test_errors_are_shared()
+    test_leader_cancellation_is_not_inherited()
+    test_waiter_honours_own_cancellation()
+    print("All singleflight tests passed")
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Test the SQLite panel registry: row-level upserts, per-run rows, concurrent writers and the
+registry_utils API on top of it.
+"""
+import os
+import sys
+import tempfile
+import threading
+from pathlib import Path
+
+# Add the backend directory to the Python path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+
+import src.utils.registry_utils as registry_utils
+from src.utils.run_context import RunContext, run_context_scope
+from src.utils.sqlite_registry import SqliteRegistry
+
+
+def test_upsert_changes_only_given_fields():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = SqliteRegistry(Path(tmp) / "registry.db")
+        registry.update("run", "panel_1", {"filename": "a.png", "backend_synced": True})
+        registry.update("run", "panel_1", {"verified": False})
+        assert registry.read("run") == {
+            "panel_1": {"filename": "a.png", "backend_synced": True, "verified": False},
+        }
+        registry.close()
+
+
+def test_runs_have_separate_rows():
+    with tempfile.TemporaryDirectory() as tmp:
+        registry = SqliteRegistry(Path(tmp) / "registry.db")
+        registry.update("a", "panel_1", {"filename": "a.png"})
+        registry.update("b", "panel_1", {"filename": "b.png"})
+        registry.clear("b")
+        assert registry.read("a") == {"panel_1": {"filename": "a.png"}}
+        assert registry.read("b") == {}
+        registry.close()
+
+
+def test_concurrent_writers_lose_nothing():
+    """Eight writers, each with its own connection, update different panels at the same time."""
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "registry.db"
+        errors = []
+
+        def writer(worker: int):
+            registry = SqliteRegistry(path)
+            try:
+                for i in range(25):
+                    registry.update("run", f"panel_{worker * 25 + i}", {"filename": f"{worker}_{i}.png"})
+                    registry.update("run", f"panel_{worker * 25 + i}", {"verified": True})
+            except Exception as e:
+                errors.append(e)
+            finally:
+                registry.close()
+
+        threads = [threading.Thread(target=writer, args=(w,)) for w in range(8)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert not errors
+        entries = SqliteRegistry(path).read("run")
+        assert len(entries) == 200
+        assert all(entry["verified"] is True for entry in entries.values())
+
+
+def test_registry_api_on_sqlite_backend():
+    """read_registry/update_registry_entry/clear_registry behave the same on the SQLite backend."""
+    original_backend = registry_utils.REGISTRY_BACKEND
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["PANEL_REGISTRY_DB_PATH"] = str(Path(tmp) / "registry.db")
+        registry_utils.REGISTRY_BACKEND = "sqlite"
+        run = RunContext(run_id="sqlite_test")
+        try:
+            with run_context_scope(run):
+                registry_utils.update_registry_entry("1", filename="p1.png", backend=True, frontend=True, verified=True)
+                registry_utils.update_registry_entry("panel_2", filename="p2.png")
+                registry = registry_utils.read_registry()
+                assert registry["panel_1"] == {"filename": "p1.png", "backend_synced": True,
+                                               "frontend_synced": True, "verified": True}
+                assert registry["panel_2"] == {"filename": "p2.png"}
+            # Outside the run the shared registry is empty
+            assert registry_utils.read_registry() == {}
+            with run_context_scope(run):
+                registry_utils.clear_registry()
+                assert registry_utils.read_registry() == {}
+            assert not run.registry_path.exists()
+        finally:
+            registry_utils.REGISTRY_BACKEND = original_backend
+            del os.environ["PANEL_REGISTRY_DB_PATH"]
+
+
+if __name__ == "__main__":
+    test_upsert_changes_only_given_fields()
+    test_runs_have_separate_rows()
+    test_concurrent_writers_lose_nothing()
+    test_registry_api_on_sqlite_backend()
+    print("✅ All SQLite registry tests passed")
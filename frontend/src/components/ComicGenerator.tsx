@@ -10,10 +10,16 @@ type StatusUpdate = {
   details: string | null;
 };
 
+type ReadyPanel = {
+  panelId: string;
+  src: string;
+};
+
 export default function ComicGenerator() {
   const [topic, setTopic] = useState('');
   const [status, setStatus] = useState<StatusUpdate[]>([]);
   const [finalComic, setFinalComic] = useState<string | null>(null);
+  const [readyPanels, setReadyPanels] = useState<ReadyPanel[]>([]);
   const [isGenerating, setIsGenerating] = useState(false);
   const eventSourceRef = useRef<EventSource | null>(null);
 
@@ -23,6 +29,7 @@ export default function ComicGenerator() {
     setIsGenerating(true);
     setStatus([{ status: 'Connecting to server...', details: null }]);
     setFinalComic(null);
+    setReadyPanels([]);
 
     // Allow using same hostname as page when accessed over LAN
     const apiHost = typeof window !== 'undefined' ? (window.location.hostname === 'localhost' ? '127.0.0.1' : window.location.hostname) : '127.0.0.1';
@@ -40,7 +47,12 @@ export default function ComicGenerator() {
       const data = JSON.parse(event.data);
       console.log('SSE message', data);
 
-      if (data.status === 'complete') {
+      if (data.type === 'panel_ready') {
+        // A regenerated panel replaces its earlier image
+        const panel = { panelId: data.panel_id, src: `http://${apiHost}:8002${data.url}` };
+        setReadyPanels(prev => [...prev.filter(p => p.panelId !== panel.panelId), panel]);
+        setStatus(prev => [...prev, data]);
+      } else if (data.status === 'complete') {
         setFinalComic(data.markdown);
         setStatus(prev => [...prev, { status: 'Comic generation complete!', details: 'Scroll down to see your comic.' }]);
         eventSource.close();
@@ -49,6 +61,10 @@ export default function ComicGenerator() {
         setStatus(prev => [...prev, { status: 'An error occurred', details: data.details }]);
         eventSource.close();
         setIsGenerating(false);
+      } else if (data.status === 'cancelled') {
+        setStatus(prev => [...prev, { status: 'Generation cancelled', details: data.details }]);
+        eventSource.close();
+        setIsGenerating(false);
       } else {
         setStatus(prev => [...prev, data]);
       }
@@ -113,6 +129,18 @@ export default function ComicGenerator() {
         </div>
       )}
 
+      {readyPanels.length > 0 && !finalComic && (
+        <div className="mt-8 max-w-4xl mx-auto bg-gray-800 shadow-lg rounded-lg p-6">
+          <h2 className="text-xl font-semibold text-white mb-4">Panels so far</h2>
+          <div className="grid grid-cols-2 md:grid-cols-3 gap-4">
+            {readyPanels.map(panel => (
+              // eslint-disable-next-line @next/next/no-img-element
+              <img key={panel.panelId} src={panel.src} alt={panel.panelId} className="rounded-md w-full" />
+            ))}
+          </div>
+        </div>
+      )}
+
       {finalComic && (
         <div className="mt-8 max-w-4xl mx-auto bg-gray-800 shadow-lg rounded-lg p-8">
           <h2 className="text-2xl font-bold text-white mb-4 border-b border-gray-700 pb-2">Your Comic Strip</h2>